@@ -1,2 +1,2 @@
-python3 src/main.py
-cd public && python3 -m http.server 8888
\ No newline at end of file
+python3 src/main.py "$@"
+python3 src/main.py serve --port 8888
\ No newline at end of file
@@ -0,0 +1,246 @@
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from build_manifest import hash_file
+from build_report import (
+    StageTimer,
+    static_stages
+)
+from output_files import (
+    copy_atomic,
+    remove_output,
+    write_if_changed
+)
+from template import Template
+
+
+
+
+# Name of the mapping from original to fingerprinted asset paths, written to the output directory
+asset_manifest_name = "asset-manifest.json"
+
+# Number of hex digits of the content hash kept in fingerprinted names
+fingerprint_length = 10
+
+# Double-quoted href and src attributes in HTML
+url_attribute_pattern = re.compile(r'(\b(?:href|src)=")([^"]*)(")')
+
+
+
+
+def fingerprinted_path(relative_path, digest):
+    """
+    Insert a content hash into a file name, before its extension.
+
+    :param relative_path:   Path of the asset relative to the static directory
+    :param digest:          Hex digest of the asset's content
+    :return:                The fingerprinted relative path, e.g. images/logo.3f2a9c01d4.png
+    """
+    root, extension = os.path.splitext(relative_path)
+    return f"{root}.{digest[:fingerprint_length]}{extension}"
+
+
+
+
+class AssetMap:
+    def __init__(self, mapping):
+        """
+        Initialize an AssetMap rewriting site URLs of assets to their fingerprinted names.
+
+        Only root-relative URLs such as "/images/logo.png" are rewritten, since
+        relative URLs depend on the page they appear in.
+
+        :param mapping:     Dictionary mapping asset paths relative to the static directory
+                            to their fingerprinted paths
+        """
+        self.mapping = mapping
+        self.urls = {
+            "/" + path.replace(os.sep, "/"): "/" + fingerprinted.replace(os.sep, "/")
+            for path, fingerprinted in mapping.items()
+        }
+        self.digest = hashlib.sha256(json.dumps(mapping, sort_keys=True).encode()).hexdigest()
+
+    def rewrite_url(self, url):
+        """
+        Map the URL of an asset to its fingerprinted URL, keeping any query or fragment.
+
+        :param url:         A URL from a link, image or template attribute
+        :return:            The fingerprinted URL, or url unchanged if it is not an asset
+        """
+        end = len(url)
+        for separator in "?#":
+            index = url.find(separator)
+            if index != -1:
+                end = min(end, index)
+        fingerprinted = self.urls.get(url[:end])
+        if fingerprinted is None:
+            return url
+        return fingerprinted + url[end:]
+
+    def rewrite_html(self, html):
+        """
+        Rewrite the asset URLs of every double-quoted href and src attribute in HTML.
+
+        :param html:        HTML text
+        :return:            The HTML with fingerprinted asset URLs
+        """
+        return url_attribute_pattern.sub(
+            lambda match: match.group(1) + self.rewrite_url(match.group(2)) + match.group(3), html
+        )
+
+    def rewrite_template(self, template):
+        """
+        Rewrite the asset URLs in the static parts of a compiled template.
+
+        :param template:    A Template object
+        :return:            A new Template whose digest also covers the asset mapping,
+                            so pages are rebuilt when an asset changes
+        """
+        segments = tuple(
+            self.rewrite_html(segment) if segment.__class__ is str else segment
+            for segment in template.segments
+        )
+        digest = hashlib.sha256(f"{template.digest}\0{self.digest}".encode()).hexdigest()
+        return Template(segments, digest, template.files)
+
+
+
+
+def hash_assets(source_path, relative_paths, hash_cache, jobs=4):
+    """
+    Hash assets in parallel, reusing hashes of files whose size and mtime are unchanged.
+
+    :param source_path:     The static directory path
+    :param relative_paths:  Paths of the assets relative to the static directory
+    :param hash_cache:      Dictionary mapping relative paths to {"size", "mtime_ns", "hash"}
+                            entries, updated in place and pruned to relative_paths
+    :param jobs:            Number of threads used to hash files
+    :return:                A (hashes, bytes_read) tuple, hashes mapping each relative path to its digest
+    """
+    hashes = {}
+    to_hash = []
+    for relative_path in relative_paths:
+        stat = os.stat(os.path.join(source_path, relative_path))
+        entry = hash_cache.get(relative_path)
+        if entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            hashes[relative_path] = entry["hash"]
+        else:
+            to_hash.append((relative_path, stat))
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        digests = list(executor.map(lambda item: hash_file(os.path.join(source_path, item[0])), to_hash))
+
+    bytes_read = 0
+    for (relative_path, stat), digest in zip(to_hash, digests):
+        hashes[relative_path] = digest
+        hash_cache[relative_path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest}
+        bytes_read += stat.st_size
+
+    for relative_path in set(hash_cache) - set(hashes):
+        del hash_cache[relative_path]
+    return hashes, bytes_read
+
+
+
+
+def list_assets(source_path):
+    """
+    List the files of the static directory.
+
+    :param source_path:     The static directory path
+    :return:                Sorted paths relative to source_path
+    """
+    relative_paths = []
+    for root, dirs, names in os.walk(source_path):
+        dirs.sort()
+        for name in sorted(names):
+            relative_paths.append(os.path.relpath(os.path.join(root, name), source_path))
+    return relative_paths
+
+
+
+
+def map_assets(source_path, hash_cache=None, jobs=4):
+    """
+    Compute the AssetMap fingerprint_directory would produce, without copying anything.
+
+    Used by shard builds that generate pages linking to assets copied by another shard.
+
+    :param source_path:     The static directory path
+    :param hash_cache:      Optional dictionary of cached hashes, see hash_assets
+    :param jobs:            Number of threads used to hash files
+    :return:                An AssetMap object
+    """
+    relative_paths = list_assets(source_path)
+    hashes, _ = hash_assets(source_path, relative_paths, {} if hash_cache is None else hash_cache, jobs)
+    return AssetMap({
+        relative_path: fingerprinted_path(relative_path, hashes[relative_path]) for relative_path in relative_paths
+    })
+
+
+
+
+def fingerprint_directory(source_path, dest_path, previous_files=(), hash_cache=None, jobs=4, report=None):
+    """
+    Copy static assets to content-hashed names and write the asset manifest.
+
+    Since a fingerprinted name changes with the content, an existing output of
+    the same name and size is already up to date and is not copied again.
+    Outputs of the previous run that are no longer produced are removed.
+
+    :param source_path:     The static directory path
+    :param dest_path:       The destination directory path
+    :param previous_files:  Relative paths of the files written by the previous run
+    :param hash_cache:      Optional dictionary of cached hashes, see hash_assets
+    :param jobs:            Number of threads used to hash files
+    :param report:          Optional BuildReport receiving the stage timings and byte counts
+    :return:                A (files, asset_map, stats) tuple with the sorted relative paths
+                            now written, an AssetMap and a dict with the copied, unchanged
+                            and removed counts
+    """
+    stats = {"copied": 0, "unchanged": 0, "removed": 0}
+    timer = StageTimer(static_stages)
+    timer.begin("scan")
+    relative_paths = list_assets(source_path)
+
+    timer.begin("hash")
+    hashes, bytes_read = hash_assets(source_path, relative_paths, {} if hash_cache is None else hash_cache, jobs)
+    mapping = {relative_path: fingerprinted_path(relative_path, hashes[relative_path]) for relative_path in relative_paths}
+
+    timer.begin("copy")
+    bytes_written = 0
+    for relative_path, fingerprinted in mapping.items():
+        source_item = os.path.join(source_path, relative_path)
+        dest_item = os.path.join(dest_path, fingerprinted)
+        size = os.path.getsize(source_item)
+        if os.path.isfile(dest_item) and os.path.getsize(dest_item) == size:
+            stats["unchanged"] += 1
+            continue
+        copy_atomic(source_item, dest_item)
+        bytes_read += size
+        bytes_written += size
+        stats["copied"] += 1
+
+    manifest_data = json.dumps(
+        {path.replace(os.sep, "/"): fingerprinted.replace(os.sep, "/") for path, fingerprinted in mapping.items()},
+        indent=1,
+        sort_keys=True,
+    ).encode()
+    if write_if_changed(os.path.join(dest_path, asset_manifest_name), manifest_data):
+        bytes_written += len(manifest_data)
+
+    files = sorted(list(mapping.values()) + [asset_manifest_name])
+
+    timer.begin("remove")
+    for relative_path in sorted(set(previous_files) - set(files)):
+        remove_output(dest_path, relative_path)
+        stats["removed"] += 1
+
+    stage_times = timer.end()
+    if report is not None:
+        report.add_static(stage_times, bytes_read, bytes_written)
+
+    return files, AssetMap(mapping), stats
@@ -0,0 +1,241 @@
+import argparse
+import json
+import platform
+import sys
+import time
+
+from block_markdown import (
+    block_to_block_type,
+    markdown_to_html_node
+)
+from inline_markdown import text_to_textnodes
+
+
+
+
+# Default allowed slowdown against the baseline before a benchmark counts as a regression
+default_threshold = 0.2
+
+
+
+
+def link_heavy_paragraph(links):
+    """
+    Generate a paragraph with the given number of inline links and images.
+    """
+    return " ".join(
+        f"see [link {i}](/pages/{i}) or ![image {i}](/images/{i}.png)" if i % 4 == 0
+        else f"see [link {i}](/pages/{i})"
+        for i in range(links)
+    )
+
+
+def long_list(items):
+    """
+    Generate an unordered list with the given number of formatted items.
+    """
+    return "\n".join(f"* Item {i} with **bold** and `code`" for i in range(items))
+
+
+def large_code_block(lines):
+    """
+    Generate a fenced code block with the given number of lines.
+    """
+    body = "\n".join(f"    value_{i} = compute({i}) * 2  # comment" for i in range(lines))
+    return f"```\n{body}\n```"
+
+
+def deep_quote(lines):
+    """
+    Generate a quote block with the given number of lines.
+    """
+    return "\n".join(f"> Quoted line {i} with *emphasis* and a [link](/q/{i})" for i in range(lines))
+
+
+def special_characters_paragraph(sentences):
+    """
+    Generate a paragraph where every sentence needs HTML escaping, in text and in link URLs.
+    """
+    return " ".join(
+        f"Q&A {i}: is {i} < {i + 1} && {i} > 0? See [R&D notes](/search?q={i}&page=2)."
+        for i in range(sentences)
+    )
+
+
+def mixed_document(sections):
+    """
+    Generate a document repeating every block shape the parser supports.
+    """
+    parts = ["# Benchmark document"]
+    for i in range(sections):
+        parts.extend([
+            f"## Section {i}",
+            link_heavy_paragraph(20),
+            long_list(10),
+            large_code_block(10),
+            deep_quote(5),
+            "\n".join(f"{n}. Step {n}" for n in range(1, 6)),
+        ])
+    return "\n\n".join(parts)
+
+
+
+
+def build_cases(scale):
+    """
+    Build the benchmark cases for a given input scale.
+
+    :param scale:           Multiplier applied to every input size
+    :return:                A list of (name, function, input size in bytes) tuples
+    """
+    paragraph = link_heavy_paragraph(200 * scale)
+    list_block = long_list(500 * scale)
+    code_block = large_code_block(2000 * scale)
+    quote_block = deep_quote(500 * scale)
+    document = mixed_document(20 * scale)
+    document_node = markdown_to_html_node(document)
+    document_html_size = len(document_node.to_html().encode())
+    links_node = markdown_to_html_node(paragraph)
+    links_html_size = len(links_node.to_html().encode())
+    special_node = markdown_to_html_node(special_characters_paragraph(200 * scale))
+    special_html_size = len(special_node.to_html().encode())
+
+    return [
+        ("text_to_textnodes/link_heavy", lambda: text_to_textnodes(paragraph), len(paragraph.encode())),
+        ("block_to_block_type/long_list", lambda: block_to_block_type(list_block), len(list_block.encode())),
+        ("block_to_block_type/deep_quote", lambda: block_to_block_type(quote_block), len(quote_block.encode())),
+        ("markdown_to_html_node/large_code", lambda: markdown_to_html_node(code_block), len(code_block.encode())),
+        ("markdown_to_html_node/long_list", lambda: markdown_to_html_node(list_block), len(list_block.encode())),
+        ("markdown_to_html_node/deep_quote", lambda: markdown_to_html_node(quote_block), len(quote_block.encode())),
+        ("markdown_to_html_node/mixed", lambda: markdown_to_html_node(document), len(document.encode())),
+        ("to_html/mixed", document_node.to_html, document_html_size),
+        ("to_html/link_heavy", links_node.to_html, links_html_size),
+        ("to_html/special_characters", special_node.to_html, special_html_size),
+    ]
+
+
+
+
+def measure(function, min_time, repeat):
+    """
+    Time a function, reporting the best of several rounds.
+
+    Each round runs the function enough times to take at least min_time.
+
+    :param function:        Zero-argument callable to benchmark
+    :param min_time:        Minimum duration of a round in seconds
+    :param repeat:          Number of rounds
+    :return:                Best seconds per call
+    """
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        calls *= 2
+
+    best = elapsed / calls
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best
+
+
+
+
+def run_benchmarks(scale=1, min_time=0.2, repeat=3, only=None):
+    """
+    Run every benchmark case and collect throughput figures.
+
+    :param scale:           Multiplier applied to every input size
+    :param min_time:        Minimum duration of a timing round in seconds
+    :param repeat:          Number of timing rounds per case
+    :param only:            Optional substring selecting which cases to run
+    :return:                A dict mapping case names to their results
+    """
+    results = {}
+    for name, function, size in build_cases(scale):
+        if only and only not in name:
+            continue
+        seconds = measure(function, min_time, repeat)
+        results[name] = {
+            "seconds_per_op": seconds,
+            "ops_per_sec": 1 / seconds,
+            "bytes_per_sec": size / seconds,
+            "input_bytes": size,
+        }
+        print(f"{name:<36} {1 / seconds:>12.1f} ops/s {size / seconds / 1e6:>10.2f} MB/s")
+    return results
+
+
+
+
+def compare_to_baseline(results, baseline, threshold):
+    """
+    Find benchmarks whose throughput dropped by more than the threshold.
+
+    :param results:         Current results from run_benchmarks
+    :param baseline:        Stored results in the same format
+    :param threshold:       Allowed relative slowdown, e.g. 0.2 for 20%
+    :return:                A list of (name, baseline ops/s, current ops/s) regressions
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if result["ops_per_sec"] < previous["ops_per_sec"] * (1 - threshold):
+            regressions.append((name, previous["ops_per_sec"], result["ops_per_sec"]))
+    return regressions
+
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the markdown parser and HTML renderer.")
+    parser.add_argument("--scale", type=int, default=1, help="multiply every input size (default: 1)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum seconds per timing round")
+    parser.add_argument("--repeat", type=int, default=3, help="timing rounds per benchmark, the best is kept")
+    parser.add_argument("--only", help="run only benchmarks whose name contains this text")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against results previously written with --output")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=default_threshold,
+        help=f"allowed slowdown against the baseline as a fraction (default: {default_threshold})",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.scale, args.min_time, args.repeat, args.only)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "scale": args.scale,
+                "results": results,
+            }, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        if baseline.get("scale") != args.scale:
+            print(f"Warning: baseline was recorded with --scale {baseline.get('scale')}", file=sys.stderr)
+        regressions = compare_to_baseline(results, baseline["results"], args.threshold)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: {before:.1f} -> {after:.1f} ops/s ({after / before - 1:+.1%})", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+
+
+if __name__ == "__main__":
+    main()
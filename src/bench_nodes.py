@@ -0,0 +1,138 @@
+import time
+import tracemalloc
+
+from htmlnode import LeafNode
+from inline_markdown import text_to_textnodes
+from textnode import (
+    TextNode,
+    text_type_text,
+    text_type_bold,
+    text_type_italic,
+    text_type_code,
+    text_type_link,
+    text_type_image,
+    text_node_to_html_node
+)
+
+
+
+
+# Unslotted node classes and the if/elif converter, as they were before __slots__
+class DictTextNode:
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+class DictHTMLNode:
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+class DictLeafNode(DictHTMLNode):
+    def __init__(self, tag=None, value=None, props=None):
+        if value is None:
+            raise ValueError("Invalid HTML: no value")
+        super().__init__(tag, value, None, props)
+        self.props = props
+
+
+def dict_text_node_to_html_node(text_node):
+    if text_node.text_type == text_type_text:
+        return DictLeafNode(None, text_node.text)
+    elif text_node.text_type == text_type_bold:
+        return DictLeafNode("b", text_node.text)
+    elif text_node.text_type == text_type_italic:
+        return DictLeafNode("i", text_node.text)
+    elif text_node.text_type == text_type_code:
+        return DictLeafNode("code", text_node.text)
+    elif text_node.text_type == text_type_link:
+        return DictLeafNode("a", text_node.text, {"href": text_node.url})
+    elif text_node.text_type == text_type_image:
+        return DictLeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+    raise ValueError("Unsupported text type")
+
+
+
+
+def synthetic_paragraphs(count):
+    """
+    Generate paragraphs mixing every inline text type.
+
+    :param count:           Number of paragraphs to generate
+    :return:                A list of paragraph strings
+    """
+    return [
+        f"Para {i} has **bold {i}**, *italic*, `code {i}`, a [link](/page/{i}) "
+        f"and an ![image](/images/{i}.png) before some closing plain text."
+        for i in range(count)
+    ]
+
+
+
+
+def measure(build):
+    """
+    Run a build function and report its peak traced memory and duration.
+
+    :param build:           Zero-argument callable that builds and returns nodes
+    :return:                A (peak bytes, seconds, result) tuple
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, elapsed, result
+
+
+
+
+def compare(paragraph_count=20000):
+    """
+    Compare memory and conversion throughput of slotted and unslotted nodes.
+
+    :param paragraph_count: Size of the synthetic document in paragraphs
+    """
+    tokens = [
+        (node.text, node.text_type, node.url)
+        for paragraph in synthetic_paragraphs(paragraph_count)
+        for node in text_to_textnodes(paragraph)
+    ]
+
+    variants = (
+        ("unslotted + if/elif", DictTextNode, dict_text_node_to_html_node),
+        ("slotted + dispatch", TextNode, text_node_to_html_node),
+    )
+
+    print(f"Synthetic document: {paragraph_count} paragraphs, {len(tokens)} text nodes")
+    results = {}
+    for name, node_class, convert in variants:
+        def build():
+            text_nodes = [node_class(*token) for token in tokens]
+            return text_nodes, [convert(node) for node in text_nodes]
+
+        peak, _, (text_nodes, _) = measure(build)
+
+        start = time.perf_counter()
+        for _ in range(5):
+            for node in text_nodes:
+                convert(node)
+        throughput = 5 * len(text_nodes) / (time.perf_counter() - start)
+
+        results[name] = (peak, throughput)
+        print(f"{name:>20}: peak {peak / 1e6:8.2f} MB, {throughput / 1e6:6.2f} M conversions/sec")
+
+    (old_peak, old_rate), (new_peak, new_rate) = results.values()
+    print(f"Memory saved: {100 * (1 - new_peak / old_peak):.1f}%, conversion speedup: {new_rate / old_rate:.2f}x")
+
+
+
+
+if __name__ == "__main__":
+    compare()
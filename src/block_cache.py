@@ -0,0 +1,80 @@
+import threading
+from collections import OrderedDict
+
+
+
+
+class BlockCache:
+    def __init__(self, max_entries=4096):
+        """
+        Initialize a BlockCache holding the rendered HTML, search terms and links of recently seen blocks.
+
+        Blocks repeated across pages, such as disclaimers or shared lists, are
+        parsed and rendered once per process and reused from then on. The least
+        recently used entry is dropped once max_entries is reached. Lookups and
+        stores are locked, as the dev server renders pages on several threads.
+
+        :param max_entries:     Number of blocks kept
+        """
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Look up a rendered block, marking it as recently used.
+
+        :param key:             A (block type, block text, asset map digest) tuple
+        :return:                An (HTML fragment, terms, links) tuple, or None on a miss
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        """
+        Store a rendered block, evicting the least recently used one if full.
+
+        :param key:             A (block type, block text, asset map digest) tuple
+        :param entry:           An (HTML fragment, terms, links) tuple
+        """
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+
+
+# Per-process cache shared by every page generated in this process
+_process_cache = None
+
+
+def process_block_cache(max_entries):
+    """
+    Return this process's BlockCache, creating or resizing it as needed.
+
+    Worker processes each build their own cache, so nothing is pickled per page.
+
+    :param max_entries:     Number of blocks kept, 0 disables the cache
+    :return:                A BlockCache object, or None if disabled
+    """
+    global _process_cache
+    if max_entries <= 0:
+        return None
+    if _process_cache is None:
+        _process_cache = BlockCache(max_entries)
+    elif _process_cache.max_entries != max_entries:
+        with _process_cache.lock:
+            _process_cache.max_entries = max_entries
+            while len(_process_cache.entries) > max_entries:
+                _process_cache.entries.popitem(last=False)
+    return _process_cache
@@ -1,14 +1,18 @@
-import re
-
 from htmlnode import (
     ParentNode,
-    LeafNode
+    LeafNode,
+    RawNode
 )
 
 from textnode import text_node_to_html_node
 from inline_markdown import text_to_textnodes
+from page_facts import node_facts
+
+
 
 
+# Bump whenever a parser change alters the HTML produced for the same markdown
+PARSER_VERSION = "3"
 
 
 # Define constants for block types
@@ -22,6 +26,47 @@ block_type_ordered_list = "ordered_list"
 
 
 
+class BlockScanner:
+    def __init__(self, lines):
+        """
+        Initialize a BlockScanner over the lines of a markdown document.
+
+        :param lines:       Iterable of lines without their trailing newline
+        """
+        self.lines = lines
+        self.title = None
+
+    def __iter__(self):
+        """
+        Yield the cleaned lines of each block in one forward pass.
+
+        A block ends at an empty line. Whitespace-only lines are dropped, leading
+        whitespace is removed from every line and trailing whitespace from the
+        last one. The first line starting with "# " is recorded as the title.
+        """
+        block = []
+        for line in self.lines:
+            if not line:
+                if block:
+                    block[-1] = block[-1].rstrip()
+                    yield block
+                    block = []
+                continue
+
+            if self.title is None and line.startswith("# "):
+                self.title = line.lstrip("# ").strip()
+
+            stripped = line.lstrip()
+            if stripped:
+                block.append(stripped)
+
+        if block:
+            block[-1] = block[-1].rstrip()
+            yield block
+
+
+
+
 def markdown_to_blocks(markdown):
     """
     Split markdown text into blocks separated by 2 or more newlines.
@@ -29,13 +74,7 @@ def markdown_to_blocks(markdown):
     :param markdown:        The raw markdown text
     :return:                A list of block strings
     """
-    block_strings = []
-    temp = re.split(r"\n{2,}", markdown)
-    for line in temp:
-        cleaned_text = re.sub(r"\n\s+", "\n", line).strip()
-        if cleaned_text:
-            block_strings.append(cleaned_text)
-    return block_strings
+    return ["\n".join(lines) for lines in BlockScanner(markdown.split("\n"))]
 
 
 
@@ -47,95 +86,277 @@ def block_to_block_type(block):
     :param block:           A single markdown block
     :return:                The type of the block (e.g., heading, quote, list)
     """
-    if re.match(r"^#{1,6}\s", block):
-        return block_type_heading
-    
-    if re.match(r"^`{3}[\s\S]*`{3}$", block):
-        return block_type_code
-    
     lines = block.split("\n")
+    # A code fence may be followed by one final newline, as "$" allows in a regex
+    if len(lines) > 1 and not lines[-1] and block_lines_to_block_type(lines[:-1]) == block_type_code:
+        return block_type_code
+    return block_lines_to_block_type(lines)
+
+
+
+
+def block_lines_to_block_type(lines):
+    """
+    Determine the type of a markdown block from its lines, without regular expressions.
+
+    :param lines:           The lines of a single markdown block
+    :return:                The type of the block (e.g., heading, quote, list)
+    """
+    first = lines[0]
+    level = len(first) - len(first.lstrip("#"))
+    if 1 <= level <= 6:
+        if level < len(first) and first[level].isspace():
+            return block_type_heading
+        if level == len(first) and len(lines) > 1:
+            return block_type_heading
+
+    if first.startswith("```") and lines[-1].endswith("```") and (len(lines) > 1 or len(first) >= 6):
+        return block_type_code
+
+    if all(line.lstrip().startswith(">") for line in lines):
+        return block_type_quote
 
-    if all(re.match(r"^\s*>", line) for line in lines):
-        return block_type_quote 
-    
     if all(line.startswith(("* ", "- ")) for line in lines):
         return block_type_unordered_list
-    
-    if all(re.match(r"^\d+\.\s", line) for line in lines):
-        order_num = [int(line.split(".")[0]) for line in lines]
-        if order_num == list(range(1, len(lines) + 1)):
-            return block_type_ordered_list
-        else:
+
+    for number, line in enumerate(lines, 1):
+        digits = len(line) - len(line.lstrip("0123456789"))
+        if not (digits and line[digits:digits + 1] == "." and line[digits + 1:digits + 2].isspace()):
             return block_type_paragraph
-        
+        if int(line[:digits]) != number:
+            return block_type_paragraph
+    return block_type_ordered_list
+
+
+
+
+def text_to_children(text, rewrite_url=None):
+    """
+    Convert inline markdown text into a list of HTML nodes.
+
+    :param text:            The raw inline text
+    :param rewrite_url:     Optional callable mapping link and image URLs, see text_node_to_html_node
+    :return:                A list of HTMLNode objects
+    """
+    return [text_node_to_html_node(node, rewrite_url) for node in text_to_textnodes(text)]
+
+
+
+
+def block_lines_to_html_node(block_type, lines, to_children=text_to_children):
+    """
+    Convert the lines of a classified markdown block into an HTML node.
+
+    :param block_type:      The type of the block
+    :param lines:           The lines of the block
+    :param to_children:     Function converting inline text into a list of HTML nodes
+    :return:                An HTMLNode object for the block
+    """
+    if block_type == block_type_paragraph:
+        return ParentNode("p", children=to_children("\n".join(lines)))
+
+    if block_type == block_type_heading:
+        block = "\n".join(lines)
+        level = block.count("#", 0, block.index(" "))
+        if level > 6:
+            raise ValueError("Invalid HTML: Heading can only between 1 and 6.")
+        return LeafNode(f"h{level}", block.strip("# "))
+
+    if block_type == block_type_code:
+        code_content = "\n".join(lines).strip("`\n")
+        return ParentNode("pre", children=[LeafNode("code", code_content)])
+
+    if block_type == block_type_quote:
+        quote_children = []
+        for line in lines:
+            quote_children.extend(to_children(line.lstrip("> ").strip()))
+        return ParentNode("blockquote", children=quote_children)
+
+    if block_type == block_type_unordered_list:
+        list_items = []
+        for item in lines:
+            item_text = item.lstrip("* ") if item[0] == "*" else item.lstrip("- ")
+            list_items.append(ParentNode("li", children=to_children(item_text.strip())))
+        return ParentNode("ul", children=list_items)
+
+    if block_type == block_type_ordered_list:
+        list_items = []
+        for item in lines:
+            list_items.append(ParentNode("li", children=to_children(item.split(". ", 1)[1].strip())))
+        return ParentNode("ol", children=list_items)
+
+    raise ValueError(f"Unsupported block type: {block_type}")
+
+
+
+
+def iter_block_nodes(scanner, timer=None, block_cache=None, asset_map=None, facts=None):
+    """
+    Lazily convert the blocks of a BlockScanner into HTML nodes, one block at a time.
+
+    With a block cache, each block is rendered once and kept as an HTML fragment
+    together with its search terms and links, and blocks seen before are reused
+    as that fragment without being parsed.
+
+    :param scanner:         A BlockScanner over the lines of the document
+    :param timer:           Optional StageTimer, split between "block_parse" and "inline_parse"
+    :param block_cache:     Optional BlockCache of rendered blocks
+    :param asset_map:       Optional AssetMap rewriting link and image URLs to fingerprinted assets
+    :param facts:           Optional PageFacts receiving the terms and links of every block
+    :return:                A generator of HTMLNode objects, one per block
+    """
+    if asset_map is None:
+        inline_children = text_to_children
+        asset_digest = None
     else:
-        return block_type_paragraph
+        def inline_children(text):
+            return text_to_children(text, asset_map.rewrite_url)
+        asset_digest = asset_map.digest
+
+    to_children = inline_children
+    if timer is not None:
+        def timed_children(text):
+            timer.begin("inline_parse")
+            children = inline_children(text)
+            timer.begin("block_parse")
+            return children
+
+        to_children = timed_children
+        timer.begin("block_parse")
+
+    for lines in scanner:
+        block_type = block_lines_to_block_type(lines)
+        if block_cache is None:
+            node = block_lines_to_html_node(block_type, lines, to_children)
+            if facts is not None:
+                facts.add(*node_facts(node))
+        else:
+            key = (block_type, "\n".join(lines), asset_digest)
+            entry = block_cache.get(key)
+            if entry is None:
+                block_node = block_lines_to_html_node(block_type, lines, to_children)
+                entry = (block_node.to_html(), *node_facts(block_node))
+                block_cache.put(key, entry)
+            html, terms, links = entry
+            if facts is not None:
+                facts.add(terms, links)
+            node = RawNode(html)
 
+        yield node
+        if timer is not None:
+            timer.begin("block_parse")
 
 
 
-def markdown_to_html_node(markdown):
+
+def parse_markdown(markdown, timer=None, block_cache=None, asset_map=None, facts=None):
     """
-    Convert markdown text into an HTML node structure.
+    Parse markdown into an HTML node structure and its title in a single pass over its lines.
 
     :param markdown:        The raw markdown text
-    :return:                A ParentNode object representing the HTML structure
+    :param timer:           Optional StageTimer, split between "block_parse" and "inline_parse"
+    :param block_cache:     Optional BlockCache of rendered blocks, see iter_block_nodes
+    :param asset_map:       Optional AssetMap rewriting link and image URLs to fingerprinted assets
+    :param facts:           Optional PageFacts receiving the search terms and links of the page
+    :return:                A (ParentNode, title) tuple, the title is None without an H1 line
     """
-    blocks = markdown_to_blocks(markdown)
-    child_nodes = []
-
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        child_node = None
-
-        if block_type == block_type_heading:
-            level = block.count("#", 0, block.index(" "))
-            if level > 6:
-                raise ValueError("Invalid HTML: Heading can only between 1 and 6.")
-            heading_text = block.strip("# ")
-            child_node = LeafNode(f"h{level}", heading_text)
-
-        elif block_type == block_type_code:
-            code_content = block.strip("`\n")
-            child_node = ParentNode("pre", children=[LeafNode("code", code_content)])
-
-        elif block_type == block_type_quote:
-            quote_lines = [line.lstrip("> ").strip() for line in block.split("\n")]
-            quote_children = []
-            for line in quote_lines:
-                quote_children.extend(text_to_textnodes(line))
-            child_node = ParentNode("blockquote", children=[text_node_to_html_node(node) for node in quote_children])
-
-        elif block_type == block_type_unordered_list:
-            list_items = []
-            for item in block.split("\n"):
-                if item.startswith("*"):
-                    item_text_nodes = text_to_textnodes(item.lstrip("* ").strip())
-                elif item.startswith("-"):
-                    item_text_nodes = text_to_textnodes(item.lstrip("- ").strip())
-                
-                list_items.append(ParentNode("li", children=[text_node_to_html_node(node) for node in item_text_nodes]))
-            child_node = ParentNode("ul", children=list_items)
-
-        elif block_type == block_type_ordered_list:
-            list_items = []
-            for item in block.split("\n"):
-                item_text_nodes = text_to_textnodes(item.split(". ", 1)[1].strip())
-                list_items.append(ParentNode("li", children=[text_node_to_html_node(node) for node in item_text_nodes]))
-            child_node = ParentNode("ol", children=list_items)
-
-        elif block_type == block_type_paragraph:
-            paragraph_text = block.strip()
-            paragraph_children = text_to_textnodes(paragraph_text)
-            child_node = ParentNode("p", children=[text_node_to_html_node(node) for node in paragraph_children])
-
-        if child_node:
-            child_nodes.append(child_node)
+    scanner = BlockScanner(markdown.split("\n"))
+    child_nodes = list(iter_block_nodes(scanner, timer, block_cache, asset_map, facts))
 
     if not child_nodes:
         raise ValueError("Invalid HTML: No valid blocks found to create an HTML node structure.")
-    
-    return ParentNode("div", children=child_nodes)
+
+    return ParentNode("div", children=child_nodes), scanner.title
+
+
+
+
+def scan_markdown(lines):
+    """
+    Find the title of a document and whether it has any block, without parsing it.
+
+    Used before streaming a document, since the title may be needed before the
+    block holding it has been reached.
+
+    :param lines:           Iterable of lines
+    :return:                A (title, has_blocks) tuple, the title is None without an H1 line
+    """
+    title = None
+    has_blocks = False
+    for line in lines:
+        if title is None and line.startswith("# "):
+            title = line.lstrip("# ").strip()
+        if not has_blocks and not line.isspace() and line:
+            has_blocks = True
+        if title is not None and has_blocks:
+            break
+    return title, has_blocks
+
+
+
+
+def file_lines(f):
+    """
+    Yield the lines of a text file without their trailing newline, reading incrementally.
+
+    :param f:               A file object opened in text mode
+    :return:                A generator of lines, as str.split("\n") would produce them
+                            apart from a final empty line, which does not change the blocks
+    """
+    for line in f:
+        yield line[:-1] if line.endswith("\n") else line
+
+
+
+
+class MarkdownStream:
+    def __init__(self, source_path, timer=None, block_cache=None, asset_map=None, facts=None):
+        """
+        Initialize a MarkdownStream rendering a markdown file block by block.
+
+        Only the block being converted is held in memory, so the peak memory use
+        depends on the largest block rather than the size of the document. It can
+        be passed as a template value, which streams it through render_to.
+
+        :param source_path:     Path to the markdown file
+        :param timer:           Optional StageTimer, see iter_block_nodes
+        :param block_cache:     Optional BlockCache of rendered blocks, which keeps blocks beyond
+                                the current one and so adds to the peak memory use
+        :param asset_map:       Optional AssetMap rewriting link and image URLs to fingerprinted assets
+        :param facts:           Optional PageFacts receiving the search terms and links of the page
+        """
+        self.source_path = source_path
+        self.timer = timer
+        self.block_cache = block_cache
+        self.asset_map = asset_map
+        self.facts = facts
+
+    def render_to(self, write):
+        """
+        Stream the HTML of the document through a write callable.
+
+        :param write:           Callable accepting each string chunk (e.g. a file's write method)
+        """
+        write("<div>")
+        with open(self.source_path, "r") as f:
+            blocks = BlockScanner(file_lines(f))
+            for node in iter_block_nodes(blocks, self.timer, self.block_cache, self.asset_map, self.facts):
+                if self.timer is not None:
+                    self.timer.begin("to_html")
+                node.render_to(write)
+        write("</div>")
+
+
+
+
+def markdown_to_html_node(markdown):
+    """
+    Convert markdown text into an HTML node structure.
+
+    :param markdown:        The raw markdown text
+    :return:                A ParentNode object representing the HTML structure
+    """
+    return parse_markdown(markdown)[0]
 
 
 
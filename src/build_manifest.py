@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+
+
+
+
+# Bump whenever a change to the generator alters the HTML it produces,
+# so that every page built by an older version is treated as stale.
+GENERATOR_VERSION = "3"
+
+
+
+
+def hash_file(path):
+    """
+    Compute the SHA-256 hex digest of a file, reading it in chunks.
+
+    :param path:            Path to the file to hash
+    :return:                The hex digest string
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+
+
+class BuildManifest:
+    def __init__(self, path):
+        """
+        Initialize an empty BuildManifest object.
+
+        :param path:            Path of the JSON file the manifest is stored in
+        """
+        self.path = path
+        self.template_hash = None
+        self.pages = {}
+        self.static_files = []
+        self.asset_hashes = {}
+        self.compressed_files = {}
+        self.search_index = None
+        self.link_check = None
+        self.directories = {}
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a manifest from disk.
+
+        A missing or unreadable manifest, or one written by another generator
+        version, yields an empty manifest so that everything gets rebuilt.
+
+        :param path:            Path of the JSON manifest file
+        :return:                A BuildManifest object
+        """
+        manifest = cls(path)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return manifest
+
+        if not isinstance(data, dict) or data.get("generator_version") != GENERATOR_VERSION:
+            return manifest
+
+        manifest.template_hash = data.get("template_hash")
+        manifest.pages = data.get("pages", {})
+        manifest.static_files = data.get("static_files", [])
+        manifest.asset_hashes = data.get("asset_hashes", {})
+        manifest.compressed_files = data.get("compressed_files", {})
+        manifest.search_index = data.get("search_index")
+        manifest.link_check = data.get("link_check")
+        manifest.directories = data.get("directories", {})
+        return manifest
+
+    def save(self):
+        """
+        Write the manifest to disk, replacing the previous file atomically.
+        """
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        data = {
+            "generator_version": GENERATOR_VERSION,
+            "template_hash": self.template_hash,
+            "pages": self.pages,
+            "static_files": self.static_files,
+            "asset_hashes": self.asset_hashes,
+            "compressed_files": self.compressed_files,
+            "search_index": self.search_index,
+            "link_check": self.link_check,
+            "directories": self.directories,
+        }
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+    def is_page_fresh(self, source, source_hash, template_hash, output_path):
+        """
+        Check whether a page's recorded output is still up to date.
+
+        :param source:          Source path relative to the content directory
+        :param source_hash:     Current hash of the markdown source
+        :param template_hash:   Current hash of the template
+        :param output_path:     Absolute path of the page's output file
+        :return:                True if the page does not need to be rebuilt
+        """
+        entry = self.pages.get(source)
+        return (
+            entry is not None
+            and entry["hash"] == source_hash
+            and self.template_hash == template_hash
+            and os.path.exists(output_path)
+        )
+
+    def record_page(self, source, source_hash, output, facts=None):
+        """
+        Record a successfully generated page.
+
+        :param source:          Source path relative to the content directory
+        :param source_hash:     Hash of the markdown the page was built from
+        :param output:          Output path relative to the destination directory
+        :param facts:           Optional dict with the page's title, search terms and links,
+                                kept so that skipped pages still contribute to the search index
+                                and the link check
+        """
+        entry = {"hash": source_hash, "output": output}
+        if facts is not None:
+            entry.update(facts)
+        self.pages[source] = entry
@@ -0,0 +1,142 @@
+import json
+import os
+import time
+
+
+
+
+# Stages timed while generating a page, in pipeline order
+page_stages = ("read", "render_cache", "block_parse", "inline_parse", "to_html", "template", "write")
+
+# Stages timed while syncing static files
+static_stages = ("scan", "hash", "copy", "remove")
+
+
+
+
+class StageTimer:
+    def __init__(self, stages):
+        """
+        Initialize a StageTimer accumulating seconds per named stage.
+
+        :param stages:      Names of the stages, in order
+        """
+        self.times = dict.fromkeys(stages, 0.0)
+        self.stage = None
+        self.start = None
+
+    def begin(self, stage):
+        """
+        End the running stage, if any, and start timing the next one.
+
+        :param stage:       Name of the stage starting now
+        """
+        now = time.perf_counter()
+        if self.stage is not None:
+            self.times[self.stage] += now - self.start
+        self.stage = stage
+        self.start = now
+
+    def end(self):
+        """
+        End the running stage.
+
+        :return:            Dictionary mapping each stage to its accumulated seconds
+        """
+        self.begin(None)
+        return self.times
+
+
+
+
+class BuildReport:
+    def __init__(self):
+        """
+        Initialize an empty BuildReport object.
+        """
+        self.start = time.perf_counter()
+        self.pages = {}
+        self.static = {"stages": dict.fromkeys(static_stages, 0.0), "bytes_read": 0, "bytes_written": 0}
+        self.compress = {"seconds": 0.0, "bytes_read": 0, "bytes_written": 0}
+
+    def add_page(self, source, page_stats):
+        """
+        Record the timings of one generated page.
+
+        :param source:      Source path relative to the content directory
+        :param page_stats:  Dict with the page's stage times, bytes read and bytes written
+        """
+        self.pages[source] = page_stats
+
+    def add_static(self, stage_times, bytes_read, bytes_written):
+        """
+        Add the timings of a static file sync.
+
+        :param stage_times: Dictionary mapping each static stage to seconds
+        :param bytes_read:  Bytes read while hashing and copying
+        :param bytes_written: Bytes written while copying
+        """
+        for stage, seconds in stage_times.items():
+            self.static["stages"][stage] += seconds
+        self.static["bytes_read"] += bytes_read
+        self.static["bytes_written"] += bytes_written
+
+    def add_compress(self, seconds, bytes_read, bytes_written):
+        """
+        Add the timings of a gzip compression pass.
+
+        :param seconds:     Seconds spent compressing
+        :param bytes_read:  Bytes read while hashing and compressing
+        :param bytes_written: Bytes of gzip files written
+        """
+        self.compress["seconds"] += seconds
+        self.compress["bytes_read"] += bytes_read
+        self.compress["bytes_written"] += bytes_written
+
+    def to_dict(self, slowest=10):
+        """
+        Summarize the build as a JSON-serializable dictionary.
+
+        :param slowest:     Number of slowest pages to list
+        :return:            The report dictionary
+        """
+        stage_totals = dict.fromkeys(page_stages, 0.0)
+        bytes_read = 0
+        bytes_written = 0
+        for page_stats in self.pages.values():
+            for stage, seconds in page_stats["stages"].items():
+                stage_totals[stage] += seconds
+            bytes_read += page_stats["bytes_read"]
+            bytes_written += page_stats["bytes_written"]
+
+        page_seconds = {source: sum(page_stats["stages"].values()) for source, page_stats in self.pages.items()}
+        slowest_pages = sorted(page_seconds, key=lambda source: (-page_seconds[source], source))[:slowest]
+
+        return {
+            "wall_seconds": time.perf_counter() - self.start,
+            "pages": {
+                "count": len(self.pages),
+                "seconds": sum(page_seconds.values()),
+                "stages": stage_totals,
+                "bytes_read": bytes_read,
+                "bytes_written": bytes_written,
+            },
+            "static": self.static,
+            "compress": self.compress,
+            "slowest_pages": [
+                {"source": source, "seconds": page_seconds[source], **self.pages[source]}
+                for source in slowest_pages
+            ],
+            "per_page": self.pages,
+        }
+
+    def save(self, path, slowest=10):
+        """
+        Write the report to a JSON file.
+
+        :param path:        Path of the JSON report file
+        :param slowest:     Number of slowest pages to list
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(slowest), f, indent=2, sort_keys=True)
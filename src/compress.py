@@ -0,0 +1,118 @@
+import gzip
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from build_manifest import hash_file
+from output_files import (
+    AtomicOutput,
+    remove_output
+)
+
+
+
+
+# Extensions of the text outputs worth precompressing, images and fonts are already compressed
+compressible_extensions = (".html", ".css", ".js", ".mjs", ".json", ".svg", ".txt", ".xml", ".map")
+
+
+
+
+def _compress_file(path, level, known_hash):
+    """
+    Gzip one file next to itself unless its content hash matches known_hash.
+
+    Runs on a worker thread, hashlib and zlib release the GIL on large buffers.
+    The file is streamed in chunks, so large pages are never held in memory.
+
+    :return:        A (hash, compressed size or None if skipped, bytes read) tuple
+    """
+    digest = hash_file(path)
+    size = os.path.getsize(path)
+    if digest == known_hash and os.path.exists(f"{path}.gz"):
+        return digest, None, size
+
+    output = AtomicOutput(f"{path}.gz", binary=True)
+    with output as f, open(path, "rb") as source:
+        # No file name and a fixed mtime keep the output identical for identical input
+        with gzip.GzipFile(filename="", mode="wb", compresslevel=level, fileobj=f, mtime=0) as compressed:
+            shutil.copyfileobj(source, compressed, 1024 * 1024)
+    return digest, output.bytes_written, 2 * size
+
+
+
+
+def compress_outputs(dest_path, cache, level=9, jobs=4):
+    """
+    Write a precompressed .gz sibling next to every text output.
+
+    A file is skipped without being read when its size and mtime match the
+    cache, and without being compressed when its content hash does. Files are
+    compressed in parallel. Siblings of outputs that no longer exist are removed.
+
+    :param dest_path:       The destination directory path
+    :param cache:           Dictionary mapping relative paths to {"size", "mtime_ns", "hash", "level"}
+                            entries of the previous run, updated in place
+    :param level:           gzip compression level from 1 to 9
+    :param jobs:            Number of threads used to compress files
+    :return:                A dict with the compressed, unchanged and removed counts and the
+                            bytes read and written
+    """
+    stats = {"compressed": 0, "unchanged": 0, "removed": 0, "bytes_read": 0, "bytes_written": 0}
+    seen = set()
+    to_compress = []
+
+    for root, dirs, names in os.walk(dest_path):
+        dirs.sort()
+        for name in sorted(names):
+            if not name.endswith(compressible_extensions):
+                continue
+            path = os.path.join(root, name)
+            relative_path = os.path.relpath(path, dest_path)
+            seen.add(relative_path)
+
+            stat = os.stat(path)
+            entry = cache.get(relative_path)
+            if entry is not None and entry["level"] != level:
+                entry = None
+            if (
+                entry is not None
+                and entry["size"] == stat.st_size
+                and entry["mtime_ns"] == stat.st_mtime_ns
+                and os.path.exists(f"{path}.gz")
+            ):
+                stats["unchanged"] += 1
+                continue
+            to_compress.append((relative_path, path, stat, entry["hash"] if entry is not None else None))
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        results = list(executor.map(lambda item: _compress_file(item[1], level, item[3]), to_compress))
+
+    for (relative_path, _, stat, _), (digest, compressed_size, bytes_read) in zip(to_compress, results):
+        cache[relative_path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest, "level": level}
+        stats["bytes_read"] += bytes_read
+        if compressed_size is None:
+            stats["unchanged"] += 1
+        else:
+            stats["compressed"] += 1
+            stats["bytes_written"] += compressed_size
+
+    for relative_path in sorted(set(cache) - seen):
+        del cache[relative_path]
+        remove_compressed(dest_path, relative_path)
+        stats["removed"] += 1
+
+    return stats
+
+
+
+
+def remove_compressed(dest_path, relative_path):
+    """
+    Delete the .gz sibling of an output, if it exists.
+
+    :param dest_path:       The destination directory path
+    :param relative_path:   Path of the uncompressed output relative to dest_path
+    """
+    if os.path.exists(os.path.join(dest_path, f"{relative_path}.gz")):
+        remove_output(dest_path, f"{relative_path}.gz")
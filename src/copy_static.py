@@ -1,23 +1,152 @@
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 
-def copy_directory(source_path, dest_path):
+from build_manifest import hash_file
+from build_report import (
+    StageTimer,
+    static_stages
+)
+from output_files import (
+    copy_atomic,
+    files_identical,
+    remove_output
+)
+
+
+
+
+def _files_match_by_hash(source_item, dest_item):
     """
-    Recursively copy the contents of one directory to another.
+    Check whether two files have identical content by comparing their hashes.
+    """
+    return hash_file(source_item) == hash_file(dest_item)
+
+
+
+
+def sync_directory(source_path, dest_path, previous_files=(), use_hash=False, jobs=4, report=None):
+    """
+    Incrementally sync the contents of one directory into another.
+
+    A file is copied only when the destination copy is missing or differs in
+    size or content. Files of equal size whose mtimes differ are compared byte
+    by byte, or with use_hash by content hash, hashed in parallel and in
+    chunks, and identical ones only get their mtime updated. Files synced by a
+    previous run that no longer exist in the source are removed.
 
     :param source_path:     The source directory path
     :param dest_path:       The destination directory path
+    :param previous_files:  Relative paths of the files synced by the previous run
+    :param use_hash:        Compare content hashes rather than bytes when size matches but mtime does not
+    :param jobs:            Number of threads used to hash files
+    :param report:          Optional BuildReport receiving the stage timings and byte counts
+    :return:                A (files, stats) tuple with the sorted relative paths now synced
+                            and a dict with the copied, unchanged and removed counts
     """
-    if os.path.exists(dest_path):
-        shutil.rmtree(dest_path)
+    stats = {"copied": 0, "unchanged": 0, "removed": 0}
+    files = []
+    to_copy = []
+    to_compare = []
+    to_hash = []
+    timer = StageTimer(static_stages)
+    timer.begin("scan")
+
+    for root, dirs, names in os.walk(source_path):
+        dirs.sort()
+        for name in sorted(names):
+            source_item = os.path.join(root, name)
+            relative_path = os.path.relpath(source_item, source_path)
+            dest_item = os.path.join(dest_path, relative_path)
+            files.append(relative_path)
 
-    os.makedirs(dest_path) 
+            source_stat = os.stat(source_item)
+            try:
+                dest_stat = os.stat(dest_item)
+            except FileNotFoundError:
+                to_copy.append((source_item, dest_item, source_stat.st_size))
+                continue
 
-    for item in os.listdir(source_path):
-        source_item = os.path.join(source_path, item)
-        dest_item = os.path.join(dest_path, item)
+            if dest_stat.st_size != source_stat.st_size:
+                to_copy.append((source_item, dest_item, source_stat.st_size))
+            elif dest_stat.st_mtime_ns == source_stat.st_mtime_ns:
+                stats["unchanged"] += 1
+            elif use_hash:
+                to_hash.append((source_item, dest_item, source_stat.st_size))
+            else:
+                to_compare.append((source_item, dest_item, source_stat.st_size))
 
-        if os.path.isdir(source_item):
-            copy_directory(source_item, dest_item)
+    bytes_read = 0
+    bytes_written = 0
+
+    timer.begin("hash")
+    if to_hash:
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+            matches = list(executor.map(lambda item: _files_match_by_hash(item[0], item[1]), to_hash))
+        for (source_item, dest_item, size), match in zip(to_hash, matches):
+            bytes_read += 2 * size
+            if match:
+                shutil.copystat(source_item, dest_item)
+                stats["unchanged"] += 1
+            else:
+                to_copy.append((source_item, dest_item, size))
+
+    timer.begin("copy")
+    for source_item, dest_item, size in to_compare:
+        bytes_read += 2 * size
+        if files_identical(source_item, dest_item):
+            shutil.copystat(source_item, dest_item)
+            stats["unchanged"] += 1
         else:
-            shutil.copy(source_item, dest_item)
+            to_copy.append((source_item, dest_item, size))
+
+    for source_item, dest_item, size in to_copy:
+        copy_atomic(source_item, dest_item)
+        bytes_read += size
+        bytes_written += size
+        stats["copied"] += 1
+
+    timer.begin("remove")
+    for relative_path in sorted(set(previous_files) - set(files)):
+        remove_output(dest_path, relative_path)
+        stats["removed"] += 1
+
+    stage_times = timer.end()
+    if report is not None:
+        report.add_static(stage_times, bytes_read, bytes_written)
+
+    return sorted(files), stats
+
+
+
+
+def sync_file(source_path, dest_path, relative_path, files):
+    """
+    Sync a single static file, for targeted rebuilds.
+
+    The file is copied if it exists in the source and differs from the
+    destination copy, and removed from the destination otherwise.
+
+    :param source_path:     The source directory path
+    :param dest_path:       The destination directory path
+    :param relative_path:   Path of the file relative to both directories
+    :param files:           Sorted relative paths currently synced, updated in place
+    :return:                "copied", "removed" or None if nothing was done
+    """
+    source_item = os.path.join(source_path, relative_path)
+    if os.path.isfile(source_item):
+        dest_item = os.path.join(dest_path, relative_path)
+        if relative_path not in files:
+            files.append(relative_path)
+            files.sort()
+        if files_identical(source_item, dest_item):
+            shutil.copystat(source_item, dest_item)
+            return None
+        copy_atomic(source_item, dest_item)
+        return "copied"
+
+    if relative_path in files:
+        files.remove(relative_path)
+        remove_output(dest_path, relative_path)
+        return "removed"
+    return None
@@ -0,0 +1,435 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import (
+    BaseHTTPRequestHandler,
+    HTTPServer
+)
+from urllib.parse import (
+    parse_qs,
+    unquote,
+    urlsplit
+)
+
+from build_report import (
+    StageTimer,
+    page_stages
+)
+from generate_page import (
+    page_template,
+    read_markdown,
+    render_page
+)
+from template import load_template
+from watch import (
+    create_watcher,
+    watch
+)
+
+
+
+
+# URL polled by pages to find out when the site changed
+live_reload_path = "/__livereload"
+
+# Seconds a live reload request waits for a change before answering anyway
+live_reload_timeout = 20.0
+
+# Injected into every page, reloads it once the site version differs from the one first seen
+live_reload_script = """<script>
+(function poll(version) {
+    fetch("%s?version=" + version)
+        .then(function (response) { return response.json(); })
+        .then(function (data) {
+            if (version !== "" && data.version !== Number(version)) { location.reload(); }
+            else { poll(String(data.version)); }
+        })
+        .catch(function () { setTimeout(function () { poll(version); }, 1000); });
+})("");
+</script>
+""" % live_reload_path
+
+# Content types worth compressing when the client accepts gzip
+compressible_types = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+
+
+
+class Resource:
+    __slots__ = ("signature", "body", "content_type", "etag", "_gzip_body")
+
+    def __init__(self, signature, body, content_type):
+        """
+        Initialize a Resource, a response body kept in memory.
+
+        :param signature:       Value identifying the inputs the body was built from
+        :param body:            The response body as bytes
+        :param content_type:    The Content-Type header value
+        """
+        self.signature = signature
+        self.body = body
+        self.content_type = content_type
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:20]}"'
+        self._gzip_body = None
+
+    def gzip_body(self):
+        """
+        Compress the body on first use and keep the result.
+
+        :return:                The gzip-compressed body, or None if the type is not compressible
+        """
+        if not self.content_type.startswith(compressible_types):
+            return None
+        if self._gzip_body is None:
+            self._gzip_body = gzip.compress(self.body, compresslevel=6, mtime=0)
+        return self._gzip_body
+
+
+
+
+class DevSite:
+    def __init__(self, paths, page_options, live_reload=True):
+        """
+        Initialize a DevSite serving pages rendered on demand and static files from memory.
+
+        Each request checks the size and mtime of the files it depends on, and
+        only renders or reads them again when they changed.
+
+        :param paths:           Dictionary of site paths, as returned by site_paths
+        :param page_options:    Keyword arguments of generate_page, as returned by page_options
+        :param live_reload:     Inject the live reload script into pages
+        """
+        self.paths = paths
+        self.page_options = page_options
+        self.live_reload = live_reload
+        self.resources = {}
+        self.lock = threading.Lock()
+        self.version = 0
+        self.changed = threading.Condition()
+
+    def resolve(self, url_path):
+        """
+        Map a URL path to the file that produces it.
+
+        :param url_path:        The decoded path of the request URL
+        :return:                A ("page", path), ("static", path) or ("redirect", location)
+                                tuple, or None if nothing matches
+        """
+        normalized = posixpath.normpath(url_path)
+        if ".." in normalized.split("/"):
+            return None
+        relative_path = normalized.lstrip("/")
+        if relative_path == ".":
+            relative_path = ""
+
+        content = self.paths["content"]
+        if url_path.endswith("/"):
+            source = os.path.join(content, relative_path, "index.md")
+            return ("page", source) if os.path.isfile(source) else None
+        if relative_path.endswith(".html"):
+            source = os.path.join(content, relative_path[:-len(".html")] + ".md")
+            if os.path.isfile(source):
+                return "page", source
+        if os.path.isfile(os.path.join(content, relative_path, "index.md")):
+            return "redirect", url_path + "/"
+
+        static_file = os.path.join(self.paths["static"], relative_path)
+        if relative_path and os.path.isfile(static_file):
+            return "static", static_file
+        return None
+
+    def get(self, kind, path):
+        """
+        Return the up-to-date in-memory Resource of a page or static file.
+
+        :param kind:            "page" or "static"
+        :param path:            Path of the markdown source or static file
+        :return:                A Resource object
+        :raise Exception:       Whatever rendering or reading the file raised
+        """
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if kind == "page":
+            template = page_template(self.paths["template"])
+            signature += (template.digest,)
+
+        with self.lock:
+            resource = self.resources.get(path)
+        if resource is not None and resource.signature == signature:
+            return resource
+
+        if kind == "page":
+            resource = Resource(signature, self.render(path, template), "text/html; charset=utf-8")
+        else:
+            with open(path, "rb") as f:
+                body = f.read()
+            content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            resource = Resource(signature, body, content_type)
+
+        with self.lock:
+            self.resources[path] = resource
+        return resource
+
+    def render(self, source_path, template):
+        """
+        Render a page through the same stages as a build, without writing it.
+
+        :param source_path:     Path of the markdown source
+        :param template:        Compiled Template of the site
+        :return:                The page HTML as UTF-8 bytes
+        """
+        markdown_content, _ = read_markdown(source_path)
+        html, _ = render_page(
+            markdown_content,
+            template,
+            StageTimer(page_stages),
+            self.page_options.get("render_cache"),
+            self.page_options.get("block_cache_size", 0),
+        )
+        if self.live_reload:
+            index = html.rfind("</body>")
+            if index == -1:
+                html += live_reload_script
+            else:
+                html = html[:index] + live_reload_script + html[index:]
+        return html.encode("utf-8")
+
+    def notify_change(self):
+        """
+        Bump the site version and wake up every waiting live reload request.
+        """
+        with self.changed:
+            self.version += 1
+            self.changed.notify_all()
+
+    def wait_for_change(self, version, timeout=live_reload_timeout):
+        """
+        Wait until the site version differs from version, or the timeout expires.
+
+        :param version:         The version the client has, or None to answer at once
+        :param timeout:         Maximum seconds to wait
+        :return:                The current site version
+        """
+        with self.changed:
+            if version is not None:
+                self.changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+
+
+
+def accepts_gzip(accept_encoding):
+    """
+    Check whether an Accept-Encoding header allows a gzip response.
+
+    :param accept_encoding:     The header value, or None
+    :return:                    True if gzip is listed without a q value of 0
+    """
+    for part in (accept_encoding or "").split(","):
+        name, *params = part.split(";")
+        if name.strip().lower() not in ("gzip", "*"):
+            continue
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+
+
+def etag_matches(if_none_match, etag):
+    """
+    Check whether an If-None-Match header matches an entity tag.
+
+    :param if_none_match:       The header value, or None
+    :param etag:                The quoted entity tag of the response
+    :return:                    True if the client already has this response
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+
+
+class DevRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Idle keep-alive connections give their worker thread back after this many seconds
+    timeout = 5
+    site = None
+    quiet = False
+
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def do_HEAD(self):
+        self.respond(send_body=False)
+
+    def respond(self, send_body):
+        url = urlsplit(self.path)
+        if url.path == live_reload_path:
+            self.respond_live_reload(url.query)
+            return
+
+        target = self.site.resolve(unquote(url.path))
+        if target is None:
+            self.send_text(HTTPStatus.NOT_FOUND, "Not found", send_body)
+            return
+        kind, path = target
+        if kind == "redirect":
+            self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+            self.send_header("Location", path + (f"?{url.query}" if url.query else ""))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        try:
+            resource = self.site.get(kind, path)
+        except Exception as e:
+            self.send_text(HTTPStatus.INTERNAL_SERVER_ERROR, f"{type(e).__name__}: {e}", send_body)
+            return
+
+        body = resource.body
+        etag = resource.etag
+        encoding = None
+        if accepts_gzip(self.headers.get("Accept-Encoding")):
+            compressed = resource.gzip_body()
+            if compressed is not None:
+                body = compressed
+                etag = etag[:-1] + '-gzip"'
+                encoding = "gzip"
+
+        if etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", resource.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def respond_live_reload(self, query):
+        versions = parse_qs(query).get("version")
+        try:
+            version = int(versions[0]) if versions else None
+        except ValueError:
+            version = None
+        body = json.dumps({"version": self.site.wait_for_change(version)}).encode()
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_text(self, status, text, send_body):
+        body = f"{text}\n".encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+
+
+class PooledHTTPServer(HTTPServer):
+    def __init__(self, server_address, handler_class, workers=16):
+        """
+        Initialize a PooledHTTPServer handling connections on a fixed pool of threads.
+
+        :param server_address:  A (host, port) tuple
+        :param handler_class:   The request handler class
+        :param workers:         Number of threads, each serving one connection at a time
+        """
+        super().__init__(server_address, handler_class)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="http")
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._process_request_in_thread, request, client_address)
+
+    def _process_request_in_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+
+
+def serve(site, host="127.0.0.1", port=8888, workers=16, polling=False, quiet=False):
+    """
+    Serve a DevSite over HTTP until interrupted.
+
+    With live reload, a watcher notifies open pages as soon as content, static
+    files or the template change, and the reloaded page is rendered on demand.
+
+    :param site:            The DevSite to serve
+    :param host:            Address to listen on
+    :param port:            Port to listen on
+    :param workers:         Number of threads handling connections
+    :param polling:         Watch for changes by polling instead of inotify
+    :param quiet:           Do not log every request
+    """
+    handler_class = type("SiteRequestHandler", (DevRequestHandler,), {"site": site, "quiet": quiet})
+    server = PooledHTTPServer((host, port), handler_class, workers)
+
+    watcher = None
+    if site.live_reload:
+        def template_files():
+            try:
+                return set(load_template(site.paths["template"]).files)
+            except (OSError, ValueError):
+                return {site.paths["template"]}
+
+        def on_change(changed):
+            site.notify_change()
+            watcher.add_files(template_files())
+
+        watcher = create_watcher([site.paths["content"], site.paths["static"]], template_files(), polling=polling)
+        threading.Thread(target=watch, args=(watcher, on_change, 0.02), daemon=True).start()
+
+    print(f"Serving the site at http://{host or 'localhost'}:{server.server_address[1]}/, press Ctrl+C to stop...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if watcher is not None:
+            watcher.close()
+        print("Server stopped", file=sys.stderr)
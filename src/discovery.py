@@ -0,0 +1,93 @@
+import os
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ThreadPoolExecutor,
+    wait
+)
+
+
+
+
+# Directories modified more recently than this are listed again next time, as a
+# file added within the same timestamp tick would not change their mtime
+racy_seconds = 2
+
+
+
+
+def list_directory(root, relative_path, suffix, cached=None):
+    """
+    List the matching files and the subdirectories of one directory.
+
+    The listing is reused when the directory's mtime is unchanged, since adding,
+    removing or renaming an entry always updates it. Symbolic links to
+    directories are not followed, like os.walk.
+
+    :param root:            The root directory of the scan
+    :param relative_path:   Path of the directory relative to root, "" for root itself
+    :param suffix:          File name suffix to keep, such as ".md"
+    :param cached:          The entry returned for this directory by the previous scan, or None
+    :return:                A {"mtime_ns", "files", "dirs"} entry with sorted names, mtime_ns
+                            being None when the directory changed too recently to be trusted
+    """
+    path = os.path.join(root, relative_path)
+    mtime_ns = os.stat(path).st_mtime_ns
+    if cached is not None and cached["mtime_ns"] == mtime_ns:
+        return cached
+
+    files = []
+    dirs = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                if not entry.is_symlink():
+                    dirs.append(entry.name)
+            elif entry.name.endswith(suffix):
+                files.append(entry.name)
+
+    if time.time_ns() - mtime_ns < racy_seconds * 10**9:
+        mtime_ns = None
+    return {"mtime_ns": mtime_ns, "files": sorted(files), "dirs": sorted(dirs)}
+
+
+
+
+def discover_files(root, suffix, cache=None, workers=8):
+    """
+    Find the files with a given suffix below a directory, listing subtrees in parallel.
+
+    Directories are listed with os.scandir on a pool of threads, which overlaps
+    the latency of slow or network file systems, and files are yielded as soon
+    as their directory is listed, so callers can start working before the scan
+    ends. Within a directory files come in name order, but directories finish
+    in any order.
+
+    :param root:            The directory to scan
+    :param suffix:          File name suffix to keep, such as ".md"
+    :param cache:           Optional dictionary of listings from the previous scan, keyed by
+                            relative directory path, updated in place once the scan completes
+    :param workers:         Number of threads listing directories
+    :return:                A generator of (relative path, path) tuples of the matching files
+    """
+    cache = {} if cache is None else cache
+    listings = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        running = {executor.submit(list_directory, root, "", suffix, cache.get("")): ""}
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                relative_dir = running.pop(future)
+                listing = future.result()
+                listings[relative_dir] = listing
+                for name in listing["dirs"]:
+                    child = os.path.join(relative_dir, name)
+                    running[executor.submit(list_directory, root, child, suffix, cache.get(child))] = child
+                # Joined once per directory, as os.path.join per file dominates cached scans
+                relative_prefix = os.path.join(relative_dir, "")
+                path_prefix = os.path.join(root, relative_prefix)
+                for name in listing["files"]:
+                    yield relative_prefix + name, path_prefix + name
+
+    cache.clear()
+    cache.update(listings)
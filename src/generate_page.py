@@ -1,54 +1,609 @@
 import os
+import time
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    ThreadPoolExecutor
+)
+from contextlib import ExitStack
 
+from build_manifest import hash_file
+from discovery import discover_files
+from htmlnode import escape_text
+from build_report import (
+    StageTimer,
+    page_stages
+)
+from block_cache import process_block_cache
 from block_markdown import (
-    markdown_to_html_node,
-    extract_title
+    MarkdownStream,
+    parse_markdown,
+    scan_markdown
+)
+from page_facts import PageFacts
+from output_files import (
+    AtomicOutput,
+    remove_output,
+    write_if_changed
 )
+from pipeline import bounded_map
+from sharding import assign_shards
+from template import load_template
 
 ## Generates HTML page from content
-def generate_page(source_path, template_path, destination_path):
+def generate_page(
+    source_path,
+    template_path,
+    destination_path,
+    template=None,
+    quiet=False,
+    render_cache=None,
+    block_cache_size=0,
+    stream_threshold=None,
+    asset_map=None,
+):
     """
     Generate an HTML page from a markdown file using a specified template.
 
     :param source_path:             Path to the markdown file
     :param template_path:           Path to the HTML template file
     :param destination_path:        Path to save the generated HTML file
+    :param template:                Optional compiled Template, loaded from template_path if omitted
+    :param quiet:                   Skip the per-page progress message
+    :param render_cache:            Optional RenderCache reused when the markdown is unchanged
+    :param block_cache_size:        Number of rendered blocks kept in this process's BlockCache,
+                                    0 disables it
+    :param stream_threshold:        Optional size in bytes from which the source is streamed
+                                    through generate_page_streaming instead of read whole
+    :param asset_map:               Optional AssetMap rewriting asset URLs to fingerprinted names,
+                                    the template is expected to be rewritten already
+    :return:                        A dict with the seconds spent in each stage, the bytes read
+                                    and written, "hit" or "miss" for the render cache, the
+                                    block cache hits and misses, and the page facts: its title,
+                                    search terms and links
+    """
+    if not quiet:
+        print(f"Generating page from {source_path} to {destination_path} using {template_path}")
+
+    if template is None:
+        template = page_template(template_path, asset_map)
+
+    if is_streamed(source_path, stream_threshold):
+        return generate_page_streaming(source_path, destination_path, template, asset_map)
+
+    timer = StageTimer(page_stages)
+    timer.begin("read")
+    markdown_content, bytes_read = read_markdown(source_path)
+
+    full_html, page_stats = render_page(
+        markdown_content, template, timer, render_cache, block_cache_size, asset_map
+    )
+
+    timer.begin("write")
+    bytes_written, output_changed = write_page(destination_path, full_html)
+
+    page_stats["stages"] = timer.end()
+    page_stats["bytes_read"] = bytes_read
+    page_stats["bytes_written"] = bytes_written
+    page_stats["output_changed"] = output_changed
+    return page_stats
+
+
+
+## Loads the template, with asset URLs rewritten when fingerprinting
+def page_template(template_path, asset_map=None):
+    """
+    Load the compiled page template, rewriting its asset URLs if an asset map is given.
+
+    :param template_path:           Path to the HTML template file
+    :param asset_map:               Optional AssetMap of fingerprinted assets
+    :return:                        A Template object, whose digest covers the asset map
+    """
+    template = load_template(template_path)
+    if asset_map is not None:
+        template = asset_map.rewrite_template(template)
+    return template
+
+
+
+## Checks whether a source is large enough to be streamed
+def is_streamed(source_path, stream_threshold):
+    """
+    Decide whether a markdown file is rendered with generate_page_streaming.
+
+    :param source_path:             Path to the markdown file
+    :param stream_threshold:        Size in bytes from which files are streamed, None never streams
+    :return:                        True if the file should be streamed
+    """
+    return stream_threshold is not None and os.path.getsize(source_path) >= stream_threshold
+
+
+
+## Generates HTML page from content, streaming it block by block
+def generate_page_streaming(source_path, destination_path, template, asset_map=None):
+    """
+    Generate an HTML page without holding the markdown or the HTML in memory.
+
+    The source is read twice: once to find the title, which the template may
+    need before the content, then block by block while each rendered block is
+    written out. Peak memory depends on the largest block, not the document.
+    The render cache is not used, as it stores whole pages, and neither is the
+    block cache, which would keep up to its entry count of blocks however
+    large they are.
+
+    :param source_path:             Path to the markdown file
+    :param destination_path:        Path to save the generated HTML file
+    :param template:                Compiled Template wrapping the article
+    :param asset_map:               Optional AssetMap rewriting link and image URLs
+    :return:                        A dict like the one returned by generate_page
+    """
+    timer = StageTimer(page_stages)
+    timer.begin("read")
+    with open(source_path, "r") as f:
+        title, has_blocks = scan_markdown(f)
+    if title is None:
+        raise ValueError("No H1 header found")
+    if not has_blocks:
+        raise ValueError("Invalid HTML: No valid blocks found to create an HTML node structure.")
+
+    facts = PageFacts()
+    content = MarkdownStream(source_path, timer, None, asset_map, facts)
+
+    output = AtomicOutput(destination_path)
+    with output as f:
+        def write(chunk):
+            stage = timer.stage
+            timer.begin("write")
+            f.write(chunk)
+            timer.begin(stage)
+
+        timer.begin("template")
+        template.render_to(write, {"Title": escape_text(title), "Content": content})
+        timer.begin("write")
+
+    return {
+        "stages": timer.end(),
+        "bytes_read": os.path.getsize(source_path),
+        "bytes_written": output.bytes_written,
+        "output_changed": output.changed,
+        "render_cache": None,
+        "block_cache_hits": 0,
+        "block_cache_misses": 0,
+        "facts": facts.to_dict(title),
+    }
+
+
+
+## Reads a markdown source
+def read_markdown(source_path):
     """
-    print(f"Generating page from {source_path} to {destination_path} using {template_path}")
+    Read a markdown file.
 
+    :param source_path:             Path to the markdown file
+    :return:                        A (markdown, bytes read) tuple
+    """
     with open(source_path, "r") as f:
         markdown_content = f.read()
-    
-    with open(template_path, "r") as f:
-        template_content = f.read()
+        return markdown_content, f.tell()
+
+
+
+## Converts markdown into the full HTML of a page
+def render_page(markdown_content, template, timer, render_cache=None, block_cache_size=0, asset_map=None):
+    """
+    Render markdown into a complete HTML page, without any file I/O besides the render cache.
+
+    :param markdown_content:        The raw markdown text
+    :param template:                Compiled Template wrapping the article
+    :param timer:                   StageTimer receiving the parse, render and template stages
+    :param render_cache:            Optional RenderCache reused when the markdown is unchanged
+    :param block_cache_size:        Number of rendered blocks kept in this process's BlockCache,
+                                    0 disables it
+    :param asset_map:               Optional AssetMap rewriting link and image URLs
+    :return:                        A (full HTML, page_stats) tuple, page_stats holding "hit" or
+                                    "miss" for the render cache, the block cache hits and misses
+                                    and the page facts
+    """
+    cache_result = None
+    cached = None
+    if render_cache is not None:
+        timer.begin("render_cache")
+        cache_key = render_cache.key(markdown_content, asset_map.digest if asset_map is not None else "")
+        cached = render_cache.get(cache_key)
+        cache_result = "miss" if cached is None else "hit"
+
+    block_cache = process_block_cache(block_cache_size)
+    block_hits = block_cache.hits if block_cache is not None else 0
+    block_misses = block_cache.misses if block_cache is not None else 0
+
+    if cached is not None:
+        html_content, title, terms, links = cached
+        facts = {"title": title, "terms": terms, "links": links}
+    else:
+        page_facts = PageFacts()
+        content_node, title = parse_markdown(markdown_content, timer, block_cache, asset_map, page_facts)
+        if title is None:
+            raise ValueError("No H1 header found")
+        facts = page_facts.to_dict(title)
+
+        timer.begin("to_html")
+        html_content = content_node.to_html()
+
+        if render_cache is not None:
+            timer.begin("render_cache")
+            render_cache.put(cache_key, html_content, title, facts["terms"], facts["links"])
+
+    timer.begin("template")
+    full_html = template.render({"Title": escape_text(title), "Content": html_content})
+
+    return full_html, {
+        "render_cache": cache_result,
+        "block_cache_hits": block_cache.hits - block_hits if block_cache is not None else 0,
+        "block_cache_misses": block_cache.misses - block_misses if block_cache is not None else 0,
+        "facts": facts,
+    }
+
+
+
+## Writes a generated page
+def write_page(destination_path, full_html):
+    """
+    Write the HTML of a page as UTF-8, unless the file already holds the same bytes.
+
+    Changed pages are replaced atomically, see write_if_changed.
+
+    :param destination_path:        Path to save the generated HTML file
+    :param full_html:               The complete HTML of the page
+    :return:                        A (bytes written, changed) tuple, no bytes are written
+                                    when the page is unchanged
+    """
+    data = full_html.encode("utf-8")
+    changed = write_if_changed(destination_path, data)
+    return (len(data) if changed else 0), changed
+
+
+
+## Maps a markdown source to the HTML file it generates
+def content_output_path(dir_path_content, source_path, dest_dir_path):
+    """
+    Compute the output path of a markdown file, mirroring the content tree.
+
+    :param dir_path_content:        Path to the directory containing markdown files
+    :param source_path:             Path to the markdown file
+    :param dest_dir_path:           Path to the destination directory for generated HTML files
+    :return:                        The path of the generated HTML file
+    """
+    relative_path = os.path.relpath(os.path.dirname(source_path), dir_path_content)
+    file = os.path.basename(source_path)
+    return os.path.join(dest_dir_path, relative_path, file.replace(".md", ".html"))
+
+
+
+## Creates the counters returned by the page generators
+def new_page_stats():
+    """
+    Create the counters shared by generate_page_recursive and generate_pages.
+
+    :return:                        A dict of zeroed counters, an empty error list and an empty
+                                    dict of replaced manifest entries
+    """
+    return {
+        "rebuilt": 0,
+        "skipped": 0,
+        "deleted": 0,
+        "render_cache_hits": 0,
+        "render_cache_misses": 0,
+        "block_cache_hits": 0,
+        "block_cache_misses": 0,
+        "unchanged_outputs": 0,
+        "errors": [],
+        "replaced": {},
+    }
+
+
+
+## Removes the output of a deleted markdown source
+def remove_page(dest_dir_path, output, quiet=False):
+    """
+    Remove a stale page and the directories its removal leaves empty.
+
+    :param dest_dir_path:           Path to the destination directory for generated HTML files
+    :param output:                  Path of the page relative to the destination directory
+    :param quiet:                   Skip the progress message, like generate_page
+    """
+    if not quiet:
+        print(f"Removing stale output {os.path.join(dest_dir_path, output)}")
+    remove_output(dest_dir_path, output)
+
+
+
+## Adds a generated page to the counters
+def count_page(stats, page_stats):
+    """
+    Count a successfully generated page.
+
+    :param stats:                   Counters from new_page_stats, updated in place
+    :param page_stats:              The dict returned by generate_page
+    """
+    stats["rebuilt"] += 1
+    if not page_stats["output_changed"]:
+        stats["unchanged_outputs"] += 1
+    if page_stats["render_cache"] == "hit":
+        stats["render_cache_hits"] += 1
+    elif page_stats["render_cache"] == "miss":
+        stats["render_cache_misses"] += 1
+    stats["block_cache_hits"] += page_stats["block_cache_hits"]
+    stats["block_cache_misses"] += page_stats["block_cache_misses"]
+
+
+
+## Generates one page, capturing any error instead of raising it
+def generate_page_safe(job):
+    """
+    Generate a single page and report failure as a value.
+
+    Used as the unit of work for the process pool, so that one broken page
+    does not abort the rest of the build.
+
+    :param job:                     A (source_path, destination_path, page_options) tuple, where
+                                    page_options holds the keyword arguments of generate_page
+    :return:                        An (error, page_stats) tuple, error is None on success
+                                    and page_stats is None on failure
+    """
+    source_path, destination_path, page_options = job
+    try:
+        return None, generate_page(source_path, destination_path=destination_path, **page_options)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}", None
+
+
+
+## Pipeline stage: reads a source on a reader thread
+def _read_stage(job):
+    source_path, _, page_options = job
+    start = time.perf_counter()
+    try:
+        if is_streamed(source_path, page_options.get("stream_threshold")):
+            # Streamed pages are read, rendered and written together by the render stage
+            return job, None, None
+        markdown_content, bytes_read = read_markdown(source_path)
+    except Exception as e:
+        return job, f"{type(e).__name__}: {e}", None
+    return job, None, (markdown_content, bytes_read, time.perf_counter() - start)
+
 
-    html_content = markdown_to_html_node(markdown_content).to_html()
-    title = extract_title(markdown_content)
 
-    full_html = template_content.replace("{{ Title }}", title).replace("{{ Content }}", html_content)
+## Pipeline stage: renders a page in the main or a worker process
+def _render_stage(job, error, read_result):
+    if error is not None:
+        return job, error, None
+    source_path, destination_path, page_options = job
+    if read_result is None:
+        error, page_stats = generate_page_safe(job)
+        return job, error, (None, page_stats)
+    if not page_options.get("quiet"):
+        print(f"Generating page from {source_path} to {destination_path} using {page_options['template_path']}")
 
-    os.makedirs(os.path.dirname(destination_path), exist_ok=True)
+    markdown_content, bytes_read, read_seconds = read_result
+    timer = StageTimer(page_stages)
+    try:
+        full_html, page_stats = render_page(
+            markdown_content,
+            page_options["template"],
+            timer,
+            page_options.get("render_cache"),
+            page_options.get("block_cache_size", 0),
+            page_options.get("asset_map"),
+        )
+    except Exception as e:
+        return job, f"{type(e).__name__}: {e}", None
 
-    with open(destination_path, "w") as f:
-        f.write(full_html)
+    page_stats["stages"] = timer.end()
+    page_stats["stages"]["read"] = read_seconds
+    page_stats["bytes_read"] = bytes_read
+    return job, None, (full_html, page_stats)
+
+
+
+## Pipeline stage: writes a page on a writer thread
+def _write_stage(job, error, render_result):
+    if error is not None:
+        return error, None
+    full_html, page_stats = render_result
+    if full_html is None:
+        return None, page_stats
+    start = time.perf_counter()
+    try:
+        page_stats["bytes_written"], page_stats["output_changed"] = write_page(job[1], full_html)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}", None
+    page_stats["stages"]["write"] = time.perf_counter() - start
+    return None, page_stats
+
+
+
+## Generates pages with reads, rendering and writes overlapped
+def generate_pages_pipelined(page_jobs, jobs=1, io_workers=4, queue_depth=32):
+    """
+    Generate pages through a read, render and write pipeline.
+
+    Sources are prefetched by a pool of reader threads and outputs drained by
+    a pool of writer threads, so rendering does not wait on the file system.
+    Rendering runs in the main process, or in worker processes when jobs > 1.
+    Each stage keeps at most queue_depth pages in flight, which bounds memory.
+
+    :param page_jobs:               List of (source_path, destination_path, page_options) tuples
+    :param jobs:                    Number of worker processes, 1 renders in the main process
+    :param io_workers:              Number of reader threads and of writer threads
+    :param queue_depth:             Maximum number of pages queued in each stage
+    :return:                        A list of (error, page_stats) tuples in the order of page_jobs,
+                                    as returned by generate_page_safe
+    """
+    with ExitStack() as stack:
+        readers = stack.enter_context(ThreadPoolExecutor(max_workers=io_workers))
+        writers = stack.enter_context(ThreadPoolExecutor(max_workers=io_workers))
+        renderers = None
+        if jobs > 1:
+            renderers = stack.enter_context(ProcessPoolExecutor(max_workers=jobs))
+
+        read = bounded_map(readers, _read_stage, ((job,) for job in page_jobs), queue_depth)
+        rendered = bounded_map(renderers, _render_stage, read, queue_depth)
+        return list(bounded_map(writers, _write_stage, rendered, queue_depth))
 
 
 
 ## Recursively generates HTML pages from content
-def generate_page_recursive(dir_path_content, template_path, dest_dir_path):
+def generate_page_recursive(
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    manifest=None,
+    jobs=1,
+    report=None,
+    io_workers=0,
+    queue_depth=32,
+    shard=None,
+    scan_workers=8,
+    **page_options,
+):
     """
     Recursively generate HTML pages from markdown files in a directory.
 
+    When a manifest is given, pages whose source and template are unchanged
+    since the last build are skipped, and outputs of deleted sources are removed.
+    Pages that fail to generate are collected and returned rather than raised.
+    With a shard, only the pages assigned to it by assign_shards are considered.
+
+    :param dir_path_content:        Path to the directory containing markdown files
+    :param template_path:           Path to the HTML template file
+    :param dest_dir_path:           Path to the destination directory for generated HTML files
+    :param manifest:                Optional BuildManifest recording the previous build
+    :param jobs:                    Number of worker processes, 1 renders serially in-process
+    :param report:                  Optional BuildReport receiving each page's timings
+    :param io_workers:              With a positive value, overlap reads and writes with rendering
+                                    through generate_pages_pipelined using this many threads each
+    :param queue_depth:             Maximum number of pages queued in each pipeline stage
+    :param shard:                   Optional (index, count) tuple, building only one shard of the pages
+    :param scan_workers:            Number of threads listing the content directories, see discover_files
+    :param page_options:            Further keyword arguments of generate_page, such as quiet
+    :return:                        A dict with the rebuilt, skipped and deleted page counts,
+                                    render cache hits and misses, a sorted list of
+                                    (source, error) pairs and the previous manifest entries
+                                    of every rebuilt, failed or deleted page
+    """
+    stats = new_page_stats()
+    template = page_template(template_path, page_options.get("asset_map"))
+    template_hash = template.digest
+    page_options = {"template_path": template_path, "template": template, **page_options}
+    seen_sources = set()
+    pending = []
+
+    listings = manifest.directories if manifest is not None else None
+    sources = discover_files(dir_path_content, ".md", listings, scan_workers)
+    if shard is not None:
+        index, count = shard
+        sources = list(sources)
+        assignment = assign_shards({source: os.path.getsize(from_path) for source, from_path in sources}, count)
+        sources = [(source, from_path) for source, from_path in sources if assignment[source] == index]
+
+    def page_jobs():
+        # Consumed while the scan is still running, so rendering starts with the first files found
+        for source, from_path in sources:
+            dest_path = content_output_path(dir_path_content, from_path, dest_dir_path)
+
+            if manifest is not None:
+                source_hash = hash_file(from_path)
+                seen_sources.add(source)
+                if manifest.is_page_fresh(source, source_hash, template_hash, dest_path):
+                    stats["skipped"] += 1
+                    continue
+            else:
+                source_hash = None
+
+            job = (from_path, dest_path, page_options)
+            pending.append((source, source_hash, job))
+            yield job
+
+    if io_workers > 0:
+        results = generate_pages_pipelined(page_jobs(), jobs, io_workers, queue_depth)
+    elif jobs > 1:
+        # The chunk size depends on the page count, so the scan has to finish first
+        job_list = list(page_jobs())
+        chunksize = max(1, len(job_list) // (jobs * 4))
+        if len(job_list) > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                results = list(executor.map(generate_page_safe, job_list, chunksize=chunksize))
+        else:
+            results = [generate_page_safe(job) for job in job_list]
+    else:
+        results = [generate_page_safe(job) for job in page_jobs()]
+
+    for (source, source_hash, (_, dest_path, _)), (error, page_stats) in zip(pending, results):
+        if error is not None:
+            stats["errors"].append((source, error))
+            if manifest is not None:
+                stats["replaced"][source] = manifest.pages.pop(source, None)
+            continue
+        facts = page_stats.pop("facts")
+        if manifest is not None:
+            stats["replaced"][source] = manifest.pages.get(source)
+            manifest.record_page(source, source_hash, os.path.relpath(dest_path, dest_dir_path), facts)
+        if report is not None:
+            report.add_page(source, page_stats)
+        count_page(stats, page_stats)
+    stats["errors"].sort()
+
+    if manifest is not None:
+        for source in sorted(set(manifest.pages) - seen_sources):
+            entry = manifest.pages.pop(source)
+            remove_page(dest_dir_path, entry["output"], page_options.get("quiet"))
+            stats["replaced"][source] = entry
+            stats["deleted"] += 1
+        manifest.template_hash = template_hash
+
+    return stats
+
+
+
+## Regenerates or removes only the given markdown files
+def generate_pages(dir_path_content, source_paths, template_path, dest_dir_path, manifest, **page_options):
+    """
+    Regenerate the pages of specific markdown files, for targeted rebuilds.
+
+    Sources that no longer exist have their output removed instead.
+
     :param dir_path_content:        Path to the directory containing markdown files
+    :param source_paths:            Paths of the markdown files that changed
     :param template_path:           Path to the HTML template file
     :param dest_dir_path:           Path to the destination directory for generated HTML files
+    :param manifest:                BuildManifest recording the previous build
+    :param page_options:            Further keyword arguments of generate_page, such as quiet
+    :return:                        A dict like the one returned by generate_page_recursive
     """
-    for root, dirs, files in os.walk(dir_path_content):
-        for file in files:
-            if file.endswith(".md"):
-                from_path = os.path.join(root, file)
-                relative_path = os.path.relpath(root, dir_path_content)
-                dest_dir = os.path.join(dest_dir_path, relative_path)
-                os.makedirs(dest_dir, exist_ok=True)
-                dest_path = os.path.join(dest_dir, file.replace(".md", ".html"))
-                generate_page(from_path, template_path, dest_path)
\ No newline at end of file
+    stats = new_page_stats()
+    template = page_template(template_path, page_options.get("asset_map"))
+    page_options = {"template_path": template_path, "template": template, **page_options}
+
+    for from_path in sorted(source_paths):
+        source = os.path.relpath(from_path, dir_path_content)
+
+        if not os.path.exists(from_path):
+            entry = manifest.pages.pop(source, None)
+            if entry is not None:
+                remove_page(dest_dir_path, entry["output"], page_options.get("quiet"))
+                stats["replaced"][source] = entry
+                stats["deleted"] += 1
+            continue
+
+        dest_path = content_output_path(dir_path_content, from_path, dest_dir_path)
+        error, page_stats = generate_page_safe((from_path, dest_path, page_options))
+        if error is not None:
+            stats["errors"].append((source, error))
+            stats["replaced"][source] = manifest.pages.pop(source, None)
+            continue
+        stats["replaced"][source] = manifest.pages.get(source)
+        manifest.record_page(
+            source, hash_file(from_path), os.path.relpath(dest_path, dest_dir_path), page_stats.pop("facts")
+        )
+        count_page(stats, page_stats)
+
+    return stats
@@ -1,4 +1,122 @@
+from functools import lru_cache
+
+
+
+
+def escape_text(text):
+    """
+    Escape text for use as HTML element content.
+
+    Most text holds no special character, so it is returned as is after
+    three substring checks. Otherwise chained replaces are used, which beat
+    str.translate for the few characters involved.
+
+    :param text:        The raw text, other values being converted with str
+    :return:            The text with &, < and > replaced by character references
+    """
+    if text.__class__ is not str:
+        text = str(text)
+    if "&" not in text and "<" not in text and ">" not in text:
+        return text
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+
+
+def escape_attribute(value):
+    """
+    Escape text for use inside a double-quoted HTML attribute value.
+
+    :param value:       The raw attribute value, other values being converted with str
+    :return:            The value with &, <, > and " replaced by character references
+    """
+    if value.__class__ is not str:
+        value = str(value)
+    if "&" not in value and "<" not in value and ">" not in value and '"' not in value:
+        return value
+    return value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+
+
+
+def attributes_to_html(props):
+    """
+    Serialize an attributes dictionary, escaping the values.
+
+    The values are checked for special characters together, so the common case
+    of clean values costs one scan and no per-value escaping calls.
+
+    :param props:       Dictionary of HTML attributes, non-string values being converted with str
+    :return:            A string of HTML attributes, each preceded by a space
+    """
+    try:
+        values = "".join(props.values())
+    except TypeError:
+        props = {key: str(value) for key, value in props.items()}
+        values = "".join(props.values())
+    if "&" in values or "<" in values or ">" in values or '"' in values:
+        return "".join(f' {key}="{escape_attribute(value)}"' for key, value in props.items())
+    return "".join(f' {key}="{value}"' for key, value in props.items())
+
+
+
+
+class FrozenProps(dict):
+    __slots__ = ("html",)
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initialize a FrozenProps object, a read-only attributes dictionary.
+
+        The attribute string is serialized once here, and reused by every node
+        sharing the object, however often it is rendered.
+
+        :param args:        Arguments accepted by dict
+        :param kwargs:      Attributes given as keywords
+        """
+        super().__init__(*args, **kwargs)
+        self.html = attributes_to_html(self)
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("FrozenProps is read-only")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = __ior__ = _read_only
+
+    def __hash__(self):
+        return hash(frozenset(self.items()))
+
+    def __reduce__(self):
+        return FrozenProps, (dict(self),)
+
+
+
+
+@lru_cache(maxsize=65536)
+def _interned_props(items):
+    return FrozenProps(items)
+
+
+
+
+def intern_props(**props):
+    """
+    Return the shared FrozenProps object of an attributes dictionary.
+
+    Links and images repeated across pages, such as navigation or logos,
+    get one object and serialize their attribute string once per process.
+    The most recently used combinations are kept, up to a fixed number.
+
+    :param props:       Attributes given as keywords, in output order
+    :return:            A FrozenProps object
+    """
+    return _interned_props(tuple(props.items()))
+
+
+
+
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         """
         Initialize an HTMLNode object.
@@ -20,6 +138,23 @@ class HTMLNode:
         This method should be overwritten by subclasses.
         """
         raise NotImplementedError("Still needs to be imlemented")
+
+    def iter_html(self):
+        """
+        Generate the HTML of the node as a sequence of string chunks.
+
+        Subclasses with children override this to stream their subtree.
+        """
+        yield self.to_html()
+
+    def render_to(self, write):
+        """
+        Stream the HTML of the node through a write callable without building the full string.
+
+        :param write:       Callable accepting each string chunk (e.g. a file's write method)
+        """
+        for chunk in self.iter_html():
+            write(chunk)
     
     def props_to_html(self):
         """
@@ -27,10 +162,12 @@ class HTMLNode:
 
         :return:        A string of HTML attributes
         """
-        if self.props is None:
+        props = self.props
+        if props is None:
             return ""
-        prop_string = "".join(f' {key}="{value}"' for key, value in self.props.items())
-        return prop_string
+        if props.__class__ is FrozenProps:
+            return props.html
+        return attributes_to_html(props)
 
     def __repr__(self):
         """
@@ -42,6 +179,8 @@ class HTMLNode:
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag=None, value=None, props=None):
         """
         Initialize a LeafNode object, a subclass of HTMLNode for leaf elements.
@@ -52,7 +191,10 @@ class LeafNode(HTMLNode):
         """
         if value is None:
             raise ValueError("Invalid HTML: no value")
-        super().__init__(tag, value, None, props)
+        # Assigned directly rather than through super().__init__, leaves are the most common node
+        self.tag = tag
+        self.value = value
+        self.children = None
         self.props = props
     
     def __eq__(self, other):
@@ -69,13 +211,13 @@ class LeafNode(HTMLNode):
 
     def to_html(self):
         """
-        Convert the LeafNode to an HTML string.
+        Convert the LeafNode to an HTML string, escaping its text.
         """
         if self.value is None:
             raise ValueError("Invalid HTML: no value")
         elif self.tag is None:
-            return self.value
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+            return escape_text(self.value)
+        return f"<{self.tag}{self.props_to_html()}>{escape_text(self.value)}</{self.tag}>"
     
     def __repr__(self):
         """
@@ -86,7 +228,43 @@ class LeafNode(HTMLNode):
 
 
     
+class RawNode(LeafNode):
+    __slots__ = ()
+
+    def __init__(self, html):
+        """
+        Initialize a RawNode object, a leaf holding HTML that is already rendered and escaped.
+
+        :param html:        The HTML fragment, output unchanged
+        """
+        super().__init__(None, html)
+
+    def __eq__(self, other):
+        """
+        Define equality between two RawNode objects.
+        """
+        if isinstance(other, RawNode):
+            return self.value == other.value
+        return False
+
+    def to_html(self):
+        """
+        Return the HTML fragment unchanged.
+        """
+        return self.value
+
+    def __repr__(self):
+        """
+        Provide a string representation of the RawNode object.
+        """
+        return f"RawNode(html={self.value!r})"
+
+
+
+
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag=None, children=None, props=None):
         """
         Initialize a ParentNode object, a subclass of HTMLNode for parent elements.
@@ -117,8 +295,32 @@ class ParentNode(HTMLNode):
         """
         Convert the ParentNode and its children to an HTML string.
         """
-        chilren_string = "".join(child.to_html() for child in self.children)
-        return f"<{self.tag}{self.props_to_html()}>{chilren_string}</{self.tag}>"
+        return "".join(self.iter_html())
+
+    def iter_html(self):
+        """
+        Generate the HTML of the node and its subtree as string chunks.
+
+        The tree is walked with an explicit stack rather than recursion, so no
+        subtree string is built and deep trees cannot hit the recursion limit.
+        """
+        yield f"<{self.tag}{self.props_to_html()}>"
+        stack = [(iter(self.children), f"</{self.tag}>")]
+        while stack:
+            children, closing_tag = stack[-1]
+            for child in children:
+                if isinstance(child, ParentNode):
+                    yield f"<{child.tag}{child.props_to_html()}>"
+                    stack.append((iter(child.children), f"</{child.tag}>"))
+                    break
+                if isinstance(child, LeafNode):
+                    # Leaves render in one piece, skipping a generator per leaf
+                    yield child.to_html()
+                else:
+                    yield from child.iter_html()
+            else:
+                stack.pop()
+                yield closing_tag
 
 
     def __repr__(self):
@@ -46,6 +46,27 @@ def split_nodes_delimiter(old_nodes, deliminater, text_type):
 
 
 
+# Inline markup patterns, compiled once at import
+image_pattern = re.compile(r"!\[(.*?)\]\((.*?)\)")
+link_pattern = re.compile(r"(?<!!)\[(.*?)\]\((.*?)\)")
+
+# Positions where an inline token may start, and the delimiters that close them
+inline_start_pattern = re.compile(r"\*\*|\*|`|!\[|\[")
+inline_delimiters = {
+    "**": text_type_bold,
+    "*": text_type_italic,
+    "`": text_type_code,
+}
+
+# A reference without brackets or line breaks inside, matched from its opening bracket
+simple_reference_pattern = re.compile(r"\[([^\[\]\n]*)\]\(([^\[)\n]*)\)")
+
+# Bold, italic and code characters, which images and links cannot span
+delimiter_pattern = re.compile(r"[*`]")
+
+
+
+
 def extract_markdown_images(text):
     """
     Extract markdown images from a given text.
@@ -53,9 +74,7 @@ def extract_markdown_images(text):
     :param text:            The text to search for images
     :return:                A list of tuples (alt text, image URL)
     """
-    pattern = r"!\[(.*?)\]\((.*?)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return image_pattern.findall(text)
 
 
 
@@ -67,50 +86,57 @@ def extract_markdown_links(text):
     :param text:            The text to search for links
     :return:                A list of tuples (link text, URL)
     """
-    pattern = r"(?<!!)\[(.*?)\]\((.*?)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return link_pattern.findall(text)
 
 
 
 
-def split_nodes_images(old_nodes):
+def split_nodes_pattern(old_nodes, pattern, text_type):
     """
-    Split text nodes into images and regular text nodes.
+    Split text nodes on every match of a (text, URL) pattern in one scan per node.
 
-    :param old_nodes:       List of TextNode objects.
-    :return:                A new list of TextNode objects, with images extracted
+    :param old_nodes:       List of TextNode objects
+    :param pattern:         Compiled pattern capturing the text and the URL
+    :param text_type:       The type of text to assign to each match
+    :return:                A new list of TextNode objects
     """
     new_nodes = []
-    
+
     for node in old_nodes:
         if node.text_type != text_type_text:
             new_nodes.append(node)
             continue
 
-        images = extract_markdown_images(node.text)
-        if not images:
+        text = node.text
+        position = 0
+        for match in pattern.finditer(text):
+            if match.start() > position:
+                new_nodes.append(TextNode(text[position:match.start()], text_type_text))
+            new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+            position = match.end()
+
+        if position == 0:
             new_nodes.append(node)
-            continue
+        elif position < len(text):
+            new_nodes.append(TextNode(text[position:], text_type_text))
 
-        remaining_text = node.text
-        for alt, url in images:
-            sections = remaining_text.split(f"![{alt}]({url})", 1)
-            if len(sections) != 2:
-                raise ValueError("Invalid markdown: Link section not closed")
-            if sections[0]:
-                new_nodes.append(TextNode(sections[0], text_type_text))
-            new_nodes.append(TextNode(alt, text_type_image, url))
-            remaining_text = sections[1]
-
-        if remaining_text:
-            new_nodes.append(TextNode(remaining_text, text_type_text))
-    
     return new_nodes
 
 
 
 
+def split_nodes_images(old_nodes):
+    """
+    Split text nodes into images and regular text nodes.
+
+    :param old_nodes:       List of TextNode objects.
+    :return:                A new list of TextNode objects, with images extracted
+    """
+    return split_nodes_pattern(old_nodes, image_pattern, text_type_image)
+
+
+
+
 def split_nodes_links(old_nodes):
     """
     Split text nodes into links and regular text nodes.
@@ -118,33 +144,67 @@ def split_nodes_links(old_nodes):
     :param old_nodes:       List of TextNode objects
     :return:                A new list of TextNode objects, with links extracted
     """
-    new_nodes = []
-    
-    for node in old_nodes:
-        if node.text_type != text_type_text:
-            new_nodes.append(node)
-            continue
+    return split_nodes_pattern(old_nodes, link_pattern, text_type_link)
 
-        links = extract_markdown_links(node.text)
-        if not links:
-            new_nodes.append(node)
-            continue
 
-        remaining_text = node.text
-        for text, url in links:
-            sections = remaining_text.split(f"[{text}]({url})", 1)
-            if len(sections) != 2:
-                raise ValueError("Invalid markdown: Link section not closed")
-            if sections[0]:
-                new_nodes.append(TextNode(sections[0], text_type_text))
-            new_nodes.append(TextNode(text, text_type_link, url))
-            remaining_text = sections[1]
-            
-        if remaining_text:
-            new_nodes.append(TextNode(remaining_text, text_type_text))
 
-    return new_nodes
-    
+
+class _ReferenceMatcher:
+    __slots__ = ("text", "length", "close", "paren", "newline")
+
+    def __init__(self, text):
+        """
+        Initialize a _ReferenceMatcher, matching [text](url) at increasing positions in linear total time.
+
+        It matches exactly what link_pattern and image_pattern match from a
+        bracket: the label runs to the first "](" and the URL to the first ")"
+        after it, neither crossing a line break. The next "](", ")" and line
+        break found are kept and reused while they lie after the requested
+        position, so many brackets sharing one distant closing token cost a
+        single search instead of one each.
+
+        :param text:            The text searched
+        """
+        self.text = text
+        self.length = len(text)
+        # Index of the next occurrence from the last position searched, length if there is none
+        self.close = -1
+        self.paren = -1
+        self.newline = -1
+
+    def match(self, bracket):
+        """
+        Match a reference whose opening bracket is at a given position, called with increasing positions.
+
+        :param bracket:         Index of the "[" in the text
+        :return:                A (label, URL, end index) tuple, or None if there is no reference
+        """
+        text = self.text
+        length = self.length
+        start = bracket + 1
+
+        close = self.close
+        if close < start:
+            close = text.find("](", start)
+            self.close = close = length if close == -1 else close
+        if close == length:
+            return None
+
+        paren = self.paren
+        if paren < close + 2:
+            paren = text.find(")", close + 2)
+            self.paren = paren = length if paren == -1 else paren
+        if paren == length:
+            return None
+
+        newline = self.newline
+        if newline < start:
+            newline = text.find("\n", start)
+            self.newline = newline = length if newline == -1 else newline
+        if newline < paren:
+            return None
+        return text[start:close], text[close + 2:paren], paren + 1
+
 
 
 
@@ -152,13 +212,94 @@ def text_to_textnodes(text):
     """
     Convert raw text into a list of TextNode objects.
 
+    Bold, italic, code, images and links are tokenized in a single left-to-right
+    scan. As when bold, italic and code were split out before images and links,
+    an image or link whose span holds a "*" or "`" is not one, and the markup
+    inside it is parsed instead. Where bold, italic or code markup overlaps,
+    the token that opens first wins. Brackets are matched through monotone
+    searches, so text with many unclosed brackets is still scanned in linear time.
+
     :param text:            The raw text to convert
     :return:                A list of TextNode objects representing the text and its formatting
     """
-    nodes = [TextNode(text, text_type_text)]
-    nodes = split_nodes_delimiter(nodes, "**", text_type_bold)
-    nodes = split_nodes_delimiter(nodes, "*", text_type_italic)
-    nodes = split_nodes_delimiter(nodes, "`", text_type_code)
-    nodes = split_nodes_images(nodes)
-    nodes = split_nodes_links(nodes)
+    if "*" not in text and "`" not in text and "[" not in text:
+        return [TextNode(text, text_type_text)] if text else []
+
+    nodes = []
+    position = 0
+    scan_from = 0
+    length = len(text)
+    references = None
+
+    while scan_from < length:
+        start = inline_start_pattern.search(text, scan_from)
+        if start is None:
+            break
+
+        token = start.group(0)
+        begin = start.start()
+
+        if token in inline_delimiters:
+            content_start = begin + len(token)
+            end = text.find(token, content_start)
+            if end == -1:
+                raise ValueError(f"Invalid markdown syntax: Unmached delimiter '{token}' in text: '{text}'")
+            if begin > position:
+                nodes.append(TextNode(text[position:begin], text_type_text))
+            if end > content_start:
+                nodes.append(TextNode(text[content_start:end], inline_delimiters[token]))
+            position = scan_from = end + len(token)
+            continue
+
+        if references is None:
+            references = _ReferenceMatcher(text)
+            wrapped_references = _ReferenceMatcher(text)
+            image_start = -1
+            limit = -1
+
+        # Bold, italic and code used to be split out first, so no image or link spans across them
+        if limit < begin:
+            delimiter = delimiter_pattern.search(text, begin)
+            limit = delimiter.start() if delimiter is not None else length
+
+        if token == "![":
+            bracket = begin + 1
+            text_type = text_type_image
+        elif begin == 0 or text[begin - 1] != "!":
+            bracket = begin
+            text_type = text_type_link
+        else:
+            scan_from = begin + 1
+            continue
+
+        # References without brackets inside are matched directly, that scan stops at the next bracket
+        simple = simple_reference_pattern.match(text, bracket)
+        if simple is not None:
+            match = (simple.group(1), simple.group(2), simple.end())
+        else:
+            match = references.match(bracket)
+            # Images are extracted before links, so a link wrapping one is not a link
+            if match is not None and text_type == text_type_link:
+                if image_start < begin:
+                    image_start = text.find("![", begin)
+                    image_start = length if image_start == -1 else image_start
+                if image_start < match[2]:
+                    image = wrapped_references.match(image_start + 1)
+                    if image is not None and image[2] <= limit:
+                        match = None
+
+        if match is not None and match[2] > limit:
+            match = None
+
+        if match is None:
+            scan_from = begin + 1
+            continue
+
+        if begin > position:
+            nodes.append(TextNode(text[position:begin], text_type_text))
+        nodes.append(TextNode(match[0], text_type, match[1]))
+        position = scan_from = match[2]
+
+    if position < length:
+        nodes.append(TextNode(text[position:], text_type_text))
     return nodes
@@ -0,0 +1,146 @@
+import os
+import posixpath
+from urllib.parse import (
+    unquote,
+    urlsplit
+)
+
+from search_index import page_url
+
+
+
+
+def internal_target(link, page_path):
+    """
+    Resolve a link of a page to the site path it points to.
+
+    :param link:            The href or src value, as written in the page
+    :param page_path:       URL path of the page holding the link, as returned by page_url
+    :return:                The target path relative to the site root, ending with a slash
+                            for directories, or None for external and same-page links
+    """
+    url = urlsplit(link)
+    if url.scheme or url.netloc or not url.path:
+        return None
+    path = unquote(url.path)
+    if not path.startswith("/"):
+        path = posixpath.join(posixpath.dirname(page_path), path)
+    directory = path.endswith("/")
+    path = posixpath.normpath(path).lstrip("/")
+    if path == ".":
+        path = ""
+    if directory and path:
+        path += "/"
+    return path
+
+
+
+
+def target_exists(target, outputs):
+    """
+    Check whether a resolved link target is served by the site.
+
+    :param target:          A path returned by internal_target
+    :param outputs:         Set of output paths relative to the destination directory, with slashes
+    :return:                True if the target is a file or a directory with an index.html
+    """
+    if target == "" or target.endswith("/"):
+        return f"{target}index.html" in outputs
+    return target in outputs or f"{target}/index.html" in outputs
+
+
+
+
+def targets_of_output(output):
+    """
+    List the link targets an output file can satisfy.
+
+    :param output:          Output path relative to the destination directory, with slashes
+    :return:                A list of targets as returned by internal_target
+    """
+    targets = [output]
+    if output == "index.html" or output.endswith("/index.html"):
+        directory = output[:-len("index.html")]
+        targets.append(directory)
+        if directory:
+            targets.append(directory.rstrip("/"))
+    return targets
+
+
+
+
+def page_targets(entry):
+    """
+    Resolve the internal links of a page recorded in the manifest.
+
+    :param entry:           Manifest entry of the page, with its output and links
+    :return:                A dict mapping each internal link to its resolved target
+    """
+    page_path = page_url(entry["output"])
+    targets = {}
+    for link in entry.get("links", ()):
+        target = internal_target(link, page_path)
+        if target is not None:
+            targets[link] = target
+    return targets
+
+
+
+
+def check_links(manifest, replaced):
+    """
+    Find the internal links that point to neither a generated page nor a static file.
+
+    The manifest keeps the link graph, mapping every link target to the pages
+    that link to it. After the first check, only the replaced pages and the
+    pages linking to outputs that appeared or disappeared are checked again.
+
+    :param manifest:        BuildManifest whose page entries hold the links and whose
+                            link_check state of the previous check is replaced
+    :param replaced:        Dictionary mapping the sources rebuilt, failed or deleted since the
+                            last check to their previous manifest entry, or None for new pages
+    :return:                A (broken, checked) tuple, broken mapping each page with broken links
+                            to a sorted list of them, and checked the number of pages checked
+    """
+    outputs = {entry["output"].replace(os.sep, "/") for entry in manifest.pages.values()}
+    outputs.update(path.replace(os.sep, "/") for path in manifest.static_files)
+
+    state = manifest.link_check
+    if state is None:
+        state = {"outputs": [], "incoming": {}, "broken": {}}
+        replaced = dict.fromkeys(manifest.pages)
+    incoming = {target: set(sources) for target, sources in state["incoming"].items()}
+    broken = state["broken"]
+
+    # Drop the edges of replaced pages, their current links are added back below
+    for source, entry in replaced.items():
+        if entry is not None:
+            for target in page_targets(entry).values():
+                incoming.get(target, set()).discard(source)
+        broken.pop(source, None)
+
+    to_check = {source for source in replaced if source in manifest.pages}
+    previous_outputs = set(state["outputs"])
+    for output in outputs.symmetric_difference(previous_outputs):
+        for target in targets_of_output(output):
+            to_check.update(incoming.get(target, ()))
+
+    for source in sorted(to_check):
+        entry = manifest.pages[source]
+        page_broken = []
+        for link, target in page_targets(entry).items():
+            if source in replaced:
+                incoming.setdefault(target, set()).add(source)
+            if not target_exists(target, outputs):
+                page_broken.append(link)
+        if page_broken:
+            broken[source] = sorted(page_broken)
+        else:
+            broken.pop(source, None)
+
+    manifest.link_check = {
+        "outputs": sorted(outputs),
+        "incoming": {target: sorted(sources) for target, sources in incoming.items() if sources},
+        "broken": broken,
+    }
+    return dict(sorted(broken.items())), len(to_check)
@@ -1,32 +1,645 @@
+import argparse
 import os
 import shutil
+import sys
+import time
 
-from copy_static import copy_directory
-from generate_page import generate_page_recursive
+from assets import (
+    fingerprint_directory,
+    map_assets
+)
+from build_manifest import BuildManifest
+from build_report import BuildReport
+from compress import (
+    compress_outputs,
+    remove_compressed
+)
+from copy_static import (
+    sync_directory,
+    sync_file
+)
+from dev_server import (
+    DevSite,
+    serve
+)
+from generate_page import (
+    generate_page_recursive,
+    generate_pages,
+    page_template
+)
+from link_check import check_links
+from render_cache import RenderCache
+from search_index import (
+    remove_search_index,
+    update_search_index
+)
+from sharding import (
+    merge_shards,
+    parse_shard,
+    shard_name
+)
+from template import load_template
+from watch import (
+    create_watcher,
+    watch
+)
 
 
-def main():
-    # Source and Destination Directories
-    static_src_dir = os.path.join(os.path.dirname(__file__), "../static")
-    public_dest_dir = os.path.join(os.path.dirname(__file__), "../public")
-    content_src_dir = os.path.join(os.path.dirname(__file__), "../content")
-    template_src = os.path.join(os.path.dirname(__file__), "../template.html")
-    
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static site from markdown content.")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=("build", "serve", "merge"),
+        default="build",
+        help="build the site into the public directory (default), serve it from memory with "
+        "pages rendered on demand and live reload, or merge shard builds into the public directory",
+    )
+    parser.add_argument(
+        "shard_dirs",
+        nargs="*",
+        metavar="SHARD_DIR",
+        help="with merge, directories written by --shard builds, such as shards/1-of-4",
+    )
+    parser.add_argument(
+        "--shard",
+        metavar="I/N",
+        help="build only the I-th of N deterministic, size-balanced shards of the pages into "
+        "shards/I-of-N, with a partial manifest, for merging with the merge command",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="delete the public directory and rebuild every page, ignoring the build manifest",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes used to render pages, 0 uses every CPU (default: 1, serial)",
+    )
+    parser.add_argument(
+        "--io-workers",
+        type=int,
+        default=0,
+        help="overlap reading sources and writing pages with rendering, using N reader and N writer threads "
+        "(default: 0, pages are read, rendered and written one after another)",
+    )
+    parser.add_argument(
+        "--queue-depth",
+        type=int,
+        default=32,
+        help="with --io-workers, maximum pages waiting in each pipeline stage (default: 32)",
+    )
+    parser.add_argument(
+        "--stream-threshold",
+        type=int,
+        default=64,
+        help="stream markdown files of at least this many megabytes block by block instead of "
+        "loading them whole, bounding memory use (default: 64)",
+    )
+    parser.add_argument(
+        "--hash-static",
+        action="store_true",
+        help="compare static files by content hash rather than byte by byte when their size matches "
+        "but their mtime differs",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="copy static files to content-hashed names, write public/asset-manifest.json "
+        "and rewrite asset URLs in the template and in markdown links and images",
+    )
+    parser.add_argument(
+        "--search-index",
+        action="store_true",
+        help="write a client-side search index to public/search, sharded by term prefix "
+        "and updated incrementally as pages change",
+    )
+    parser.add_argument(
+        "--no-link-check",
+        action="store_true",
+        help="do not check that internal links and images point to a generated page or static file",
+    )
+    parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help="write a precompressed .gz file next to every HTML, CSS and other text output",
+    )
+    parser.add_argument(
+        "--gzip-level",
+        type=int,
+        default=9,
+        help="with --gzip, compression level from 1 (fastest) to 9 (smallest, default)",
+    )
+    parser.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="do not print a line for every generated page",
+    )
+    parser.add_argument(
+        "--no-render-cache",
+        action="store_true",
+        help="always parse markdown instead of reusing rendered HTML from the render cache",
+    )
+    parser.add_argument(
+        "--render-cache-size",
+        type=int,
+        default=256,
+        help="size in megabytes the render cache is trimmed to after each build (default: 256)",
+    )
+    parser.add_argument(
+        "--block-cache-size",
+        type=int,
+        default=4096,
+        help="number of rendered blocks each process keeps for reuse across pages, 0 disables (default: 4096)",
+    )
+    parser.add_argument(
+        "--report",
+        metavar="PATH",
+        help="write a JSON build report with per-stage and per-page timings to PATH",
+    )
+    parser.add_argument(
+        "--slowest",
+        type=int,
+        default=10,
+        help="number of slowest pages listed in the build report (default: 10)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="after building, watch content, static files and the template and rebuild what changes",
+    )
+    parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="with --watch, poll for changes instead of using inotify",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="with serve, address to listen on (default: 127.0.0.1)",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8888,
+        help="with serve, port to listen on (default: 8888)",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=16,
+        help="with serve, number of threads handling connections (default: 16)",
+    )
+    parser.add_argument(
+        "--no-live-reload",
+        action="store_true",
+        help="with serve, do not reload open pages when files change",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.1,
+        help="with --watch, seconds without events that end a burst of changes (default: 0.1)",
+    )
+    args = parser.parse_args(argv)
+    if args.shard is not None:
+        try:
+            args.shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(f"--shard: {e}")
+        if args.command != "build" or args.watch:
+            parser.error("--shard only applies to build without --watch")
+    if args.command == "merge" and not args.shard_dirs:
+        parser.error("merge needs at least one shard directory")
+    if args.command != "merge" and args.shard_dirs:
+        parser.error("shard directories are only accepted by merge")
+    if args.jobs < 0:
+        parser.error("--jobs must be 0 or a positive integer")
+    if args.stream_threshold < 0:
+        parser.error("--stream-threshold must not be negative")
+    if args.threads < 1:
+        parser.error("--threads must be a positive integer")
+    if not 1 <= args.gzip_level <= 9:
+        parser.error("--gzip-level must be between 1 and 9")
+    if args.io_workers < 0:
+        parser.error("--io-workers must not be negative")
+    if args.queue_depth < 1:
+        parser.error("--queue-depth must be a positive integer")
+    if args.render_cache_size < 0:
+        parser.error("--render-cache-size must not be negative")
+    if args.block_cache_size < 0:
+        parser.error("--block-cache-size must not be negative")
+    if args.jobs == 0:
+        args.jobs = os.cpu_count() or 1
+    return args
+
+
+def site_paths():
+    """
+    Collect the source, output and cache paths of the site.
+
+    :return:            A dictionary of absolute paths
+    """
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    return {
+        "static": os.path.join(root, "static"),
+        "public": os.path.join(root, "public"),
+        "content": os.path.join(root, "content"),
+        "template": os.path.join(root, "template.html"),
+        "manifest": os.path.join(root, ".build_cache", "manifest.json"),
+        "render_cache": os.path.join(root, ".build_cache", "render"),
+        "shards": os.path.join(root, "shards"),
+    }
+
+
+def page_options(args, paths, asset_map=None):
+    """
+    Collect the keyword arguments passed on to generate_page.
+
+    :param args:        Parsed command line arguments
+    :param paths:       Dictionary of site paths
+    :param asset_map:   AssetMap of fingerprinted static files, or None
+    :return:            A dictionary of generate_page keyword arguments
+    """
+    render_cache = None
+    if not args.no_render_cache:
+        render_cache = RenderCache(paths["render_cache"], max_bytes=args.render_cache_size * 1024 * 1024)
+    return {
+        "quiet": args.quiet,
+        "render_cache": render_cache,
+        "block_cache_size": args.block_cache_size,
+        "stream_threshold": args.stream_threshold * 1024 * 1024,
+        "asset_map": asset_map,
+    }
+
+
+def sync_static(args, paths, manifest, report=None):
+    """
+    Sync the static directory to the public directory, fingerprinting it with --fingerprint.
+
+    :param args:        Parsed command line arguments
+    :param paths:       Dictionary of site paths
+    :param manifest:    BuildManifest recording the synced files and cached asset hashes
+    :param report:      Optional BuildReport receiving the static timings
+    :return:            The AssetMap of fingerprinted files, or None without --fingerprint
+    """
+    asset_map = None
+    if args.shard is not None and args.shard[0] != 1:
+        # The first shard copies the static files, the others only need the asset names
+        if args.fingerprint:
+            asset_map = map_assets(paths["static"], manifest.asset_hashes, jobs=max(args.jobs, 4))
+        return asset_map
+    if args.fingerprint:
+        manifest.static_files, asset_map, static_stats = fingerprint_directory(
+            paths["static"],
+            paths["public"],
+            manifest.static_files,
+            hash_cache=manifest.asset_hashes,
+            jobs=max(args.jobs, 4),
+            report=report,
+        )
+    else:
+        manifest.static_files, static_stats = sync_directory(
+            paths["static"],
+            paths["public"],
+            manifest.static_files,
+            use_hash=args.hash_static,
+            jobs=max(args.jobs, 4),
+            report=report,
+        )
+    print_static_stats(static_stats)
+    return asset_map
+
+
+def trim_render_cache(options):
+    """
+    Evict the least recently used render cache entries beyond the size limit.
+
+    :param options:     Keyword arguments from page_options
+    """
+    if options["render_cache"] is not None:
+        removed = options["render_cache"].evict()
+        if removed:
+            print(f"Evicted {removed} render cache entries")
+
+
+def index_site(args, paths, manifest, replaced):
+    """
+    Update the search index with --search-index, or remove it without it.
+
+    :param args:        Parsed command line arguments
+    :param paths:       Dictionary of site paths
+    :param manifest:    BuildManifest holding the page facts and the search index state
+    :param replaced:    Previous manifest entries of the pages rebuilt, failed or deleted
+    """
+    if not args.search_index:
+        remove_search_index(paths["public"], manifest)
+        return
+
+    stats = update_search_index(paths["public"], manifest, replaced)
+    print(
+        f"Search index pages: {stats['pages']}, shards written: {stats['shards_written']}, "
+        f"removed: {stats['shards_removed']}"
+    )
+
+
+def check_site_links(args, manifest, replaced):
+    """
+    Report internal links to missing pages or files, unless --no-link-check is given.
+
+    :param args:        Parsed command line arguments
+    :param manifest:    BuildManifest holding the page links and the link graph
+    :param replaced:    Previous manifest entries of the pages rebuilt, failed or deleted
+    """
+    if args.no_link_check:
+        manifest.link_check = None
+        return
+
+    broken, checked = check_links(manifest, replaced)
+    count = sum(len(links) for links in broken.values())
+    print(f"Links checked on {checked} page(s), broken links: {count}")
+    if broken:
+        print(f"{count} broken internal link(s):", file=sys.stderr)
+        for source, links in broken.items():
+            for link in links:
+                print(f"  {source}: {link}", file=sys.stderr)
+
+
+def compress_site(args, paths, manifest, report=None):
+    """
+    Write .gz files next to changed text outputs with --gzip, or remove them without it.
+
+    :param args:        Parsed command line arguments
+    :param paths:       Dictionary of site paths
+    :param manifest:    BuildManifest recording the compressed files
+    :param report:      Optional BuildReport receiving the compression timings
+    """
+    if not args.gzip:
+        for relative_path in sorted(manifest.compressed_files):
+            remove_compressed(paths["public"], relative_path)
+        manifest.compressed_files = {}
+        return
+
+    start = time.perf_counter()
+    stats = compress_outputs(
+        paths["public"], manifest.compressed_files, level=args.gzip_level, jobs=max(args.jobs, 4)
+    )
+    if report is not None:
+        report.add_compress(time.perf_counter() - start, stats["bytes_read"], stats["bytes_written"])
+    print(f"Files compressed: {stats['compressed']}, unchanged: {stats['unchanged']}, removed: {stats['removed']}")
+
+
+def report_errors(errors):
+    """
+    Print the pages that failed to generate.
+
+    :param errors:      List of (source, error) pairs
+    """
+    print(f"{len(errors)} page(s) failed to generate:", file=sys.stderr)
+    for source, error in errors:
+        print(f"  {source}: {error}", file=sys.stderr)
+
+
+def print_page_stats(stats):
+    print(f"Pages rebuilt: {stats['rebuilt']}, skipped: {stats['skipped']}, deleted: {stats['deleted']}")
+    if stats["unchanged_outputs"]:
+        print(f"Rebuilt pages with identical output left untouched: {stats['unchanged_outputs']}")
+    if stats["render_cache_hits"] or stats["render_cache_misses"]:
+        print(f"Render cache hits: {stats['render_cache_hits']}, misses: {stats['render_cache_misses']}")
+    if stats["block_cache_hits"] or stats["block_cache_misses"]:
+        print(f"Block cache hits: {stats['block_cache_hits']}, misses: {stats['block_cache_misses']}")
+
+
+def print_static_stats(stats):
+    print(f"Static files copied: {stats['copied']}, unchanged: {stats['unchanged']}, removed: {stats['removed']}")
+
+
+def build(args, paths, manifest):
+    """
+    Sync static files and generate every page that changed since the last build.
+
+    :param args:        Parsed command line arguments
+    :param paths:       Dictionary of site paths
+    :param manifest:    BuildManifest of the previous build, updated and saved
+    :return:            The list of (source, error) pairs of pages that failed
+    """
+    report = BuildReport() if args.report else None
+
+    # Sync new and changed static files to public directory
+    print("Syncing static files to public directory...")
+    asset_map = sync_static(args, paths, manifest, report)
+
+    # Generate HTML pages from markdown content that changed since the last build
+    print("Generating pages...")
+    options = page_options(args, paths, asset_map)
+    stats = generate_page_recursive(
+        paths["content"],
+        paths["template"],
+        paths["public"],
+        manifest,
+        jobs=args.jobs,
+        report=report,
+        io_workers=args.io_workers,
+        queue_depth=args.queue_depth,
+        shard=args.shard,
+        **options,
+    )
+    print_page_stats(stats)
+    trim_render_cache(options)
+
+    # Links and the search index span every shard, merge handles them
+    if args.shard is None:
+        check_site_links(args, manifest, stats["replaced"])
+        index_site(args, paths, manifest, stats["replaced"])
+    compress_site(args, paths, manifest, report)
+    manifest.save()
+
+    if report is not None:
+        report.save(args.report, slowest=args.slowest)
+        print(f"Build report written to {args.report}")
+    return stats["errors"]
+
+
+def merge(args, paths, manifest):
+    """
+    Combine shard builds into the public directory, then check links and index the whole site.
+
+    :param args:        Parsed command line arguments
+    :param paths:       Dictionary of site paths
+    :param manifest:    BuildManifest of the previous merge or build, updated and saved
+    """
+    print(f"Merging {len(args.shard_dirs)} shard build(s)...")
+    try:
+        replaced, stats = merge_shards(args.shard_dirs, paths["public"], manifest)
+    except ValueError as e:
+        print(f"Cannot merge the shards: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Files copied: {stats['copied']}, unchanged: {stats['unchanged']}, removed: {stats['removed']}")
+
+    check_site_links(args, manifest, replaced)
+    index_site(args, paths, manifest, replaced)
+    compress_site(args, paths, manifest)
+    manifest.save()
+
+
+def rebuild_changed(changed, args, paths, manifest):
+    """
+    Rebuild only the outputs affected by a set of changed paths.
+
+    A markdown edit regenerates its page and a static edit syncs its file.
+    A template or partial edit regenerates every page. Changes to whole
+    directories fall back to an incremental scan of that tree.
+
+    :param changed:     Set of absolute paths reported by the watcher
+    :param args:        Parsed command line arguments
+    :param paths:       Dictionary of site paths
+    :param manifest:    BuildManifest of the previous build, updated and saved
+    :return:            The list of (source, error) pairs of pages that failed
+    """
+    content_root = paths["content"] + os.sep
+    static_root = paths["static"] + os.sep
+    markdown_files = set()
+    static_files = set()
+    rescan_content = False
+    rescan_static = False
+
+    for path in changed:
+        if path.startswith(content_root):
+            if path.endswith(".md") and not os.path.isdir(path):
+                markdown_files.add(path)
+            elif os.path.isdir(path) or not os.path.exists(path):
+                rescan_content = True
+        elif path.startswith(static_root):
+            if os.path.isdir(path) or (not os.path.exists(path) and not os.path.splitext(path)[1]):
+                rescan_static = True
+            else:
+                static_files.add(os.path.relpath(path, paths["static"]))
+        elif path == paths["content"]:
+            rescan_content = True
+        elif path == paths["static"]:
+            rescan_static = True
+
+    asset_map = None
+    if args.fingerprint:
+        # Cached hashes make a full pass cheap, and every page may link to a renamed asset
+        asset_map = sync_static(args, paths, manifest)
+    elif rescan_static:
+        sync_static(args, paths, manifest)
+    else:
+        for relative_path in sorted(static_files):
+            action = sync_file(paths["static"], paths["public"], relative_path, manifest.static_files)
+            if action is not None:
+                print(f"Static file {action}: {relative_path}")
+
+    try:
+        template_changed = page_template(paths["template"], asset_map).digest != manifest.template_hash
+    except (OSError, ValueError) as e:
+        print(f"Template error: {e}", file=sys.stderr)
+        return []
+
+    options = page_options(args, paths, asset_map)
+    if template_changed or rescan_content:
+        stats = generate_page_recursive(
+            paths["content"],
+            paths["template"],
+            paths["public"],
+            manifest,
+            jobs=args.jobs,
+            io_workers=args.io_workers,
+            queue_depth=args.queue_depth,
+            **options,
+        )
+    else:
+        stats = generate_pages(
+            paths["content"], markdown_files, paths["template"], paths["public"], manifest, **options
+        )
+
+    print_page_stats(stats)
+    trim_render_cache(options)
+    check_site_links(args, manifest, stats["replaced"])
+    index_site(args, paths, manifest, stats["replaced"])
+    compress_site(args, paths, manifest)
+    manifest.save()
+    return stats["errors"]
+
+
+def watch_and_rebuild(args, paths, manifest):
+    """
+    Watch the content, static and template files and rebuild what changes.
+
+    :param args:        Parsed command line arguments
+    :param paths:       Dictionary of site paths
+    :param manifest:    BuildManifest kept up to date between rebuilds
+    """
+    def on_change(changed):
+        print(f"Detected {len(changed)} change(s), rebuilding...")
+        errors = rebuild_changed(changed, args, paths, manifest)
+        if errors:
+            report_errors(errors)
+        # Partials may have been added or removed, so follow the template's current files
+        watcher.add_files(template_files())
+
+    def template_files():
+        try:
+            return set(load_template(paths["template"]).files)
+        except (OSError, ValueError):
+            return {paths["template"]}
+
+    watcher = create_watcher([paths["content"], paths["static"]], template_files(), polling=args.poll)
+    print(f"Watching for changes with {type(watcher).__name__}, press Ctrl+C to stop...")
+    try:
+        watch(watcher, on_change, debounce=args.debounce)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = site_paths()
+
+    if args.command == "serve":
+        site = DevSite(paths, page_options(args, paths), live_reload=not args.no_live_reload)
+        serve(site, args.host, args.port, workers=args.threads, polling=args.poll, quiet=args.quiet)
+        return
+
+    if args.shard is not None:
+        shard_path = os.path.join(paths["shards"], shard_name(*args.shard))
+        paths = dict(
+            paths,
+            public=os.path.join(shard_path, "public"),
+            manifest=os.path.join(shard_path, "manifest.json"),
+        )
+
     # Delete public directory if it exists for a clean build
-    print("Deleting public directory...")
-    if os.path.exists(public_dest_dir):
-        shutil.rmtree(public_dest_dir)
+    if args.full:
+        print("Deleting public directory...")
+        if os.path.exists(paths["public"]):
+            shutil.rmtree(paths["public"])
+        manifest = BuildManifest(paths["manifest"])
+    else:
+        manifest = BuildManifest.load(paths["manifest"])
+
+    if args.command == "merge":
+        merge(args, paths, manifest)
+        return
 
-    # Copy static files to public directory
-    print("Copying static files to public directory...")
-    copy_directory(static_src_dir, public_dest_dir)
+    errors = build(args, paths, manifest)
+    if errors:
+        report_errors(errors)
 
-    # Generate HTML page from markdown content
-    print("Generating page...")
-    generate_page_recursive(content_src_dir, template_src, public_dest_dir)
+    if args.watch:
+        watch_and_rebuild(args, paths, manifest)
+    elif errors:
+        sys.exit(1)
 
 
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
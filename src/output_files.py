@@ -0,0 +1,187 @@
+import os
+import shutil
+import threading
+
+
+
+
+def remove_output(dest_dir_path, output):
+    """
+    Delete a generated file and any directories left empty by its removal.
+
+    :param dest_dir_path:           Path to the destination directory
+    :param output:                  Path of the file relative to the destination directory
+    """
+    output_path = os.path.join(dest_dir_path, output)
+    if os.path.exists(output_path):
+        os.remove(output_path)
+
+    parent = os.path.dirname(output_path)
+    while (
+        os.path.normpath(parent) != os.path.normpath(dest_dir_path)
+        and os.path.isdir(parent)
+        and not os.listdir(parent)
+    ):
+        os.rmdir(parent)
+        parent = os.path.dirname(parent)
+
+
+
+
+def _temp_path(path):
+    """
+    Name a temporary file next to path, unique to this process and thread.
+    """
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+
+
+def _open_temp(path, mode, **kwargs):
+    """
+    Open a temporary file, creating its directory only when it is missing.
+
+    Most outputs go to directories that already exist, so this saves a
+    makedirs call, and its stat, per file written.
+    """
+    try:
+        return open(path, mode, **kwargs)
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        return open(path, mode, **kwargs)
+
+
+
+
+def files_identical(path_a, path_b, chunk_size=1024 * 1024):
+    """
+    Check whether two files have the same bytes, comparing sizes first.
+
+    :param path_a:                  Path of the first file
+    :param path_b:                  Path of the second file, which may not exist
+    :param chunk_size:              Bytes compared at a time
+    :return:                        True if both files exist and are identical
+    """
+    try:
+        if os.path.getsize(path_a) != os.path.getsize(path_b):
+            return False
+    except FileNotFoundError:
+        return False
+    with open(path_a, "rb") as a, open(path_b, "rb") as b:
+        while True:
+            chunk = a.read(chunk_size)
+            if chunk != b.read(chunk_size):
+                return False
+            if not chunk:
+                return True
+
+
+
+
+def write_if_changed(path, data):
+    """
+    Write bytes to a file unless it already holds exactly those bytes.
+
+    Changed files are written to a temporary file and renamed over the old one,
+    so readers never see a partially written file. Unchanged files keep their
+    modification time, so sync tools and caches do not treat them as new.
+
+    :param path:                    Path of the output file
+    :param data:                    The complete file content as bytes
+    :return:                        True if the file was written, False if it was unchanged
+    """
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, "rb") as f:
+                if f.read() == data:
+                    return False
+    except FileNotFoundError:
+        pass
+
+    temp_path = _temp_path(path)
+    try:
+        with _open_temp(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return True
+
+
+
+
+class AtomicOutput:
+    def __init__(self, path, binary=False):
+        """
+        Initialize an AtomicOutput, a context manager for streaming a file into place.
+
+        The content is written to a temporary file next to path. On success it
+        replaces path unless both are identical, in which case path is left
+        untouched. On error the temporary file is deleted and path is unchanged.
+        Afterwards, changed tells whether path was replaced and bytes_written
+        its new size, or 0 when it was left untouched, like write_page.
+
+        :param path:                Path of the output file
+        :param binary:              Open the file for bytes instead of UTF-8 text
+        """
+        self.path = path
+        self.binary = binary
+        self.temp_path = _temp_path(path)
+        self.file = None
+        self.changed = None
+        self.bytes_written = 0
+
+    def __enter__(self):
+        """
+        Open the temporary file for writing.
+
+        :return:                    The open file object
+        """
+        if self.binary:
+            self.file = _open_temp(self.temp_path, "wb")
+        else:
+            self.file = _open_temp(self.temp_path, "w", encoding="utf-8")
+        return self.file
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Move the temporary file into place, or discard it.
+        """
+        self.file.close()
+        if exc_type is not None:
+            os.remove(self.temp_path)
+            return False
+
+        self.changed = not files_identical(self.temp_path, self.path)
+        if self.changed:
+            self.bytes_written = os.path.getsize(self.temp_path)
+            os.replace(self.temp_path, self.path)
+        else:
+            os.remove(self.temp_path)
+        return False
+
+
+
+
+def copy_atomic(source_path, dest_path):
+    """
+    Copy a file with its metadata through a temporary file renamed into place.
+
+    :param source_path:             Path of the file to copy
+    :param dest_path:               Path of the copy
+    """
+    temp_path = _temp_path(dest_path)
+    try:
+        try:
+            shutil.copy2(source_path, temp_path)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+            shutil.copy2(source_path, temp_path)
+        os.replace(temp_path, dest_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
@@ -0,0 +1,83 @@
+import re
+from collections import Counter
+
+
+
+
+# Words indexed for search: runs of letters and digits, 2 to 40 characters long
+term_pattern = re.compile(r"[^\W_]{2,40}")
+
+
+
+
+def tokenize(text):
+    """
+    Split text into lowercase search terms.
+
+    :param text:            Plain text
+    :return:                A list of terms, in order and with repetitions
+    """
+    return term_pattern.findall(text.lower())
+
+
+
+
+def node_facts(node):
+    """
+    Collect the search terms and link targets of an HTML node tree.
+
+    Text comes from leaf values and image alt texts, link targets from href
+    and src attributes, which is where the inline TextNodes of a block end up.
+
+    :param node:            An HTMLNode, typically the node of one block
+    :return:                A (terms, links) tuple, terms mapping each term to its count
+                            and links listing the URLs in document order
+    """
+    texts = []
+    links = []
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node.children:
+            stack.extend(reversed(node.children))
+            continue
+        if node.value:
+            texts.append(node.value)
+        if node.props:
+            for key in ("href", "src"):
+                url = node.props.get(key)
+                if url is not None:
+                    links.append(url)
+            if node.props.get("alt"):
+                texts.append(node.props["alt"])
+    return dict(Counter(tokenize(" ".join(texts)))), links
+
+
+
+
+class PageFacts:
+    def __init__(self):
+        """
+        Initialize an empty PageFacts object, accumulating what a page contains block by block.
+        """
+        self.terms = Counter()
+        self.links = []
+
+    def add(self, terms, links):
+        """
+        Add the facts of one block.
+
+        :param terms:       Dictionary mapping terms to counts
+        :param links:       List of link and image URLs
+        """
+        self.terms.update(terms)
+        self.links.extend(links)
+
+    def to_dict(self, title):
+        """
+        Summarize the page as a JSON-serializable dictionary.
+
+        :param title:       The page title
+        :return:            A dict with the title, term counts and sorted unique links
+        """
+        return {"title": title, "terms": dict(self.terms), "links": sorted(set(self.links))}
@@ -0,0 +1,32 @@
+from collections import deque
+
+
+
+
+def bounded_map(executor, function, items, depth):
+    """
+    Lazily map a function over items on an executor, yielding results in order.
+
+    At most depth calls are in flight at once, and the next item is only pulled
+    from items when a slot frees up. Chaining several bounded_map generators
+    therefore overlaps their stages while keeping the memory held between
+    stages capped. Without an executor the function runs inline.
+
+    :param executor:        A concurrent.futures executor, or None to run inline
+    :param function:        Callable applied to each item's arguments
+    :param items:           Iterable of argument tuples
+    :param depth:           Maximum number of calls submitted but not yet yielded
+    :return:                A generator of function results, in the order of items
+    """
+    if executor is None:
+        for item in items:
+            yield function(*item)
+        return
+
+    pending = deque()
+    for item in items:
+        if len(pending) >= depth:
+            yield pending.popleft().result()
+        pending.append(executor.submit(function, *item))
+    while pending:
+        yield pending.popleft().result()
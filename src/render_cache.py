@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import threading
+
+from block_markdown import PARSER_VERSION
+
+
+
+
+class RenderCache:
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        """
+        Initialize a RenderCache storing rendered article HTML on disk.
+
+        Entries are keyed by the markdown content hash and the parser version,
+        so a page whose markdown is unchanged is only re-wrapped in the template.
+        The object holds no open state and can be passed to worker processes.
+
+        :param directory:       Directory holding the cache entries
+        :param max_bytes:       Total size the cache is trimmed to by evict()
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, markdown, variant=""):
+        """
+        Compute the cache key of a markdown document.
+
+        :param markdown:        The raw markdown text
+        :param variant:         Extra text identifying other rendering inputs, such as
+                                the digest of the asset map used to rewrite URLs
+        :return:                The hex digest identifying the rendered output
+        """
+        digest = hashlib.sha256(PARSER_VERSION.encode())
+        digest.update(b"\0")
+        digest.update(variant.encode())
+        digest.update(b"\0")
+        digest.update(markdown.encode())
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key):
+        """
+        Look up a rendered page, marking it as recently used.
+
+        :param key:             Key returned by key()
+        :return:                An (html, title, terms, links) tuple, or None on a miss
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return entry["html"], entry["title"], entry["terms"], entry["links"]
+
+    def put(self, key, html, title, terms, links):
+        """
+        Store a rendered page, replacing any previous entry atomically.
+
+        :param key:             Key returned by key()
+        :param html:            The rendered article HTML
+        :param title:           The page title extracted from the markdown
+        :param terms:           Dictionary mapping the page's search terms to their counts
+        :param links:           List of the link and image URLs of the page
+        """
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique per thread too, as dev server threads may store the same page at once
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"html": html, "title": title, "terms": terms, "links": links}, f)
+        os.replace(temp_path, path)
+
+    def evict(self):
+        """
+        Delete the least recently used entries until the cache fits in max_bytes.
+
+        :return:                The number of entries removed
+        """
+        entries = []
+        total = 0
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, path, stat.st_size))
+                total += stat.st_size
+
+        removed = 0
+        for _, path, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
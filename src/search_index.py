@@ -0,0 +1,193 @@
+import json
+import os
+
+from output_files import (
+    remove_output,
+    write_if_changed
+)
+
+
+
+
+# Directory of the search index inside the destination directory
+search_directory = "search"
+
+# File listing the indexed pages and the shards that exist
+search_index_name = "index.json"
+
+# Number of leading characters of a term that select its shard
+shard_prefix_length = 2
+
+
+
+
+def shard_name(term):
+    """
+    Compute the name of the shard holding a term.
+
+    Terms are lowercase letters and digits, so ASCII prefixes are used as is
+    and other prefixes are hex encoded, which keeps file names portable.
+
+    :param term:            A term returned by page_facts.tokenize
+    :return:                The shard name, without extension
+    """
+    prefix = term[:shard_prefix_length]
+    return prefix if prefix.isascii() else prefix.encode("utf-8").hex()
+
+
+
+
+def page_url(output):
+    """
+    Compute the URL path of a generated page.
+
+    :param output:          Output path relative to the destination directory
+    :return:                The URL path, ending with a slash for index pages
+    """
+    url = "/" + output.replace(os.sep, "/")
+    if url.endswith("/index.html"):
+        url = url[:-len("index.html")]
+    return url
+
+
+
+
+def _dump(data):
+    return json.dumps(data, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+
+
+def _load_shard(path, shard, manifest, page_ids):
+    """
+    Read the postings of a shard, or collect them from the given pages if the file is unreadable.
+    """
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+    postings = {}
+    for source, page_id in page_ids.items():
+        for term, count in manifest.pages[source].get("terms", {}).items():
+            if shard_name(term) == shard:
+                postings.setdefault(term, []).append([page_id, count])
+    return postings
+
+
+
+
+def update_search_index(dest_path, manifest, replaced):
+    """
+    Bring the sharded search index up to date with the pages of the manifest.
+
+    The index is a JSON file mapping page ids to URLs and titles, plus one
+    shard per term prefix mapping each term to [page id, count] postings,
+    most frequent first. Clients only download the shards of the terms they
+    look up. Only the shards holding old or new terms of the replaced pages
+    are read and rewritten, and unchanged files are left untouched.
+
+    :param dest_path:       The destination directory path
+    :param manifest:        BuildManifest whose page entries hold titles and terms, and whose
+                            search_index state of the previous update is replaced
+    :param replaced:        Dictionary mapping the sources rebuilt, failed or deleted since the
+                            last update to their previous manifest entry, or None for new pages
+    :return:                A dict with the indexed page count and the written and removed shard counts
+    """
+    search_path = os.path.join(dest_path, search_directory)
+    state = manifest.search_index
+    full = state is None
+    if full:
+        state = {"ids": {}, "next_id": 0, "shards": []}
+        changed = set(manifest.pages)
+        replaced = {}
+    else:
+        changed = set(replaced)
+
+    # Page ids are stable, so a page change only touches the shards of its own terms
+    ids = state["ids"]
+    for source in sorted(changed):
+        if source in manifest.pages and source not in ids:
+            ids[source] = state["next_id"]
+            state["next_id"] += 1
+    changed_ids = {ids[source] for source in changed if source in ids}
+
+    additions = {}
+    for source in changed:
+        entry = manifest.pages.get(source)
+        if entry is None:
+            continue
+        for term, count in entry.get("terms", {}).items():
+            additions.setdefault(shard_name(term), {}).setdefault(term, []).append([ids[source], count])
+    affected = set(additions)
+    for entry in replaced.values():
+        if entry is not None:
+            affected.update(shard_name(term) for term in entry.get("terms", ()))
+
+    for source in [source for source in ids if source not in manifest.pages]:
+        del ids[source]
+    unchanged_pages = {source: page_id for source, page_id in ids.items() if page_id not in changed_ids}
+
+    stats = {"pages": len(ids), "shards_written": 0, "shards_removed": 0}
+    shards = set(state["shards"])
+    for shard in sorted(affected):
+        shard_path = os.path.join(search_path, f"{shard}.json")
+        if full or shard not in shards:
+            postings = {}
+        else:
+            postings = _load_shard(shard_path, shard, manifest, unchanged_pages)
+
+        for term in list(postings):
+            postings[term] = [posting for posting in postings[term] if posting[0] not in changed_ids]
+        for term, term_postings in additions.get(shard, {}).items():
+            postings.setdefault(term, []).extend(term_postings)
+        postings = {
+            term: sorted(term_postings, key=lambda posting: (-posting[1], posting[0]))
+            for term, term_postings in postings.items()
+            if term_postings
+        }
+
+        if postings:
+            if write_if_changed(shard_path, _dump(postings)):
+                stats["shards_written"] += 1
+            shards.add(shard)
+        elif shard in shards:
+            remove_output(dest_path, os.path.join(search_directory, f"{shard}.json"))
+            shards.discard(shard)
+            stats["shards_removed"] += 1
+
+    pages = {
+        str(page_id): [page_url(manifest.pages[source]["output"]), manifest.pages[source].get("title")]
+        for source, page_id in ids.items()
+    }
+    index = {"prefix_length": shard_prefix_length, "pages": pages, "shards": sorted(shards)}
+    write_if_changed(os.path.join(search_path, search_index_name), _dump(index))
+
+    if full:
+        # Files left by an index whose state was lost would never be updated again
+        expected = {f"{shard}.json" for shard in shards} | {search_index_name}
+        for name in sorted(os.listdir(search_path)):
+            if name not in expected and name.endswith(".json"):
+                remove_output(dest_path, os.path.join(search_directory, name))
+
+    state["shards"] = sorted(shards)
+    manifest.search_index = state
+    return stats
+
+
+
+
+def remove_search_index(dest_path, manifest):
+    """
+    Delete the files of the search index and forget its state.
+
+    :param dest_path:       The destination directory path
+    :param manifest:        BuildManifest whose search_index state is cleared
+    """
+    if manifest.search_index is None:
+        return
+    names = [f"{shard}.json" for shard in manifest.search_index["shards"]] + [search_index_name]
+    for name in names:
+        if os.path.exists(os.path.join(dest_path, search_directory, name)):
+            remove_output(dest_path, os.path.join(search_directory, name))
+    manifest.search_index = None
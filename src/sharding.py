@@ -0,0 +1,171 @@
+import hashlib
+import heapq
+import os
+
+from build_manifest import BuildManifest
+from output_files import (
+    copy_atomic,
+    files_identical,
+    remove_output
+)
+
+
+
+
+# Weight added to every page on top of its size, so that many tiny pages still spread out
+page_weight = 4096
+
+
+
+
+def parse_shard(text):
+    """
+    Parse a shard specification such as "2/4".
+
+    :param text:            The shard index and count separated by a slash, the index starting at 1
+    :return:                An (index, count) tuple
+    :raise ValueError:      If the text is malformed or the index is out of range
+    """
+    index, separator, count = text.partition("/")
+    if not separator or not index.isdigit() or not count.isdigit():
+        raise ValueError(f"expected i/N, got {text!r}")
+    index, count = int(index), int(count)
+    if not 1 <= index <= count:
+        raise ValueError(f"shard index must be between 1 and {count}, got {index}")
+    return index, count
+
+
+
+
+def shard_name(index, count):
+    """
+    Name the directory a shard is built into.
+
+    :param index:           Shard index, starting at 1
+    :param count:           Number of shards
+    :return:                The directory name, such as "2-of-4"
+    """
+    return f"{index}-of-{count}"
+
+
+
+
+def assign_shards(sizes, count):
+    """
+    Deterministically split pages across shards, balancing their total size.
+
+    Pages are taken from the largest to the smallest, ties broken by a hash of
+    their path, and each goes to the shard with the least weight so far. Every
+    machine listing the same content tree computes the same assignment.
+
+    :param sizes:           Dictionary mapping source paths to their size in bytes
+    :param count:           Number of shards
+    :return:                Dictionary mapping each source path to its shard index, starting at 1
+    """
+    order = sorted(sizes, key=lambda source: (-sizes[source], hashlib.sha256(source.encode()).hexdigest()))
+    loads = [(0, index) for index in range(1, count + 1)]
+    assignment = {}
+    for source in order:
+        load, index = heapq.heappop(loads)
+        assignment[source] = index
+        heapq.heappush(loads, (load + sizes[source] + page_weight, index))
+    return assignment
+
+
+
+
+def manifest_files(manifest):
+    """
+    List the pages and static files of a manifest, with their .gz siblings.
+
+    Files written after the pages, such as the search index, are not included.
+
+    :param manifest:        A BuildManifest
+    :return:                Set of paths relative to the destination directory
+    """
+    files = {entry["output"] for entry in manifest.pages.values()}
+    files.update(manifest.static_files)
+    files.update(f"{path}.gz" for path in manifest.compressed_files if path in files)
+    return files
+
+
+
+
+def merge_shards(shard_paths, dest_path, manifest):
+    """
+    Combine the outputs and partial manifests of shard builds into one site.
+
+    Files identical to the existing output are not copied again, and outputs of
+    the previous merge that no shard produced anymore are removed. The search
+    index and link check states of manifest are kept, so they can be updated
+    incrementally from the returned replaced entries.
+
+    :param shard_paths:     Directories of the shard builds, each with a public directory
+                            and a manifest.json
+    :param dest_path:       The destination directory path
+    :param manifest:        BuildManifest of the previous merge, updated in place
+    :return:                A (replaced, stats) tuple, replaced mapping every added, changed
+                            or removed source to its previous entry, and stats holding the
+                            copied, unchanged and removed file counts
+    :raise ValueError:      If a shard has no manifest, shards used different templates
+                            or several shards built the same page
+    """
+    stats = {"copied": 0, "unchanged": 0, "removed": 0}
+    previous_files = manifest_files(manifest)
+    previous_pages = manifest.pages
+    pages = {}
+    static_files = set()
+    compressed_files = {}
+    template_hashes = set()
+
+    shards = []
+    for shard_path in shard_paths:
+        manifest_path = os.path.join(shard_path, "manifest.json")
+        if not os.path.isfile(manifest_path):
+            raise ValueError(f"{shard_path} has no manifest.json, it is not a shard build")
+        shard_manifest = BuildManifest.load(manifest_path)
+        overlap = set(pages) & set(shard_manifest.pages)
+        if overlap:
+            raise ValueError(f"pages built by several shards: {', '.join(sorted(overlap))}")
+        pages.update(shard_manifest.pages)
+        static_files.update(shard_manifest.static_files)
+        compressed_files.update(shard_manifest.compressed_files)
+        manifest.asset_hashes.update(shard_manifest.asset_hashes)
+        if shard_manifest.pages:
+            template_hashes.add(shard_manifest.template_hash)
+        shards.append((os.path.join(shard_path, "public"), shard_manifest))
+    if len(template_hashes) > 1:
+        raise ValueError("shards were built with different templates")
+
+    for public_path, shard_manifest in shards:
+        for relative_path in sorted(manifest_files(shard_manifest)):
+            source_item = os.path.join(public_path, relative_path)
+            dest_item = os.path.join(dest_path, relative_path)
+            if os.path.isfile(dest_item) and files_identical(source_item, dest_item):
+                stats["unchanged"] += 1
+                continue
+            copy_atomic(source_item, dest_item)
+            stats["copied"] += 1
+
+    manifest.template_hash = template_hashes.pop() if template_hashes else manifest.template_hash
+    manifest.pages = pages
+    manifest.static_files = sorted(static_files)
+    # Compressed files the shards do not own, such as the search index, stay with the merge
+    shard_files = {entry["output"] for entry in pages.values()} | static_files
+    compressed_files.update(
+        (path, entry) for path, entry in manifest.compressed_files.items()
+        if path not in shard_files and path not in previous_files
+    )
+    manifest.compressed_files = compressed_files
+
+    for relative_path in sorted(previous_files - manifest_files(manifest)):
+        if os.path.exists(os.path.join(dest_path, relative_path)):
+            remove_output(dest_path, relative_path)
+        stats["removed"] += 1
+
+    replaced = {
+        source: previous_pages.get(source)
+        for source in set(previous_pages) | set(pages)
+        if previous_pages.get(source) != pages.get(source)
+    }
+    return replaced, stats
@@ -0,0 +1,166 @@
+import hashlib
+import os
+import re
+
+
+
+
+# Matches "{{ Name }}" placeholders and "{{> path }}" partial includes
+placeholder_pattern = re.compile(r"\{\{\s*(>)?\s*([^{}]+?)\s*\}\}")
+
+# Compiled templates keyed by absolute path, with the file signatures they were built from
+_template_cache = {}
+
+
+
+
+class Template:
+    def __init__(self, segments, digest, files):
+        """
+        Initialize a compiled Template object.
+
+        :param segments:    Tuple of static strings and (name, placeholder) pairs
+        :param digest:      Hash of the template and every partial it includes
+        :param files:       Tuple of every file the template was compiled from
+        """
+        self.segments = segments
+        self.digest = digest
+        self.files = files
+
+    def render(self, values):
+        """
+        Render the template to a string.
+
+        :param values:      Dictionary mapping placeholder names to text or HTML nodes
+        :return:            The rendered string
+        """
+        parts = []
+        self.render_to(parts.append, values)
+        return "".join(parts)
+
+    def render_to(self, write, values):
+        """
+        Render the template segment by segment through a write callable.
+
+        Placeholders without a value are written back unchanged, and values that
+        are HTML nodes are streamed through their render_to method.
+
+        :param write:       Callable accepting each string chunk (e.g. a file's write method)
+        :param values:      Dictionary mapping placeholder names to text or HTML nodes
+        """
+        for segment in self.segments:
+            if segment.__class__ is str:
+                write(segment)
+            else:
+                name, placeholder = segment
+                value = values.get(name, placeholder)
+                if value.__class__ is str:
+                    write(value)
+                else:
+                    value.render_to(write)
+
+    def __repr__(self):
+        """
+        Provide a string representation of the Template object.
+        """
+        return f"Template(segments={self.segments!r}, digest={self.digest!r})"
+
+
+
+
+def compile_template(path, _including=()):
+    """
+    Compile a template file into static and dynamic segments.
+
+    Partials included with "{{> path }}" are resolved relative to the including
+    file and inlined once at compile time, so every page reuses the result.
+
+    :param path:            Path to the HTML template file
+    :return:                A Template object
+    """
+    path = os.path.abspath(path)
+    if path in _including:
+        raise ValueError(f"Invalid template: Partial {path} includes itself")
+
+    with open(path, "r") as f:
+        text = f.read()
+
+    segments = []
+    digest = hashlib.sha256(text.encode())
+    files = [path]
+    position = 0
+
+    for match in placeholder_pattern.finditer(text):
+        segments.append(text[position:match.start()])
+        position = match.end()
+
+        is_partial, name = match.groups()
+        if is_partial:
+            partial_path = os.path.join(os.path.dirname(path), name)
+            partial = compile_template(partial_path, _including + (path,))
+            segments.extend(partial.segments)
+            digest.update(partial.digest.encode())
+            files.extend(partial.files)
+        else:
+            segments.append((name, match.group(0)))
+
+    segments.append(text[position:])
+    return Template(_merge_static_segments(segments), digest.hexdigest(), tuple(files))
+
+
+
+
+def _merge_static_segments(segments):
+    """
+    Join neighbouring static strings and drop empty ones.
+
+    :param segments:        List of static strings and (name, placeholder) pairs
+    :return:                A tuple of merged segments
+    """
+    merged = []
+    for segment in segments:
+        if segment.__class__ is str:
+            if not segment:
+                continue
+            if merged and merged[-1].__class__ is str:
+                merged[-1] += segment
+                continue
+        merged.append(segment)
+    return tuple(merged)
+
+
+
+
+def _file_signature(files):
+    """
+    Build a cheap change signature from the size and mtime of each file.
+    """
+    signature = []
+    for path in files:
+        stat = os.stat(path)
+        signature.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+
+
+def load_template(path):
+    """
+    Load a compiled template, reusing the cached copy while its files are unchanged.
+
+    :param path:            Path to the HTML template file
+    :return:                A Template object
+    """
+    path = os.path.abspath(path)
+    cached = _template_cache.get(path)
+    if cached is not None:
+        signature, template = cached
+        try:
+            if _file_signature(template.files) == signature:
+                return template
+        except OSError:
+            pass
+
+    template = compile_template(path)
+    _template_cache[path] = (_file_signature(template.files), template)
+    return template
@@ -0,0 +1,119 @@
+import json
+import os
+import tempfile
+import unittest
+
+from assets import (
+    AssetMap,
+    asset_manifest_name,
+    fingerprint_directory,
+    fingerprinted_path,
+    hash_assets,
+    map_assets
+)
+from block_markdown import (
+    markdown_to_html_node,
+    parse_markdown
+)
+from template import Template
+
+
+
+
+class TestAssetMap(unittest.TestCase):
+
+    def setUp(self):
+        self.asset_map = AssetMap({
+            "index.css": "index.0123456789.css",
+            os.path.join("images", "logo.png"): os.path.join("images", "logo.abcdef0123.png"),
+        })
+
+    # Test fingerprinted path - hash goes before the extension
+    def test_fingerprinted_path(self):
+        self.assertEqual(fingerprinted_path("images/logo.png", "abcdef0123456789"), "images/logo.abcdef0123.png")
+        self.assertEqual(fingerprinted_path("LICENSE", "abcdef0123456789"), "LICENSE.abcdef0123")
+
+    # Test rewrite url - assets, queries, fragments and other URLs
+    def test_rewrite_url(self):
+        self.assertEqual(self.asset_map.rewrite_url("/index.css"), "/index.0123456789.css")
+        self.assertEqual(self.asset_map.rewrite_url("/images/logo.png?v=2#top"), "/images/logo.abcdef0123.png?v=2#top")
+        self.assertEqual(self.asset_map.rewrite_url("/majesty"), "/majesty")
+        self.assertEqual(self.asset_map.rewrite_url("index.css"), "index.css")
+
+    # Test rewrite template - static segments rewritten and digest changed
+    def test_rewrite_template(self):
+        template = Template(('<link href="/index.css">', ("Content", "{{ Content }}")), "t1", ("template.html",))
+        rewritten = self.asset_map.rewrite_template(template)
+        self.assertEqual(rewritten.render({"Content": "x"}), '<link href="/index.0123456789.css">x')
+        self.assertNotEqual(rewritten.digest, template.digest)
+
+    # Test parse markdown - link and image URLs rewritten, text untouched
+    def test_parse_markdown_asset_map(self):
+        markdown = "# T\n\n![logo](/images/logo.png) [style](/index.css) `/index.css`"
+        node, _ = parse_markdown(markdown, asset_map=self.asset_map)
+        expected = markdown_to_html_node(markdown).to_html()
+        expected = expected.replace('"/images/logo.png"', '"/images/logo.abcdef0123.png"')
+        expected = expected.replace('"/index.css"', '"/index.0123456789.css"')
+        self.assertEqual(node.to_html(), expected)
+
+
+
+
+class TestFingerprintDirectory(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.temp_dir.name, "static")
+        self.dest = os.path.join(self.temp_dir.name, "public")
+        self.write("index.css", "body {}")
+        self.write("images/logo.png", "png bytes")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.source, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    # Test hash assets - unchanged files reuse the cached hash
+    def test_hash_assets_cache(self):
+        cache = {}
+        hashes, bytes_read = hash_assets(self.source, ["index.css"], cache)
+        self.assertEqual(bytes_read, 7)
+        cache["index.css"]["hash"] = "cached"
+        hashes, bytes_read = hash_assets(self.source, ["index.css"], cache)
+        self.assertEqual((hashes, bytes_read), ({"index.css": "cached"}, 0))
+        hash_assets(self.source, [], cache)
+        self.assertEqual(cache, {})
+
+    # Test fingerprint directory - copies, manifest and stale removal
+    def test_fingerprint_directory(self):
+        files, asset_map, stats = fingerprint_directory(self.source, self.dest)
+        self.assertEqual(stats, {"copied": 2, "unchanged": 0, "removed": 0})
+        css = asset_map.mapping["index.css"]
+        self.assertEqual(sorted(files), sorted([css, asset_map.mapping[os.path.join("images", "logo.png")], asset_manifest_name]))
+        with open(os.path.join(self.dest, asset_manifest_name)) as f:
+            self.assertEqual(json.load(f)["index.css"], css)
+
+        _, _, stats = fingerprint_directory(self.source, self.dest, files)
+        self.assertEqual(stats, {"copied": 0, "unchanged": 2, "removed": 0})
+
+        self.write("index.css", "body { margin: 0 }")
+        _, asset_map, stats = fingerprint_directory(self.source, self.dest, files)
+        self.assertEqual(stats, {"copied": 1, "unchanged": 1, "removed": 1})
+        self.assertNotEqual(asset_map.mapping["index.css"], css)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, css)))
+
+    # Test map assets - same names as fingerprint directory, without copying
+    def test_map_assets(self):
+        asset_map = map_assets(self.source)
+        self.assertFalse(os.path.exists(self.dest))
+        self.assertEqual(asset_map.mapping, fingerprint_directory(self.source, self.dest)[1].mapping)
+
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+from bench import (
+    build_cases,
+    compare_to_baseline
+)
+
+
+
+
+class TestBench(unittest.TestCase):
+
+    # Test compare to baseline - regression beyond the threshold
+    def test_compare_to_baseline(self):
+        baseline = {
+            "fast": {"ops_per_sec": 100.0},
+            "slow": {"ops_per_sec": 100.0},
+        }
+        results = {
+            "fast": {"ops_per_sec": 85.0},
+            "slow": {"ops_per_sec": 70.0},
+            "new": {"ops_per_sec": 1.0},
+        }
+        self.assertEqual(compare_to_baseline(results, baseline, 0.2), [("slow", 100.0, 70.0)])
+
+    # Test build cases - every case runs on its generated input
+    def test_build_cases(self):
+        for name, function, size in build_cases(1):
+            self.assertGreater(size, 0, name)
+            function()
+
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+from block_cache import (
+    BlockCache,
+    process_block_cache
+)
+
+
+
+
+class TestBlockCache(unittest.TestCase):
+
+    # Test block cache - hits and misses are counted
+    def test_get_and_put(self):
+        cache = BlockCache()
+        self.assertIsNone(cache.get(("paragraph", "text")))
+        cache.put(("paragraph", "text"), "<p>text</p>")
+        self.assertEqual(cache.get(("paragraph", "text")), "<p>text</p>")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    # Test block cache - least recently used entry is evicted
+    def test_eviction(self):
+        cache = BlockCache(max_entries=2)
+        cache.put(("paragraph", "a"), "<p>a</p>")
+        cache.put(("paragraph", "b"), "<p>b</p>")
+        cache.get(("paragraph", "a"))
+        cache.put(("paragraph", "c"), "<p>c</p>")
+        self.assertEqual(list(cache.entries), [("paragraph", "a"), ("paragraph", "c")])
+
+    # Test block cache - the block type is part of the key
+    def test_key_includes_type(self):
+        cache = BlockCache()
+        cache.put(("paragraph", "# a"), "<p># a</p>")
+        self.assertIsNone(cache.get(("heading", "# a")))
+
+    # Test process block cache - shared, resized and disabled
+    def test_process_block_cache(self):
+        self.assertIsNone(process_block_cache(0))
+        cache = process_block_cache(3)
+        self.assertIs(process_block_cache(3), cache)
+        for i in range(3):
+            cache.put(("paragraph", str(i)), str(i))
+        self.assertIs(process_block_cache(1), cache)
+        self.assertEqual(len(cache.entries), 1)
+
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 
 from block_markdown import (
@@ -10,9 +12,13 @@ from block_markdown import (
     markdown_to_blocks, 
     block_to_block_type,
     markdown_to_html_node,
+    parse_markdown,
+    scan_markdown,
+    MarkdownStream,
     extract_title
 )
 
+from block_cache import BlockCache
 from htmlnode import (
     ParentNode,
     LeafNode
@@ -88,6 +94,11 @@ class TestBlockToBlockType(unittest.TestCase):
         result = block_to_block_type("1. First\n2. Second")
         self.assertEqual(result, block_type_ordered_list)
 
+    # Test block to block types - ordered list out of sequence
+    def test_block_to_block_type_ordered_list_out_of_order(self):
+        result = block_to_block_type("1. First\n3. Third")
+        self.assertEqual(result, block_type_paragraph)
+
     # Test block to block types - paragraph
     def test_block_to_block_type_paragraph(self):
         result = block_to_block_type("Just some text.")
@@ -275,6 +286,72 @@ And there we have it, all done, I hope...
 
 
     
+class TestParseMarkdown(unittest.TestCase):
+
+    # Test parse markdown - nodes and title in one pass
+    def test_parse_markdown(self):
+        markdown = "Intro\n\n# The Title\n\n* Item"
+        node, title = parse_markdown(markdown)
+        expected = ParentNode("div", children=[
+            ParentNode("p", children=[LeafNode(None, "Intro")]),
+            LeafNode("h1", "The Title"),
+            ParentNode("ul", children=[
+                ParentNode("li", children=[LeafNode(None, "Item")])
+            ])
+        ])
+        self.assertEqual(node, expected)
+        self.assertEqual(title, "The Title")
+
+    # Test parse markdown - no title
+    def test_parse_markdown_no_title(self):
+        node, title = parse_markdown("## Only a sub heading")
+        self.assertEqual(node, ParentNode("div", children=[LeafNode("h2", "Only a sub heading")]))
+        self.assertIsNone(title)
+
+    # Test parse markdown - block cache reuses rendered blocks across documents
+    def test_parse_markdown_block_cache(self):
+        cache = BlockCache()
+        first = "# One\n\n> Shared **disclaimer**"
+        second = "# Two\n\n> Shared **disclaimer**"
+        self.assertEqual(parse_markdown(first, block_cache=cache)[0].to_html(), markdown_to_html_node(first).to_html())
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+        node, title = parse_markdown(second, block_cache=cache)
+        self.assertEqual(node.to_html(), markdown_to_html_node(second).to_html())
+        self.assertEqual(title, "Two")
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+
+    # Test parse markdown - text, code and link URLs are escaped, cached blocks included
+    def test_parse_markdown_escaping(self):
+        markdown = "# Q&A\n\nIs 1 < 2? See [A & B](/q?a=1&b=2)\n\n```\nif a > b && c:\n```"
+        expected = (
+            "<div><h1>Q&amp;A</h1><p>Is 1 &lt; 2? See <a href=\"/q?a=1&amp;b=2\">A &amp; B</a></p>"
+            "<pre><code>if a &gt; b &amp;&amp; c:</code></pre></div>"
+        )
+        self.assertEqual(parse_markdown(markdown)[0].to_html(), expected)
+        cache = BlockCache()
+        parse_markdown(markdown, block_cache=cache)
+        self.assertEqual(parse_markdown(markdown, block_cache=cache)[0].to_html(), expected)
+
+    # Test parse markdown - whitespace-only lines stay inside a block
+    def test_parse_markdown_whitespace_lines(self):
+        node, _ = parse_markdown("* One\n   \n  * Two")
+        expected = ParentNode("div", children=[
+            ParentNode("ul", children=[
+                ParentNode("li", children=[LeafNode(None, "One")]),
+                ParentNode("li", children=[LeafNode(None, "Two")])
+            ])
+        ])
+        self.assertEqual(node, expected)
+
+    # Test parse markdown - no blocks
+    def test_parse_markdown_no_blocks(self):
+        with self.assertRaises(ValueError):
+            parse_markdown("\n\n  \n")
+
+
+
+
 class TestExtractTitle(unittest.TestCase):
     # Test extract title
     def test_extract_title(self):
@@ -299,5 +376,28 @@ class TestExtractTitle(unittest.TestCase):
 
 
 
+
+class TestMarkdownStream(unittest.TestCase):
+
+    # Test scan markdown - title and blocks without parsing
+    def test_scan_markdown(self):
+        self.assertEqual(scan_markdown(["Intro", "", "# Title", "Body"]), ("Title", True))
+        self.assertEqual(scan_markdown(["## Sub", "text"]), (None, True))
+        self.assertEqual(scan_markdown(["", "   ", ""]), (None, False))
+
+    # Test markdown stream - same HTML as the in-memory parser
+    def test_markdown_stream(self):
+        markdown = "Intro *text*\n\n# Title\n\n  \n* One\n* Two\n\n```\ncode\n```\n"
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "page.md")
+            with open(path, "w") as f:
+                f.write(markdown)
+            chunks = []
+            MarkdownStream(path).render_to(chunks.append)
+        self.assertEqual("".join(chunks), markdown_to_html_node(markdown).to_html())
+
+
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
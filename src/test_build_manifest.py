@@ -0,0 +1,163 @@
+import hashlib
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from build_manifest import (
+    BuildManifest,
+    GENERATOR_VERSION,
+    hash_file
+)
+from generate_page import generate_page_recursive
+
+
+
+
+class TestBuildManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "cache", "manifest.json")
+        self.output = os.path.join(self.temp_dir.name, "index.html")
+        with open(self.output, "w") as f:
+            f.write("<p>page</p>")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    # Test manifest - round trip through disk
+    def test_manifest_save_and_load(self):
+        manifest = BuildManifest(self.path)
+        manifest.template_hash = "t1"
+        manifest.record_page("index.md", "h1", "index.html")
+        manifest.asset_hashes = {"index.css": {"size": 7, "mtime_ns": 1, "hash": "a1"}}
+        manifest.save()
+
+        loaded = BuildManifest.load(self.path)
+        self.assertEqual(loaded.template_hash, "t1")
+        self.assertEqual(loaded.pages, {"index.md": {"hash": "h1", "output": "index.html"}})
+        self.assertEqual(loaded.asset_hashes, manifest.asset_hashes)
+
+    # Test manifest - missing file
+    def test_manifest_load_missing(self):
+        loaded = BuildManifest.load(self.path)
+        self.assertEqual(loaded.pages, {})
+        self.assertIsNone(loaded.template_hash)
+
+    # Test manifest - other generator version is discarded
+    def test_manifest_load_other_version(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w") as f:
+            f.write('{"generator_version": "0", "template_hash": "t1", "pages": {"a.md": {}}}')
+        loaded = BuildManifest.load(self.path)
+        self.assertEqual(loaded.pages, {})
+        self.assertNotEqual(GENERATOR_VERSION, "0")
+
+    # Test manifest - fresh page
+    def test_manifest_page_fresh(self):
+        manifest = BuildManifest(self.path)
+        manifest.template_hash = "t1"
+        manifest.record_page("index.md", "h1", "index.html")
+        self.assertTrue(manifest.is_page_fresh("index.md", "h1", "t1", self.output))
+
+    # Test manifest - changed source, template or missing output
+    def test_manifest_page_stale(self):
+        manifest = BuildManifest(self.path)
+        manifest.template_hash = "t1"
+        manifest.record_page("index.md", "h1", "index.html")
+        self.assertFalse(manifest.is_page_fresh("index.md", "h2", "t1", self.output))
+        self.assertFalse(manifest.is_page_fresh("index.md", "h1", "t2", self.output))
+        self.assertFalse(manifest.is_page_fresh("other.md", "h1", "t1", self.output))
+        os.remove(self.output)
+        self.assertFalse(manifest.is_page_fresh("index.md", "h1", "t1", self.output))
+
+    # Test hash file
+    def test_hash_file(self):
+        expected = hashlib.sha256(b"<p>page</p>").hexdigest()
+        self.assertEqual(hash_file(self.output), expected)
+
+
+
+
+
+class TestIncrementalBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.content = self.path("content")
+        self.dest = self.path("public")
+        self.template = self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("content/index.md", "# Home\n\nWelcome")
+        self.write("content/blog/post.md", "# Post\n\nText")
+        self.manifest = BuildManifest(self.path("cache/manifest.json"))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.temp_dir.name, name)
+
+    def write(self, name, text):
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def build(self, quiet=True):
+        return generate_page_recursive(self.content, self.template, self.dest, self.manifest, quiet=quiet)
+
+    # Test incremental build - unchanged pages are skipped and their outputs left untouched
+    def test_unchanged_page_skipped(self):
+        self.build()
+        output = os.path.join(self.dest, "index.html")
+        os.utime(output, ns=(0, 0))
+        self.write("content/blog/post.md", "# Post\n\nEdited")
+        stats = self.build()
+        self.assertEqual((stats["rebuilt"], stats["skipped"], stats["deleted"]), (1, 1, 0))
+        self.assertEqual(os.stat(output).st_mtime_ns, 0)
+        with open(os.path.join(self.dest, "blog", "post.html")) as f:
+            self.assertIn("<p>Edited</p>", f.read())
+
+    # Test incremental build - a template change rebuilds every page
+    def test_template_change_rebuilds(self):
+        self.build()
+        self.write("template.html", "<html><title>{{ Title }}</title>{{ Content }}</html>")
+        stats = self.build()
+        self.assertEqual((stats["rebuilt"], stats["skipped"]), (2, 0))
+        with open(os.path.join(self.dest, "index.html")) as f:
+            self.assertTrue(f.read().startswith("<html>"))
+
+    # Test incremental build - a deleted source loses its output and manifest entry
+    def test_deleted_source_removed(self):
+        self.build()
+        os.remove(self.path("content/blog/post.md"))
+        stats = self.build()
+        self.assertEqual((stats["rebuilt"], stats["skipped"], stats["deleted"]), (0, 1, 1))
+        self.assertEqual(list(self.manifest.pages), ["index.md"])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog")))
+        self.assertTrue(os.path.isfile(os.path.join(self.dest, "index.html")))
+
+    # Test incremental build - stale output removal is reported unless quiet
+    def test_deleted_source_message(self):
+        self.build()
+        os.remove(self.path("content/blog/post.md"))
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            self.build()
+        self.assertEqual(stdout.getvalue(), "")
+
+        self.write("content/blog/post.md", "# Post\n\nText")
+        self.build()
+        os.remove(self.path("content/blog/post.md"))
+        with redirect_stdout(stdout):
+            self.build(quiet=False)
+        self.assertIn(f"Removing stale output {os.path.join(self.dest, 'blog', 'post.html')}", stdout.getvalue())
+
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+from build_report import (
+    BuildReport,
+    StageTimer,
+    page_stages
+)
+
+
+
+
+class TestStageTimer(unittest.TestCase):
+
+    # Test stage timer - every stage is reported, even unused ones
+    def test_stage_timer(self):
+        timer = StageTimer(("read", "write"))
+        timer.begin("read")
+        timer.begin("read")
+        times = timer.end()
+        self.assertEqual(set(times), {"read", "write"})
+        self.assertGreaterEqual(times["read"], 0.0)
+        self.assertEqual(times["write"], 0.0)
+
+
+
+
+class TestBuildReport(unittest.TestCase):
+
+    def page_stats(self, seconds, bytes_read):
+        stages = dict.fromkeys(page_stages, 0.0)
+        stages["block_parse"] = seconds
+        return {"stages": stages, "bytes_read": bytes_read, "bytes_written": 2 * bytes_read}
+
+    # Test build report - totals and slowest pages
+    def test_build_report_to_dict(self):
+        report = BuildReport()
+        report.add_page("a.md", self.page_stats(0.5, 10))
+        report.add_page("b.md", self.page_stats(2.0, 20))
+        report.add_page("c.md", self.page_stats(1.0, 30))
+        report.add_static({"copy": 0.25}, 100, 100)
+
+        result = report.to_dict(slowest=2)
+        self.assertEqual(result["pages"]["count"], 3)
+        self.assertEqual(result["pages"]["stages"]["block_parse"], 3.5)
+        self.assertEqual(result["pages"]["bytes_read"], 60)
+        self.assertEqual(result["pages"]["bytes_written"], 120)
+        self.assertEqual([page["source"] for page in result["slowest_pages"]], ["b.md", "c.md"])
+        self.assertEqual(result["static"]["stages"]["copy"], 0.25)
+        self.assertEqual(result["static"]["bytes_written"], 100)
+
+
+
+
+if __name__ == "__main__":
+    unittest.main()
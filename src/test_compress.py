@@ -0,0 +1,76 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from compress import (
+    compress_outputs,
+    remove_compressed
+)
+
+
+
+
+class TestCompressOutputs(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dest = self.temp_dir.name
+        self.page = self.write("posts/index.html", "<p>" + "text " * 100 + "</p>")
+        self.write("images/logo.png", "png bytes")
+        self.cache = {}
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.dest, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    # Test compress outputs - text outputs only, decompressing to the original
+    def test_compress_outputs(self):
+        stats = compress_outputs(self.dest, self.cache, level=6)
+        self.assertEqual((stats["compressed"], stats["unchanged"], stats["removed"]), (1, 0, 0))
+        with gzip.open(f"{self.page}.gz", "rt") as f, open(self.page) as g:
+            self.assertEqual(f.read(), g.read())
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images", "logo.png.gz")))
+        self.assertEqual(list(self.cache), [os.path.join("posts", "index.html")])
+
+    # Test compress outputs - unchanged content is not compressed again
+    def test_compress_outputs_unchanged(self):
+        compress_outputs(self.dest, self.cache)
+        os.utime(f"{self.page}.gz", ns=(0, 0))
+
+        stats = compress_outputs(self.dest, self.cache)
+        self.assertEqual((stats["compressed"], stats["unchanged"], stats["bytes_read"]), (0, 1, 0))
+
+        os.utime(self.page, ns=(10**9, 10**9))
+        stats = compress_outputs(self.dest, self.cache)
+        self.assertEqual((stats["compressed"], stats["unchanged"]), (0, 1))
+        self.assertEqual(os.stat(f"{self.page}.gz").st_mtime_ns, 0)
+
+        stats = compress_outputs(self.dest, self.cache, level=1)
+        self.assertEqual(stats["compressed"], 1)
+
+    # Test compress outputs - siblings of deleted outputs are removed
+    def test_compress_outputs_removed(self):
+        compress_outputs(self.dest, self.cache)
+        os.remove(self.page)
+        stats = compress_outputs(self.dest, self.cache)
+        self.assertEqual(stats["removed"], 1)
+        self.assertEqual(self.cache, {})
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "posts")))
+
+    # Test remove compressed - missing siblings are ignored
+    def test_remove_compressed_missing(self):
+        remove_compressed(self.dest, os.path.join("posts", "index.html"))
+        self.assertTrue(os.path.exists(self.page))
+
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+
+from copy_static import (
+    sync_directory,
+    sync_file
+)
+
+
+
+
+class TestSyncDirectory(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.temp_dir.name, "static")
+        self.dest = os.path.join(self.temp_dir.name, "public")
+        self.write(self.source, "index.css", "body {}")
+        self.write(self.source, "images/logo.png", "png bytes")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, base, name, text):
+        path = os.path.join(base, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    # Test sync directory - first sync copies everything
+    def test_sync_directory_initial(self):
+        files, stats = sync_directory(self.source, self.dest)
+        self.assertEqual(files, [os.path.join("images", "logo.png"), "index.css"])
+        self.assertEqual(stats, {"copied": 2, "unchanged": 0, "removed": 0})
+        with open(os.path.join(self.dest, "images", "logo.png")) as f:
+            self.assertEqual(f.read(), "png bytes")
+
+    # Test sync directory - unchanged files are skipped
+    def test_sync_directory_unchanged(self):
+        files, _ = sync_directory(self.source, self.dest)
+        _, stats = sync_directory(self.source, self.dest, files)
+        self.assertEqual(stats, {"copied": 0, "unchanged": 2, "removed": 0})
+
+    # Test sync directory - changed file is copied again
+    def test_sync_directory_changed(self):
+        files, _ = sync_directory(self.source, self.dest)
+        self.write(self.source, "index.css", "body { color: red; }")
+        _, stats = sync_directory(self.source, self.dest, files)
+        self.assertEqual(stats, {"copied": 1, "unchanged": 1, "removed": 0})
+        with open(os.path.join(self.dest, "index.css")) as f:
+            self.assertEqual(f.read(), "body { color: red; }")
+
+    # Test sync directory - touched file with equal content is not copied in hash mode
+    def test_sync_directory_hash_touched(self):
+        files, _ = sync_directory(self.source, self.dest)
+        source_css = os.path.join(self.source, "index.css")
+        os.utime(source_css, ns=(0, 0))
+        _, stats = sync_directory(self.source, self.dest, files, use_hash=True)
+        self.assertEqual(stats, {"copied": 0, "unchanged": 2, "removed": 0})
+        self.assertEqual(os.stat(os.path.join(self.dest, "index.css")).st_mtime_ns, 0)
+
+    # Test sync directory - touched file with equal content is compared byte by byte and not copied
+    def test_sync_directory_touched(self):
+        files, _ = sync_directory(self.source, self.dest)
+        dest_css = os.path.join(self.dest, "index.css")
+        os.utime(os.path.join(self.source, "index.css"), ns=(0, 0))
+        inode = os.stat(dest_css).st_ino
+        _, stats = sync_directory(self.source, self.dest, files)
+        self.assertEqual(stats, {"copied": 0, "unchanged": 2, "removed": 0})
+        self.assertEqual(os.stat(dest_css).st_ino, inode)
+        self.assertEqual(os.stat(dest_css).st_mtime_ns, 0)
+
+    # Test sync directory - file of equal size with different bytes is copied
+    def test_sync_directory_same_size_changed(self):
+        files, _ = sync_directory(self.source, self.dest)
+        self.write(self.source, "index.css", "body {{")
+        os.utime(os.path.join(self.source, "index.css"), ns=(0, 0))
+        _, stats = sync_directory(self.source, self.dest, files)
+        self.assertEqual(stats, {"copied": 1, "unchanged": 1, "removed": 0})
+        with open(os.path.join(self.dest, "index.css")) as f:
+            self.assertEqual(f.read(), "body {{")
+
+    # Test sync directory - removed source file is deleted, other outputs are kept
+    def test_sync_directory_removed(self):
+        files, _ = sync_directory(self.source, self.dest)
+        page = self.write(self.dest, "index.html", "<p>page</p>")
+        os.remove(os.path.join(self.source, "images", "logo.png"))
+        files, stats = sync_directory(self.source, self.dest, files)
+        self.assertEqual(files, ["index.css"])
+        self.assertEqual(stats, {"copied": 0, "unchanged": 1, "removed": 1})
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images")))
+        self.assertTrue(os.path.exists(page))
+
+
+    # Test sync file - identical copies are not rewritten
+    def test_sync_file_identical(self):
+        files, _ = sync_directory(self.source, self.dest)
+        dest_item = os.path.join(self.dest, "index.css")
+        os.utime(dest_item, ns=(0, 0))
+        self.assertIsNone(sync_file(self.source, self.dest, "index.css", files))
+        self.write(self.source, "index.css", "body { margin: 0 }")
+        self.assertEqual(sync_file(self.source, self.dest, "index.css", files), "copied")
+        self.assertEqual(os.listdir(self.dest), os.listdir(self.source))
+
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+import gzip
+import http.client
+import os
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from dev_server import (
+    DevRequestHandler,
+    DevSite,
+    PooledHTTPServer,
+    accepts_gzip,
+    etag_matches,
+    live_reload_path
+)
+from generate_page import page_template
+from render_cache import RenderCache
+
+
+
+
+class TestDevSite(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = self.temp_dir.name
+        self.paths = {
+            "content": os.path.join(root, "content"),
+            "static": os.path.join(root, "static"),
+            "template": os.path.join(root, "template.html"),
+        }
+        self.page = self.write("content/posts/index.md", "# Post\n\nFirst version")
+        self.write("content/about.md", "# About")
+        self.write("static/index.css", "body { color: black; }" * 20)
+        self.write("template.html", "<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.site = DevSite(self.paths, {"block_cache_size": 0})
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.temp_dir.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    # Test resolve - pages, redirects, static files and traversal
+    def test_resolve(self):
+        self.assertEqual(self.site.resolve("/posts/"), ("page", self.page))
+        self.assertEqual(self.site.resolve("/posts"), ("redirect", "/posts/"))
+        self.assertEqual(self.site.resolve("/about.html"), ("page", os.path.join(self.paths["content"], "about.md")))
+        self.assertEqual(self.site.resolve("/index.css"), ("static", os.path.join(self.paths["static"], "index.css")))
+        self.assertIsNone(self.site.resolve("/missing.css"))
+        self.assertIsNone(self.site.resolve("/../template.html"))
+        self.assertIsNone(self.site.resolve("/"))
+
+    # Test get - pages are kept in memory until their source changes
+    def test_get_page(self):
+        resource = self.site.get("page", self.page)
+        self.assertIn(b"<p>First version</p>", resource.body)
+        self.assertIn(live_reload_path.encode(), resource.body)
+        self.assertIs(self.site.get("page", self.page), resource)
+
+        self.write("content/posts/index.md", "# Post\n\nSecond version, longer")
+        changed = self.site.get("page", self.page)
+        self.assertIn(b"<p>Second version, longer</p>", changed.body)
+        self.assertNotEqual(changed.etag, resource.etag)
+
+    # Test render - one page rendered from several threads at once, sharing the caches
+    def test_concurrent_render(self):
+        self.write("content/posts/index.md", "# Post\n\nShared paragraph\n\n- one\n- two")
+        render_cache = RenderCache(os.path.join(self.temp_dir.name, "cache"))
+        site = DevSite(self.paths, {"block_cache_size": 64, "render_cache": render_cache})
+        template = page_template(self.paths["template"])
+        barrier = threading.Barrier(8, timeout=5)
+        real_replace = os.replace
+
+        # Every thread has written its cache entry before any of them moves it into place
+        def synchronized_replace(source, destination):
+            barrier.wait()
+            real_replace(source, destination)
+
+        with patch.object(os, "replace", synchronized_replace), ThreadPoolExecutor(max_workers=8) as executor:
+            results = [executor.submit(site.render, self.page, template) for _ in range(8)]
+            bodies = {future.result() for future in results}
+        self.assertEqual(len(bodies), 1)
+        self.assertIn(b"<p>Shared paragraph</p>", bodies.pop())
+        cached = [name for _, _, names in os.walk(render_cache.directory) for name in names]
+        self.assertEqual(len(cached), 1)
+        self.assertFalse(cached[0].endswith(".tmp"))
+
+    # Test wait for change - returns at once without a version, or after a change
+    def test_wait_for_change(self):
+        self.assertEqual(self.site.wait_for_change(None), 0)
+        self.assertEqual(self.site.wait_for_change(0, timeout=0.01), 0)
+        threading.Timer(0.01, self.site.notify_change).start()
+        self.assertEqual(self.site.wait_for_change(0, timeout=5), 1)
+
+    # Test server - ETags, 304 responses and gzip bodies
+    def test_server(self):
+        handler_class = type("Handler", (DevRequestHandler,), {"site": self.site, "quiet": True})
+        server = PooledHTTPServer(("127.0.0.1", 0), handler_class, workers=2)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+            connection.request("GET", "/posts/")
+            response = connection.getresponse()
+            body = response.read()
+            self.assertEqual(response.status, 200)
+            self.assertIn(b"First version", body)
+            etag = response.getheader("ETag")
+
+            connection.request("GET", "/posts/", headers={"If-None-Match": etag})
+            response = connection.getresponse()
+            response.read()
+            self.assertEqual(response.status, 304)
+
+            connection.request("GET", "/index.css", headers={"Accept-Encoding": "gzip"})
+            response = connection.getresponse()
+            self.assertEqual(response.getheader("Content-Encoding"), "gzip")
+            self.assertEqual(gzip.decompress(response.read()), b"body { color: black; }" * 20)
+
+            connection.request("GET", "/missing")
+            response = connection.getresponse()
+            response.read()
+            self.assertEqual(response.status, 404)
+            connection.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+
+
+class TestHeaders(unittest.TestCase):
+
+    # Test accepts gzip - listed, refused with q=0 and absent
+    def test_accepts_gzip(self):
+        self.assertTrue(accepts_gzip("gzip, deflate, br"))
+        self.assertTrue(accepts_gzip("br;q=1.0, gzip;q=0.8"))
+        self.assertFalse(accepts_gzip("gzip;q=0"))
+        self.assertFalse(accepts_gzip("br"))
+        self.assertFalse(accepts_gzip(None))
+
+    # Test etag matches - lists, weak tags and wildcard
+    def test_etag_matches(self):
+        self.assertTrue(etag_matches('"a", "b"', '"b"'))
+        self.assertTrue(etag_matches('W/"b"', '"b"'))
+        self.assertTrue(etag_matches("*", '"b"'))
+        self.assertFalse(etag_matches('"a"', '"b"'))
+        self.assertFalse(etag_matches(None, '"b"'))
+
+
+
+
+if __name__ == "__main__":
+    unittest.main()
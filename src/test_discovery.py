@@ -0,0 +1,120 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+import discovery
+from discovery import (
+    discover_files,
+    list_directory
+)
+
+
+
+
+class TestDiscovery(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, name):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(name)
+        return path
+
+    def age(self, *names):
+        # Move directory mtimes out of the racy window so their listings can be reused
+        for name in names:
+            path = os.path.join(self.root, name)
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10 * 10**9))
+
+    # Test discover files - finds matching files in every subdirectory
+    def test_discover_files(self):
+        for name in ("index.md", "notes.txt", "blog/a.md", "blog/b.md", "blog/2024/deep/c.md", "empty/.keep"):
+            self.write(name)
+        found = sorted(discover_files(self.root, ".md", workers=4))
+        expected = sorted(
+            (name, os.path.join(self.root, name))
+            for name in ("index.md", os.path.join("blog", "a.md"), os.path.join("blog", "b.md"),
+                         os.path.join("blog", "2024", "deep", "c.md"))
+        )
+        self.assertEqual(found, expected)
+
+    # Test discover files - symbolic links to directories are not followed
+    def test_symlinked_directory(self):
+        self.write("real/a.md")
+        os.symlink(os.path.join(self.root, "real"), os.path.join(self.root, "link"))
+        self.assertEqual([path for path, _ in discover_files(self.root, ".md")], [os.path.join("real", "a.md")])
+
+    # Test discover files - the cache holds every listed directory after the scan
+    def test_cache_filled(self):
+        self.write("index.md")
+        self.write("blog/a.md")
+        cache = {"gone": {"mtime_ns": 1, "files": ["x.md"], "dirs": []}}
+        list(discover_files(self.root, ".md", cache))
+        self.assertEqual(set(cache), {"", "blog"})
+        self.assertEqual(cache["blog"]["files"], ["a.md"])
+
+    # Test discover files - unchanged directories are not listed again
+    def test_cache_reused(self):
+        self.write("index.md")
+        self.write("blog/a.md")
+        self.age("", "blog")
+        cache = {}
+        list(discover_files(self.root, ".md", cache))
+        with patch.object(discovery.os, "scandir", side_effect=AssertionError("listed again")):
+            found = sorted(path for path, _ in discover_files(self.root, ".md", cache))
+        self.assertEqual(found, [os.path.join("blog", "a.md"), "index.md"])
+
+    # Test discover files - adding a file changes the directory mtime, so it is listed again
+    def test_cache_invalidated(self):
+        self.write("blog/a.md")
+        self.age("", "blog")
+        cache = {}
+        list(discover_files(self.root, ".md", cache))
+        self.write("blog/b.md")
+        found = sorted(path for path, _ in discover_files(self.root, ".md", cache))
+        self.assertEqual(found, [os.path.join("blog", "a.md"), os.path.join("blog", "b.md")])
+
+    # Test list directory - recently modified directories are not trusted
+    def test_racy_listing(self):
+        self.write("a.md")
+        listing = list_directory(self.root, "", ".md")
+        self.assertIsNone(listing["mtime_ns"])
+        self.age("")
+        listing = list_directory(self.root, "", ".md")
+        self.assertIsNotNone(listing["mtime_ns"])
+        self.assertIs(list_directory(self.root, "", ".md", listing), listing)
+
+    # Test discover files - yields files before the whole tree is listed
+    def test_streams(self):
+        for i in range(5):
+            self.write(f"section{i}/page.md")
+        self.write("index.md")
+        release = threading.Event()
+        real_list_directory = discovery.list_directory
+
+        def blocking_list_directory(root, relative_path, suffix, cached=None):
+            if relative_path:
+                release.wait(5)
+            return real_list_directory(root, relative_path, suffix, cached)
+
+        with patch.object(discovery, "list_directory", blocking_list_directory):
+            files = discover_files(self.root, ".md", workers=2)
+            self.assertEqual(next(files)[0], "index.md")
+            release.set()
+            self.assertEqual(len(list(files)), 5)
+
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import io
+import os
+import tempfile
+import tracemalloc
+import unittest
+from contextlib import redirect_stderr
+
+from build_manifest import BuildManifest
+from generate_page import (
+    generate_page,
+    generate_page_recursive
+)
+from main import report_errors
+
+
+
+
+class TestGeneratePageRecursive(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.content = self.path("content")
+        self.template = self.write("template.html", "<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.write("content/index.md", "# Home\n\nWelcome to **the site**.\n\n- [About](/about.html)")
+        self.write("content/about.md", "# About\n\n> A quote\n\n```\ncode & more\n```")
+        for i in range(6):
+            self.write(f"content/posts/post{i}.md", f"# Post {i}\n\nParagraph {i} with `code`.\n\n1. one\n2. two")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.temp_dir.name, name)
+
+    def write(self, name, text):
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def build(self, dest, manifest=None, jobs=1):
+        return generate_page_recursive(self.content, self.template, self.path(dest), manifest, jobs=jobs, quiet=True)
+
+    def outputs(self, dest):
+        outputs = {}
+        for root, _, names in os.walk(self.path(dest)):
+            for name in names:
+                path = os.path.join(root, name)
+                with open(path, "rb") as f:
+                    outputs[os.path.relpath(path, self.path(dest))] = f.read()
+        return outputs
+
+    # Test jobs - worker processes produce the same bytes as a serial build
+    def test_jobs_match_serial(self):
+        serial = self.build("serial")
+        parallel = self.build("parallel", jobs=2)
+        self.assertEqual(parallel["rebuilt"], 8)
+        self.assertEqual(parallel["errors"], serial["errors"])
+        self.assertEqual(len(self.outputs("parallel")), 8)
+        self.assertEqual(self.outputs("parallel"), self.outputs("serial"))
+
+    # Test jobs - page errors are collected in sorted order and the other pages still build
+    def test_jobs_collect_errors(self):
+        self.write("content/posts/post5.md", "No title here")
+        self.write("content/broken.md", "No title either")
+        stats = self.build("public", jobs=2)
+        self.assertEqual([source for source, _ in stats["errors"]], ["broken.md", os.path.join("posts", "post5.md")])
+        self.assertIn("No H1 header found", stats["errors"][0][1])
+        self.assertEqual(stats["rebuilt"], 7)
+        self.assertTrue(os.path.isfile(self.path("public/posts/post4.html")))
+
+        stderr = io.StringIO()
+        with redirect_stderr(stderr):
+            report_errors(stats["errors"])
+        lines = stderr.getvalue().splitlines()
+        self.assertEqual(lines[0], "2 page(s) failed to generate:")
+        self.assertTrue(lines[1].startswith("  broken.md: "))
+
+    # Test jobs - failed pages stay out of the manifest and are retried by the next build
+    def test_jobs_retry_failed(self):
+        manifest = BuildManifest(self.path("manifest.json"))
+        self.write("content/posts/post5.md", "No title here")
+        stats = self.build("public", manifest, jobs=2)
+        self.assertEqual(len(stats["errors"]), 1)
+        self.assertNotIn(os.path.join("posts", "post5.md"), manifest.pages)
+        self.assertEqual(len(manifest.pages), 7)
+
+        self.write("content/posts/post5.md", "# Post 5\n\nFixed")
+        stats = self.build("public", manifest, jobs=2)
+        self.assertEqual(stats["errors"], [])
+        self.assertEqual((stats["rebuilt"], stats["skipped"]), (1, 7))
+        self.assertIn(os.path.join("posts", "post5.md"), manifest.pages)
+        with open(self.path("public/posts/post5.html")) as f:
+            self.assertIn("<p>Fixed</p>", f.read())
+
+    # Test streaming - peak memory stays far below the document size, even with the block cache enabled
+    def test_streaming_memory_bound(self):
+        # Every paragraph is distinct, but the words and so the search terms are few
+        words = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta"]
+        source = self.write("changelog.md", "# Changelog\n\n" + "".join(
+            " ".join(words[(i >> (3 * k)) & 7] for k in range(6)) + " with **bold** text\n\n"
+            for i in range(6000)
+        ))
+        size = os.path.getsize(source)
+
+        tracemalloc.start()
+        try:
+            generate_page(
+                source, self.template, self.path("changelog.html"),
+                quiet=True, block_cache_size=4096, stream_threshold=0,
+            )
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertGreater(size, 300 * 1024)
+        self.assertLess(peak, size // 2)
+
+
+
+
+if __name__ == "__main__":
+    unittest.main()
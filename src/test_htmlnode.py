@@ -1,6 +1,19 @@
+import io
+import pickle
+import sys
 import unittest
 
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from htmlnode import (
+    FrozenProps,
+    HTMLNode,
+    LeafNode,
+    ParentNode,
+    RawNode,
+    attributes_to_html,
+    escape_attribute,
+    escape_text,
+    intern_props
+)
 
 class TestHTMLNode(unittest.TestCase):
 
@@ -51,6 +64,13 @@ class TestLeafNode(unittest.TestCase):
         props_node = LeafNode("a", "Click me!", {"href": "https://example.com"})
         self.assertEqual(props_node.to_html(), '<a href="https://example.com">Click me!</a>')
 
+    def test_leafnode_slots(self):
+        # Test LeafNode and ParentNode have no per-instance dict
+        leaf = LeafNode("p", "This is a paragraph of text.")
+        parent = ParentNode("div", [leaf])
+        self.assertFalse(hasattr(leaf, "__dict__"))
+        self.assertFalse(hasattr(parent, "__dict__"))
+
     def test_leafnode_repr(self):
         # Test repr for LeafNode with tag
         node = LeafNode("p", "This is a paragraph of text.")
@@ -115,6 +135,106 @@ class TestParentNode(unittest.TestCase):
         )
         self.assertEqual(repr(node), "ParentNode(tag='div', children=[LeafNode(tag='b', value='Bold text', props=None), LeafNode(tag=None, value='Normal text', props=None)], props=None)")
 
+    def test_parentnode_render_to(self):
+        # Test streaming a ParentNode into a buffer
+        node = ParentNode("div",
+            [
+                ParentNode("p", [LeafNode("b", "Bold text")], {"class": "intro"}),
+                LeafNode(None, "Normal text")
+            ]
+        )
+        buffer = io.StringIO()
+        node.render_to(buffer.write)
+        self.assertEqual(buffer.getvalue(), '<div><p class="intro"><b>Bold text</b></p>Normal text</div>')
+        self.assertEqual(list(node.iter_html())[0], "<div>")
+
+    def test_parentnode_deep_nesting(self):
+        # Test a tree deeper than the recursion limit
+        depth = sys.getrecursionlimit() + 100
+        node = LeafNode(None, "deep")
+        for _ in range(depth):
+            node = ParentNode("div", [node])
+        html = node.to_html()
+        self.assertEqual(html, "<div>" * depth + "deep" + "</div>" * depth)
+
+
+
+
+class TestEscaping(unittest.TestCase):
+
+    def test_escape_text(self):
+        # Test clean text is returned unchanged and special characters are replaced
+        text = "Plain 'quoted' \"text\""
+        self.assertIs(escape_text(text), text)
+        self.assertEqual(escape_text("a < b && c > d"), "a &lt; b &amp;&amp; c &gt; d")
+        self.assertEqual(escape_text("&lt;"), "&amp;lt;")
+
+    def test_escape_attribute(self):
+        # Test attribute values also escape double quotes
+        self.assertEqual(escape_attribute('say "hi" & <bye>'), "say &quot;hi&quot; &amp; &lt;bye&gt;")
+        self.assertEqual(escape_attribute("/a/b"), "/a/b")
+
+    def test_leafnode_escaping(self):
+        # Test leaf text and attribute values are escaped, with or without a tag
+        node = LeafNode("a", "Fish & <Chips>", {"href": "/menu?a=1&b=2", "title": 'The "best"'})
+        self.assertEqual(
+            node.to_html(),
+            '<a href="/menu?a=1&amp;b=2" title="The &quot;best&quot;">Fish &amp; &lt;Chips&gt;</a>',
+        )
+        self.assertEqual(LeafNode(None, "1 < 2").to_html(), "1 &lt; 2")
+        self.assertEqual(ParentNode("p", [LeafNode(None, "<i>")]).to_html(), "<p>&lt;i&gt;</p>")
+
+    def test_non_string_values(self):
+        # Test non-string attribute and leaf values are converted with str, as before escaping
+        node = LeafNode("img", "", {"src": "a.png", "width": 100})
+        self.assertEqual(node.to_html(), '<img src="a.png" width="100"></img>')
+        self.assertEqual(LeafNode("td", 3.5, {"title": None}).to_html(), '<td title="None">3.5</td>')
+        self.assertEqual(attributes_to_html({"data-x": 1, "alt": "<&>"}), ' data-x="1" alt="&lt;&amp;&gt;"')
+        self.assertEqual(FrozenProps(height=20).html, ' height="20"')
+        self.assertEqual(escape_attribute(7), "7")
+
+    def test_rawnode(self):
+        # Test raw nodes output their HTML unchanged and only equal other raw nodes
+        node = RawNode("<b>bold &amp; raw</b>")
+        self.assertEqual(ParentNode("div", [node]).to_html(), "<div><b>bold &amp; raw</b></div>")
+        self.assertEqual(node, RawNode("<b>bold &amp; raw</b>"))
+        self.assertNotEqual(node, LeafNode(None, "<b>bold &amp; raw</b>"))
+        self.assertNotEqual(LeafNode(None, "<b>bold &amp; raw</b>"), node)
+
+
+
+
+class TestFrozenProps(unittest.TestCase):
+
+    def test_frozen_props(self):
+        # Test frozen props serialize once, compare like dicts and cannot be changed
+        props = FrozenProps({"href": "/a?x=1&y=2", "title": "A"})
+        self.assertEqual(props.html, ' href="/a?x=1&amp;y=2" title="A"')
+        self.assertEqual(props, {"href": "/a?x=1&y=2", "title": "A"})
+        self.assertEqual(LeafNode("a", "A", props).to_html(), '<a href="/a?x=1&amp;y=2" title="A">A</a>')
+        with self.assertRaises(TypeError):
+            props["href"] = "/b"
+        with self.assertRaises(TypeError):
+            props.update(title="B")
+        self.assertEqual(pickle.loads(pickle.dumps(props)).html, props.html)
+
+    def test_frozen_props_hash(self):
+        # Test equal props hash equally whatever their key order, as dict equality ignores it
+        a = FrozenProps(src="x", alt="y")
+        b = FrozenProps(alt="y", src="x")
+        self.assertEqual(a, b)
+        self.assertEqual(hash(a), hash(b))
+        self.assertEqual(len({a, b}), 1)
+        self.assertNotEqual(hash(a), hash(FrozenProps(src="x", alt="z")))
+
+    def test_intern_props(self):
+        # Test equal attributes share one object, keyed by order and values
+        props = intern_props(href="/majesty")
+        self.assertIs(intern_props(href="/majesty"), props)
+        self.assertIsNot(intern_props(href="/other"), props)
+        self.assertIsNot(intern_props(src="/a.png", alt="A"), intern_props(alt="A", src="/a.png"))
+        self.assertIsInstance(props, FrozenProps)
+
 
 
 
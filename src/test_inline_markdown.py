@@ -287,6 +287,95 @@ class TestTextToTextNodes(unittest.TestCase):
         ]
         self.assertEqual(result_nodes, expected_nodes)
 
+    # Test text to textnodes - plain text
+    def test_text_to_textnodes_plain_text(self):
+        self.assertEqual(text_to_textnodes("Just words"), [TextNode("Just words", text_type_text)])
+        self.assertEqual(text_to_textnodes(""), [])
+
+    # Test text to textnodes - unmatched delimiter
+    def test_text_to_textnodes_unmatched_delimiter(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("This is **not closed")
+
+    # Test text to textnodes - markup inside code is left alone
+    def test_text_to_textnodes_code_with_markup(self):
+        result_nodes = text_to_textnodes("Use `a * b` here")
+        expected_nodes = [
+            TextNode("Use ", text_type_text),
+            TextNode("a * b", text_type_code),
+            TextNode(" here", text_type_text),
+        ]
+        self.assertEqual(result_nodes, expected_nodes)
+
+    # Test text to textnodes - image wrapped in brackets is not a link
+    def test_text_to_textnodes_image_inside_link(self):
+        result_nodes = text_to_textnodes("[![badge](https://example.com/b.png)](https://example.com)")
+        expected_nodes = [
+            TextNode("[", text_type_text),
+            TextNode("badge", text_type_image, "https://example.com/b.png"),
+            TextNode("](https://example.com)", text_type_text),
+        ]
+        self.assertEqual(result_nodes, expected_nodes)
+
+    # Test text to textnodes - a stray bracket before code does not swallow it into a link
+    def test_text_to_textnodes_bracket_before_code(self):
+        result_nodes = text_to_textnodes("Use a[i] for `code` then [docs](/x)")
+        expected_nodes = [
+            TextNode("Use a[i] for ", text_type_text),
+            TextNode("code", text_type_code),
+            TextNode(" then ", text_type_text),
+            TextNode("docs", text_type_link, "/x"),
+        ]
+        self.assertEqual(result_nodes, expected_nodes)
+
+    # Test text to textnodes - a stray bracket before bold does not swallow it into a link
+    def test_text_to_textnodes_bracket_before_bold(self):
+        result_nodes = text_to_textnodes("Footnote [1 is **important**, see [docs](https://x.org).")
+        expected_nodes = [
+            TextNode("Footnote [1 is ", text_type_text),
+            TextNode("important", text_type_bold),
+            TextNode(", see ", text_type_text),
+            TextNode("docs", text_type_link, "https://x.org"),
+            TextNode(".", text_type_text),
+        ]
+        self.assertEqual(result_nodes, expected_nodes)
+
+    # Test text to textnodes - a link or image spanning italic markup is not one
+    def test_text_to_textnodes_reference_around_italic(self):
+        result_nodes = text_to_textnodes("[a *b* c](/x) and ![d](/e.png)")
+        expected_nodes = [
+            TextNode("[a ", text_type_text),
+            TextNode("b", text_type_italic),
+            TextNode(" c](/x) and ", text_type_text),
+            TextNode("d", text_type_image, "/e.png"),
+        ]
+        self.assertEqual(result_nodes, expected_nodes)
+
+    # Test text to textnodes - brackets inside a label run to the first "]("
+    def test_text_to_textnodes_nested_brackets(self):
+        result_nodes = text_to_textnodes("See [a] b [c](/d) now")
+        expected_nodes = [
+            TextNode("See ", text_type_text),
+            TextNode("a] b [c", text_type_link, "/d"),
+            TextNode(" now", text_type_text),
+        ]
+        self.assertEqual(result_nodes, expected_nodes)
+
+    # Test text to textnodes - many unclosed brackets stay text
+    def test_text_to_textnodes_unclosed_brackets(self):
+        text = "a[b " * 8000
+        self.assertEqual(text_to_textnodes(text), [TextNode(text, text_type_text)])
+        text = "a[b " * 8000 + "](/c)"
+        result_nodes = text_to_textnodes(text)
+        self.assertEqual(result_nodes[1], TextNode("b " + "a[b " * 7999, text_type_link, "/c"))
+
+    # Test text to textnodes - many links
+    def test_text_to_textnodes_many_links(self):
+        text = "".join(f"[l{i}](/p{i}) " for i in range(100))
+        result_nodes = text_to_textnodes(text)
+        self.assertEqual(len(result_nodes), 200)
+        self.assertEqual(result_nodes[-2], TextNode("l99", text_type_link, "/p99"))
+
 
 
 
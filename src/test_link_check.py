@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+
+from build_manifest import BuildManifest
+from link_check import (
+    check_links,
+    internal_target,
+    target_exists
+)
+
+
+
+
+class TestLinkCheck(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.manifest = BuildManifest(os.path.join(self.temp_dir.name, "manifest.json"))
+        self.manifest.static_files = ["index.css", os.path.join("images", "logo.png")]
+        self.record("index.md", "index.html", ["/posts", "/images/logo.png", "https://example.com/"])
+        self.record("posts/index.md", "posts/index.html", ["../", "../missing.html", "#top"])
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def record(self, source, output, links):
+        previous = self.manifest.pages.get(source)
+        self.manifest.record_page(source, "hash", output, {"title": source, "terms": {}, "links": links})
+        return {source: previous}
+
+    # Test internal target - relative, absolute, directory, external and same-page links
+    def test_internal_target(self):
+        self.assertEqual(internal_target("/posts/", "/"), "posts/")
+        self.assertEqual(internal_target("../images/a%20b.png?v=1#x", "/posts/first/"), "posts/images/a b.png")
+        self.assertEqual(internal_target("../../..", "/posts/"), "")
+        self.assertEqual(internal_target("other.html", "/posts/first.html"), "posts/other.html")
+        self.assertIsNone(internal_target("https://example.com/", "/"))
+        self.assertIsNone(internal_target("//cdn.example.com/a.js", "/"))
+        self.assertIsNone(internal_target("mailto:someone@example.com", "/"))
+        self.assertIsNone(internal_target("#top", "/"))
+
+    # Test target exists - files and directories with an index page
+    def test_target_exists(self):
+        outputs = {"index.html", "posts/index.html", "index.css"}
+        self.assertTrue(target_exists("", outputs))
+        self.assertTrue(target_exists("posts", outputs))
+        self.assertTrue(target_exists("posts/", outputs))
+        self.assertTrue(target_exists("index.css", outputs))
+        self.assertFalse(target_exists("index.css/", outputs))
+        self.assertFalse(target_exists("about", outputs))
+
+    # Test check links - the first check covers every page
+    def test_check_links_full(self):
+        broken, checked = check_links(self.manifest, {})
+        self.assertEqual(checked, 2)
+        self.assertEqual(broken, {"posts/index.md": ["../missing.html"]})
+
+    # Test check links - only replaced pages and pages linking to changed outputs are checked
+    def test_check_links_incremental(self):
+        check_links(self.manifest, {})
+        self.assertEqual(check_links(self.manifest, {}), ({"posts/index.md": ["../missing.html"]}, 0))
+
+        replaced = self.record("missing.md", "missing.html", [])
+        broken, checked = check_links(self.manifest, replaced)
+        self.assertEqual(broken, {})
+        self.assertEqual(checked, 2)
+
+        self.manifest.static_files = ["index.css"]
+        broken, checked = check_links(self.manifest, {})
+        self.assertEqual(broken, {"index.md": ["/images/logo.png"]})
+        self.assertEqual(checked, 1)
+
+        replaced = self.record("index.md", "index.html", ["/posts/"])
+        broken, checked = check_links(self.manifest, replaced)
+        self.assertEqual(broken, {})
+        self.assertEqual(checked, 1)
+
+    # Test check links - deleted pages break the links to them and lose their own
+    def test_check_links_deleted(self):
+        check_links(self.manifest, {})
+        replaced = {"posts/index.md": self.manifest.pages.pop("posts/index.md")}
+        broken, checked = check_links(self.manifest, replaced)
+        self.assertEqual(broken, {"index.md": ["/posts"]})
+        self.assertEqual(checked, 1)
+        self.assertNotIn("posts/index.md", self.manifest.link_check["incoming"].get("", []))
+
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+
+from output_files import (
+    AtomicOutput,
+    copy_atomic,
+    files_identical,
+    write_if_changed
+)
+
+
+
+
+class TestOutputFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "pages", "index.html")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def listing(self):
+        return sorted(os.listdir(os.path.dirname(self.path)))
+
+    # Test write if changed - identical bytes keep the old file and its mtime
+    def test_write_if_changed(self):
+        self.assertTrue(write_if_changed(self.path, b"<p>one</p>"))
+        os.utime(self.path, ns=(0, 0))
+        self.assertFalse(write_if_changed(self.path, b"<p>one</p>"))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+
+        self.assertTrue(write_if_changed(self.path, b"<p>two</p>"))
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), b"<p>two</p>")
+        self.assertEqual(self.listing(), ["index.html"])
+
+    # Test atomic output - replaced only when the content differs
+    def test_atomic_output(self):
+        with AtomicOutput(self.path) as f:
+            f.write("<p>one</p>")
+        os.utime(self.path, ns=(0, 0))
+
+        output = AtomicOutput(self.path)
+        with output as f:
+            f.write("<p>one</p>")
+        self.assertFalse(output.changed)
+        self.assertEqual(output.bytes_written, 0)
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+
+        output = AtomicOutput(self.path)
+        with output as f:
+            f.write("<p>two</p>")
+        self.assertTrue(output.changed)
+        self.assertEqual(output.bytes_written, 10)
+        self.assertEqual(self.listing(), ["index.html"])
+
+    # Test atomic output - an error leaves the old file in place
+    def test_atomic_output_error(self):
+        write_if_changed(self.path, b"<p>old</p>")
+        with self.assertRaises(ValueError):
+            with AtomicOutput(self.path) as f:
+                f.write("<p>half")
+                raise ValueError("render failed")
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), b"<p>old</p>")
+        self.assertEqual(self.listing(), ["index.html"])
+
+    # Test files identical - missing, different size and different bytes
+    def test_files_identical(self):
+        other = os.path.join(self.temp_dir.name, "other.html")
+        write_if_changed(self.path, b"abc")
+        self.assertFalse(files_identical(self.path, other))
+        write_if_changed(other, b"abcd")
+        self.assertFalse(files_identical(self.path, other))
+        write_if_changed(other, b"abd")
+        self.assertFalse(files_identical(self.path, other, chunk_size=1))
+        write_if_changed(other, b"abc")
+        self.assertTrue(files_identical(self.path, other, chunk_size=1))
+
+    # Test copy atomic - content and mtime are copied
+    def test_copy_atomic(self):
+        source = os.path.join(self.temp_dir.name, "style.css")
+        write_if_changed(source, b"body {}")
+        os.utime(source, ns=(10**9, 10**9))
+        copy_atomic(source, self.path)
+        self.assertTrue(files_identical(source, self.path))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 10**9)
+        self.assertEqual(self.listing(), ["index.html"])
+
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+from block_cache import BlockCache
+from block_markdown import parse_markdown
+from htmlnode import (
+    LeafNode,
+    ParentNode
+)
+from page_facts import (
+    PageFacts,
+    node_facts,
+    tokenize
+)
+
+
+
+
+class TestPageFacts(unittest.TestCase):
+
+    # Test tokenize - lowercase words of 2 to 40 letters and digits
+    def test_tokenize(self):
+        self.assertEqual(tokenize("The Hobbit, 1937: a_tale élan"), ["the", "hobbit", "1937", "tale", "élan"])
+
+    # Test node facts - text from leaves and alt texts, links from href and src
+    def test_node_facts(self):
+        node = ParentNode("p", children=[
+            LeafNode(None, "Read the "),
+            LeafNode("a", "Silmarillion", {"href": "/books/silmarillion"}),
+            LeafNode("img", "", {"src": "/images/map.png", "alt": "Map of Arda"}),
+            LeafNode(None, " and the silmarillion again"),
+        ])
+        terms, links = node_facts(node)
+        self.assertEqual(terms, {"read": 1, "the": 2, "silmarillion": 2, "map": 1, "of": 1, "arda": 1, "and": 1, "again": 1})
+        self.assertEqual(links, ["/books/silmarillion", "/images/map.png"])
+
+    # Test parse markdown - facts are the same with and without the block cache
+    def test_parse_markdown_facts(self):
+        markdown = "# Title\n\nSee [the map](/map) twice\n\nSee [the map](/map) twice"
+        facts = PageFacts()
+        parse_markdown(markdown, facts=facts)
+        self.assertEqual(facts.to_dict("Title"), {
+            "title": "Title",
+            "terms": {"title": 1, "see": 2, "the": 2, "map": 2, "twice": 2},
+            "links": ["/map"],
+        })
+
+        cached_facts = PageFacts()
+        cache = BlockCache()
+        parse_markdown(markdown, block_cache=cache, facts=cached_facts)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cached_facts.to_dict("Title"), facts.to_dict("Title"))
+
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from generate_page import (
+    generate_page_safe,
+    generate_pages_pipelined
+)
+from pipeline import bounded_map
+from template import load_template
+
+
+
+
+class TestBoundedMap(unittest.TestCase):
+
+    # Test bounded map - results keep the order of the items
+    def test_order(self):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(bounded_map(executor, lambda x: x * 2, ((i,) for i in range(20)), 3))
+        self.assertEqual(results, [i * 2 for i in range(20)])
+
+    # Test bounded map - no more than depth calls in flight and items pulled lazily
+    def test_depth(self):
+        release = threading.Event()
+        lock = threading.Lock()
+        pulled = []
+        running = [0, 0]
+
+        def items():
+            for i in range(50):
+                pulled.append(i)
+                yield (i,)
+
+        def work(x):
+            with lock:
+                running[0] += 1
+                running[1] = max(running[1], running[0])
+            release.wait(5)
+            with lock:
+                running[0] -= 1
+            return x
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = bounded_map(executor, work, items(), 2)
+            first = ThreadPoolExecutor(max_workers=1)
+            future = first.submit(next, results)
+            # The generator blocks on the first result once depth calls are in flight
+            for _ in range(100):
+                if len(pulled) >= 3 and running[0] >= 2:
+                    break
+                time.sleep(0.01)
+            time.sleep(0.05)
+            self.assertEqual(len(pulled), 3)
+            self.assertEqual(running[0], 2)
+            self.assertFalse(future.done())
+
+            release.set()
+            self.assertEqual(future.result(timeout=5), 0)
+            first.shutdown()
+            self.assertEqual(list(results), list(range(1, 50)))
+        self.assertLessEqual(running[1], 2)
+
+    # Test bounded map - inline without an executor
+    def test_inline(self):
+        self.assertEqual(list(bounded_map(None, str, [(1,), (2,)], 1)), ["1", "2"])
+
+
+
+
+class TestGeneratePagesPipelined(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        template_path = self.path("template.html")
+        with open(template_path, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        self.options = {"template_path": template_path, "template": load_template(template_path), "quiet": True}
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.temp_dir.name, name)
+
+    # Test pipelined generation - same pages and errors as the serial path
+    def test_matches_serial(self):
+        sources = {"a.md": "# A\n\nText", "b.md": "No title", "c.md": "# C\n\n* item"}
+        for name, markdown in sources.items():
+            with open(self.path(name), "w") as f:
+                f.write(markdown)
+        names = sorted(sources) + ["missing.md"]
+
+        serial_jobs = [(self.path(name), self.path(f"serial/{name}.html"), self.options) for name in names]
+        pipelined_jobs = [(self.path(name), self.path(f"pipelined/{name}.html"), self.options) for name in names]
+        pipelined_jobs[2] = (pipelined_jobs[2][0], pipelined_jobs[2][1], {**self.options, "stream_threshold": 0})
+        serial = [generate_page_safe(job) for job in serial_jobs]
+        pipelined = generate_pages_pipelined(pipelined_jobs, io_workers=2, queue_depth=1)
+
+        self.assertEqual([error for error, _ in pipelined], [error for error, _ in serial])
+        self.assertIsNone(pipelined[0][0])
+        self.assertIn("No H1 header found", pipelined[1][0])
+        self.assertIn("FileNotFoundError", pipelined[3][0])
+        for name in ("a.md", "c.md"):
+            with open(self.path(f"serial/{name}.html")) as f, open(self.path(f"pipelined/{name}.html")) as g:
+                self.assertEqual(f.read(), g.read())
+        self.assertEqual(pipelined[0][1]["bytes_written"], serial[0][1]["bytes_written"])
+
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+from render_cache import RenderCache
+
+
+
+
+class TestRenderCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = RenderCache(os.path.join(self.temp_dir.name, "render"))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    # Test render cache - miss, then hit after put
+    def test_get_and_put(self):
+        key = self.cache.key("# Title\n\nBody")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, "<div><h1>Title</h1></div>", "Title", {"title": 1}, ["/a"])
+        self.assertEqual(self.cache.get(key), ("<div><h1>Title</h1></div>", "Title", {"title": 1}, ["/a"]))
+
+    # Test render cache - keys depend on the markdown
+    def test_key(self):
+        self.assertEqual(self.cache.key("# A"), self.cache.key("# A"))
+        self.assertNotEqual(self.cache.key("# A"), self.cache.key("# B"))
+
+    # Test render cache - corrupt entries are misses
+    def test_corrupt_entry(self):
+        key = self.cache.key("# A")
+        self.cache.put(key, "<div></div>", "A", {}, [])
+        with open(self.cache._entry_path(key), "w") as f:
+            f.write("{not json")
+        self.assertIsNone(self.cache.get(key))
+
+    # Test render cache - least recently used entries are evicted first
+    def test_evict(self):
+        keys = [self.cache.key(f"# Page {i}") for i in range(3)]
+        for i, key in enumerate(keys):
+            self.cache.put(key, "x" * 100, f"Page {i}", {}, [])
+            os.utime(self.cache._entry_path(key), ns=(i * 10**9, i * 10**9))
+        self.cache.get(keys[0])
+
+        entry_size = os.path.getsize(self.cache._entry_path(keys[0]))
+        self.cache.max_bytes = entry_size * 2
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+    # Test render cache - evicting a missing directory
+    def test_evict_missing_directory(self):
+        self.assertEqual(self.cache.evict(), 0)
+
+
+
+
+if __name__ == "__main__":
+    unittest.main()
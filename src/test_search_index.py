@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+import unittest
+
+from build_manifest import BuildManifest
+from search_index import (
+    page_url,
+    remove_search_index,
+    shard_name,
+    update_search_index
+)
+
+
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dest = self.temp_dir.name
+        self.manifest = BuildManifest(os.path.join(self.dest, "manifest.json"))
+        self.record("index.md", "Home", {"hobbit": 2, "home": 1})
+        self.record("posts/index.md", "Post", {"hobbit": 1, "ring": 3})
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def record(self, source, title, terms):
+        previous = self.manifest.pages.get(source)
+        output = source.replace(".md", ".html")
+        self.manifest.record_page(source, "hash", output, {"title": title, "terms": terms, "links": []})
+        return {source: previous}
+
+    def read(self, name):
+        with open(os.path.join(self.dest, "search", name)) as f:
+            return json.load(f)
+
+    # Test shard name and page url - ASCII prefixes, hex for others, index pages as directories
+    def test_names(self):
+        self.assertEqual(shard_name("hobbit"), "ho")
+        self.assertEqual(shard_name("élan"), "c3a96c")
+        self.assertEqual(page_url("index.html"), "/")
+        self.assertEqual(page_url(os.path.join("posts", "index.html")), "/posts/")
+        self.assertEqual(page_url("about.html"), "/about.html")
+
+    # Test update search index - first update indexes every page
+    def test_update_full(self):
+        stats = update_search_index(self.dest, self.manifest, {})
+        self.assertEqual((stats["pages"], stats["shards_written"]), (2, 2))
+        self.assertEqual(self.read("index.json"), {
+            "pages": {"0": ["/", "Home"], "1": ["/posts/", "Post"]},
+            "prefix_length": 2,
+            "shards": ["ho", "ri"],
+        })
+        self.assertEqual(self.read("ho.json"), {"hobbit": [[0, 2], [1, 1]], "home": [[0, 1]]})
+        self.assertEqual(self.read("ri.json"), {"ring": [[1, 3]]})
+
+    # Test update search index - only shards of changed terms are rewritten
+    def test_update_incremental(self):
+        update_search_index(self.dest, self.manifest, {})
+        ho_mtime = os.stat(os.path.join(self.dest, "search", "ho.json")).st_mtime_ns
+
+        replaced = self.record("posts/index.md", "Post", {"hobbit": 1, "sword": 1})
+        stats = update_search_index(self.dest, self.manifest, replaced)
+        self.assertEqual((stats["shards_written"], stats["shards_removed"]), (1, 1))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "search", "ri.json")))
+        self.assertEqual(self.read("sw.json"), {"sword": [[1, 1]]})
+        self.assertEqual(os.stat(os.path.join(self.dest, "search", "ho.json")).st_mtime_ns, ho_mtime)
+        self.assertEqual(self.read("index.json")["shards"], ["ho", "sw"])
+
+    # Test update search index - deleted pages lose their postings, ids stay stable
+    def test_update_deleted(self):
+        update_search_index(self.dest, self.manifest, {})
+        replaced = {"index.md": self.manifest.pages.pop("index.md")}
+        replaced.update(self.record("new.md", "New", {"hobbit": 5}))
+        update_search_index(self.dest, self.manifest, replaced)
+        self.assertEqual(self.read("ho.json"), {"hobbit": [[2, 5], [1, 1]]})
+        self.assertEqual(self.read("index.json")["pages"], {"1": ["/posts/", "Post"], "2": ["/new.html", "New"]})
+
+    # Test remove search index - files and state are removed
+    def test_remove(self):
+        update_search_index(self.dest, self.manifest, {})
+        remove_search_index(self.dest, self.manifest)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "search")))
+        self.assertIsNone(self.manifest.search_index)
+
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+
+from build_manifest import BuildManifest
+from sharding import (
+    assign_shards,
+    merge_shards,
+    parse_shard
+)
+
+
+
+
+class TestSharding(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self.temp_dir.name, "public")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.temp_dir.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def shard(self, name, pages, static_files=(), template_hash="t1"):
+        manifest = BuildManifest(os.path.join(self.temp_dir.name, name, "manifest.json"))
+        manifest.template_hash = template_hash
+        for source, output in pages.items():
+            self.write(os.path.join(name, "public", output), f"<p>{source}</p>")
+            manifest.record_page(source, "hash", output, {"title": source, "terms": {}, "links": []})
+        for path in static_files:
+            self.write(os.path.join(name, "public", path), path)
+        manifest.static_files = list(static_files)
+        manifest.save()
+        return os.path.join(self.temp_dir.name, name)
+
+    # Test parse shard - valid and invalid specifications
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for text in ("0/4", "5/4", "2", "a/b", "-1/4"):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+    # Test assign shards - deterministic, complete and balanced by size
+    def test_assign_shards(self):
+        sizes = {f"page{i}.md": 1000 for i in range(8)}
+        sizes["big.md"] = 100000
+        assignment = assign_shards(sizes, 3)
+        self.assertEqual(assignment, assign_shards(dict(reversed(list(sizes.items()))), 3))
+        self.assertEqual(set(assignment), set(sizes))
+        big_shard = assignment["big.md"]
+        self.assertEqual([source for source, index in assignment.items() if index == big_shard], ["big.md"])
+        self.assertEqual(sorted(list(assignment.values()).count(index) for index in (1, 2, 3)), [1, 4, 4])
+
+    # Test merge shards - outputs and manifests are combined, stale outputs removed
+    def test_merge_shards(self):
+        first = self.shard("1-of-2", {"index.md": "index.html"}, ["index.css"])
+        second = self.shard("2-of-2", {"posts/index.md": "posts/index.html"})
+        manifest = BuildManifest(os.path.join(self.temp_dir.name, "manifest.json"))
+
+        replaced, stats = merge_shards([first, second], self.dest, manifest)
+        self.assertEqual(stats, {"copied": 3, "unchanged": 0, "removed": 0})
+        self.assertEqual(replaced, {"index.md": None, "posts/index.md": None})
+        self.assertEqual(set(manifest.pages), {"index.md", "posts/index.md"})
+        self.assertEqual(manifest.static_files, ["index.css"])
+        self.assertEqual(manifest.template_hash, "t1")
+        with open(os.path.join(self.dest, "posts", "index.html")) as f:
+            self.assertEqual(f.read(), "<p>posts/index.md</p>")
+
+        second = self.shard("2-of-2-next", {})
+        replaced, stats = merge_shards([first, second], self.dest, manifest)
+        self.assertEqual(stats, {"copied": 0, "unchanged": 2, "removed": 1})
+        self.assertEqual(list(replaced), ["posts/index.md"])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "posts")))
+
+    # Test merge shards - overlapping pages and different templates are rejected
+    def test_merge_shards_inconsistent(self):
+        first = self.shard("1-of-2", {"index.md": "index.html"})
+        manifest = BuildManifest(os.path.join(self.temp_dir.name, "manifest.json"))
+        with self.assertRaises(ValueError):
+            merge_shards([first, first], self.dest, manifest)
+        with self.assertRaises(ValueError):
+            merge_shards([first, self.shard("2-of-2", {"a.md": "a.html"}, template_hash="t2")], self.dest, manifest)
+        with self.assertRaises(ValueError):
+            merge_shards([os.path.join(self.temp_dir.name, "missing")], self.dest, manifest)
+
+
+
+
+if __name__ == "__main__":
+    unittest.main()
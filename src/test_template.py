@@ -0,0 +1,101 @@
+import os
+import tempfile
+import unittest
+
+from template import (
+    compile_template,
+    load_template
+)
+
+
+
+
+class TestTemplate(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.temp_dir.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    # Test compile template - static and dynamic segments
+    def test_compile_template_segments(self):
+        path = self.write("template.html", "<title>{{ Title }}</title><main>{{ Content }}</main>")
+        template = compile_template(path)
+        expected = (
+            "<title>",
+            ("Title", "{{ Title }}"),
+            "</title><main>",
+            ("Content", "{{ Content }}"),
+            "</main>"
+        )
+        self.assertEqual(template.segments, expected)
+
+    # Test render template
+    def test_render_template(self):
+        path = self.write("template.html", "<title> {{ Title }} </title>{{ Content }}")
+        template = compile_template(path)
+        result = template.render({"Title": "Hi", "Content": "<p>Body</p>"})
+        self.assertEqual(result, "<title> Hi </title><p>Body</p>")
+
+    # Test render template - unknown placeholder is left alone
+    def test_render_template_unknown_placeholder(self):
+        path = self.write("template.html", "{{ Title }} {{ Author }}")
+        template = compile_template(path)
+        self.assertEqual(template.render({"Title": "Hi"}), "Hi {{ Author }}")
+
+    # Test render template - write callable
+    def test_render_template_to_writer(self):
+        path = self.write("template.html", "<h1>{{ Title }}</h1>")
+        chunks = []
+        compile_template(path).render_to(chunks.append, {"Title": "Hi"})
+        self.assertEqual(chunks, ["<h1>", "Hi", "</h1>"])
+
+    # Test partials - inlined and merged with neighbouring static text
+    def test_compile_template_partial(self):
+        self.write("partials/header.html", "<header>{{ Title }}</header>")
+        path = self.write("template.html", "<body>{{> partials/header.html }}<nav></nav></body>")
+        template = compile_template(path)
+        expected = ("<body><header>", ("Title", "{{ Title }}"), "</header><nav></nav></body>")
+        self.assertEqual(template.segments, expected)
+        self.assertEqual(len(template.files), 2)
+
+    # Test partials - include cycle
+    def test_compile_template_partial_cycle(self):
+        self.write("a.html", "{{> b.html }}")
+        self.write("b.html", "{{> a.html }}")
+        with self.assertRaises(ValueError):
+            compile_template(os.path.join(self.temp_dir.name, "a.html"))
+
+    # Test partials - digest covers partial content
+    def test_template_digest_changes_with_partial(self):
+        self.write("header.html", "<header>one</header>")
+        path = self.write("template.html", "{{> header.html }}")
+        first = compile_template(path).digest
+        self.write("header.html", "<header>two</header>")
+        self.assertNotEqual(compile_template(path).digest, first)
+
+    # Test load template - cached until a file changes
+    def test_load_template_cache(self):
+        path = self.write("template.html", "{{ Title }}")
+        template = load_template(path)
+        self.assertIs(load_template(path), template)
+
+        self.write("template.html", "<b>{{ Title }}</b>")
+        os.utime(path, ns=(0, 0))
+        reloaded = load_template(path)
+        self.assertIsNot(reloaded, template)
+        self.assertEqual(reloaded.render({"Title": "Hi"}), "<b>Hi</b>")
+
+
+
+
+if __name__ == "__main__":
+    unittest.main()
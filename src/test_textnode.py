@@ -47,6 +47,13 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("This is a text node", text_type_bold, None)
         self.assertEqual(node, node2)
     
+    # Test TextNode has no per-instance dict
+    def test_textnode_slots(self):
+        node = TextNode("This is a text node", text_type_bold)
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.extra = True
+
     # Test repr for TextNode
     def test_textbode_repr(self):
         node = TextNode("This is a text node", text_type_bold, "https://boot.dev")
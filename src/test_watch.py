@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+
+from watch import (
+    InotifyWatcher,
+    PollingWatcher,
+    create_watcher
+)
+
+
+
+
+class TestWatchers(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.temp_dir.name, "content")
+        os.makedirs(os.path.join(self.content, "posts"))
+        self.page = self.write("content/posts/index.md", "# Post")
+        self.template = self.write("template.html", "{{ Content }}")
+        self.other = self.write("notes.txt", "not watched")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def check_watcher(self, watcher):
+        try:
+            self.assertEqual(watcher.read_changes(timeout=0.05), set())
+
+            self.write("content/posts/index.md", "# Post edited")
+            self.write("notes.txt", "still not watched")
+            self.assertEqual(watcher.read_changes(timeout=1.0), {self.page})
+
+            self.write("template.html", "<main>{{ Content }}</main>")
+            self.assertEqual(watcher.read_changes(timeout=1.0), {self.template})
+
+            os.remove(self.page)
+            self.assertEqual(watcher.read_changes(timeout=1.0), {self.page})
+        finally:
+            watcher.close()
+
+    def write_partial(self):
+        # Created before the watcher, which would otherwise pick up the new directory itself
+        os.makedirs(os.path.join(self.temp_dir.name, "partials"))
+        return self.write("partials/nav.html", "<nav></nav>")
+
+    def check_added_partial(self, watcher, partial):
+        try:
+            watcher.add_files([self.template, partial])
+            self.assertEqual(watcher.read_changes(timeout=0.05), set())
+
+            self.write("partials/nav.html", "<nav>edited</nav>")
+            self.assertEqual(watcher.read_changes(timeout=1.0), {partial})
+        finally:
+            watcher.close()
+
+    # Test polling watcher - edits, removals and unwatched files
+    def test_polling_watcher(self):
+        self.check_watcher(PollingWatcher([self.content], [self.template], interval=0.01))
+
+    # Test inotify watcher - edits, removals and unwatched files
+    def test_inotify_watcher(self):
+        try:
+            watcher = InotifyWatcher([self.content], [self.template])
+        except OSError:
+            self.skipTest("inotify is not available")
+        self.check_watcher(watcher)
+
+    # Test polling watcher - a partial added from a new directory is watched
+    def test_polling_watcher_added_partial(self):
+        partial = self.write_partial()
+        self.check_added_partial(PollingWatcher([self.content], [self.template], interval=0.01), partial)
+
+    # Test inotify watcher - a partial added from a new directory gets a watch of its own
+    def test_inotify_watcher_added_partial(self):
+        partial = self.write_partial()
+        try:
+            watcher = InotifyWatcher([self.content], [self.template])
+        except OSError:
+            self.skipTest("inotify is not available")
+        self.check_added_partial(watcher, partial)
+
+    # Test create watcher - polling can be forced
+    def test_create_watcher_polling(self):
+        watcher = create_watcher([self.content], [self.template], polling=True)
+        self.assertIsInstance(watcher, PollingWatcher)
+        watcher.close()
+
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,20 +1,27 @@
-from htmlnode import LeafNode
+import sys
 
+from htmlnode import (
+    LeafNode,
+    intern_props
+)
 
 
 
-# Define constants for text types
-text_type_text = "text"
-text_type_bold = "bold"
-text_type_italic = "italic"
-text_type_code = "code"
-text_type_link = "link"
-text_type_image = "image"
+
+# Define constants for text types, interned so comparisons and lookups hit identity first
+text_type_text = sys.intern("text")
+text_type_bold = sys.intern("bold")
+text_type_italic = sys.intern("italic")
+text_type_code = sys.intern("code")
+text_type_link = sys.intern("link")
+text_type_image = sys.intern("image")
 
 
 
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         """
         Initialize a TextNode object.
@@ -48,28 +55,58 @@ class TextNode:
 
 
 
-def text_node_to_html_node(text_node):
+def _text_to_html_node(text_node):
+    return LeafNode(None, text_node.text)
+
+
+def _bold_to_html_node(text_node):
+    return LeafNode("b", text_node.text)
+
+
+def _italic_to_html_node(text_node):
+    return LeafNode("i", text_node.text)
+
+
+def _code_to_html_node(text_node):
+    return LeafNode("code", text_node.text)
+
+
+def _link_to_html_node(text_node):
+    if text_node.url is None:
+        raise ValueError("Link type requires a URL")
+    return LeafNode("a", text_node.text, intern_props(href=text_node.url))
+
+
+def _image_to_html_node(text_node):
+    if text_node.url is None:
+        raise ValueError("Image type requires a URL")
+    return LeafNode("img", "", intern_props(src=text_node.url, alt=text_node.text))
+
+
+# Conversion function for each text type
+text_node_converters = {
+    text_type_text: _text_to_html_node,
+    text_type_bold: _bold_to_html_node,
+    text_type_italic: _italic_to_html_node,
+    text_type_code: _code_to_html_node,
+    text_type_link: _link_to_html_node,
+    text_type_image: _image_to_html_node,
+}
+
+
+
+
+def text_node_to_html_node(text_node, rewrite_url=None):
     """
     Converts a TextNode to an HTMLNode.
 
     :param text_node:   The TextNode to convert
+    :param rewrite_url: Optional callable mapping the URL of a link or image to the one rendered
     :return:            A corresponding HTMLNode
     """
-    if text_node.text_type == text_type_text:
-        return LeafNode(None, text_node.text)
-    elif text_node.text_type == text_type_bold:
-        return LeafNode("b", text_node.text)
-    elif text_node.text_type == text_type_italic:
-        return LeafNode("i", text_node.text)
-    elif text_node.text_type == text_type_code:
-        return LeafNode("code", text_node.text)
-    elif text_node.text_type == text_type_link:
-        if text_node.url is None:
-            raise ValueError("Link type requires a URL")
-        return LeafNode("a", text_node.text, {"href": text_node.url})        
-    elif text_node.text_type == text_type_image:
-        if text_node.url is None:
-            raise ValueError("Image type requires a URL")
-        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
-    else:
-        raise ValueError("Unsupported text type")
\ No newline at end of file
+    converter = text_node_converters.get(text_node.text_type)
+    if converter is None:
+        raise ValueError("Unsupported text type")
+    if rewrite_url is not None and text_node.url is not None:
+        text_node = TextNode(text_node.text, text_node.text_type, rewrite_url(text_node.url))
+    return converter(text_node)
@@ -0,0 +1,254 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+
+
+
+# inotify event flags, from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+watch_mask = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM
+    | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+)
+
+# struct inotify_event header: wd, mask, cookie, len
+inotify_event_header = struct.Struct("iIII")
+
+
+
+
+class InotifyWatcher:
+    def __init__(self, recursive_dirs, files):
+        """
+        Initialize an InotifyWatcher using the Linux inotify API through libc.
+
+        :param recursive_dirs:  Directories watched together with every subdirectory
+        :param files:           Individual files to watch, through their parent directories
+        :raise OSError:         If inotify is not available on this system
+        """
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("libc not found")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self.libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.watches = {}
+        self.recursive_dirs = [os.path.abspath(path) for path in recursive_dirs]
+        self.files = {os.path.abspath(path) for path in files}
+
+        for path in self.recursive_dirs:
+            self._add_tree(path)
+        for path in {os.path.dirname(path) for path in self.files}:
+            self._add_watch(path)
+
+    def _add_watch(self, path):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), watch_mask)
+        if wd >= 0:
+            self.watches[wd] = path
+
+    def _add_tree(self, path):
+        for root, dirs, _ in os.walk(path):
+            self._add_watch(root)
+
+    def add_files(self, files):
+        """
+        Start watching more individual files, such as partials newly used by the template.
+
+        Parent directories not watched yet get their own watch, so edits to
+        files outside the directories known so far are reported.
+
+        :param files:           Paths of the files to watch
+        """
+        files = {os.path.abspath(path) for path in files}
+        self.files.update(files)
+        watched = set(self.watches.values())
+        for path in {os.path.dirname(path) for path in files} - watched:
+            self._add_watch(path)
+
+    def _is_watched(self, path):
+        return path in self.files or any(
+            path == root or path.startswith(root + os.sep) for root in self.recursive_dirs
+        )
+
+    def read_changes(self, timeout):
+        """
+        Wait for file system events and return the paths they touched.
+
+        :param timeout:         Seconds to wait for the first event
+        :return:                A set of absolute paths, empty if nothing happened
+        """
+        changed = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return changed
+
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = inotify_event_header.unpack_from(data, offset)
+                offset += inotify_event_header.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    changed.update(self.recursive_dirs)
+                    changed.update(self.files)
+                    continue
+
+                directory = self.watches.get(wd)
+                if directory is None:
+                    continue
+                if mask & IN_IGNORED:
+                    del self.watches[wd]
+                    continue
+
+                path = os.path.join(directory, name) if name else directory
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    self._add_tree(path)
+                if self._is_watched(path):
+                    changed.add(path)
+
+        return changed
+
+    def close(self):
+        """
+        Release the inotify file descriptor.
+        """
+        os.close(self.fd)
+
+
+
+
+class PollingWatcher:
+    def __init__(self, recursive_dirs, files, interval=0.5):
+        """
+        Initialize a PollingWatcher that compares file sizes and mtimes periodically.
+
+        :param recursive_dirs:  Directories watched together with every subdirectory
+        :param files:           Individual files to watch
+        :param interval:        Seconds between two scans
+        """
+        self.recursive_dirs = [os.path.abspath(path) for path in recursive_dirs]
+        self.files = {os.path.abspath(path) for path in files}
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        paths = list(self.files)
+        for path in self.recursive_dirs:
+            for root, _, names in os.walk(path):
+                paths.extend(os.path.join(root, name) for name in names)
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def add_files(self, files):
+        """
+        Start watching more individual files, such as partials newly used by the template.
+
+        Their current state is recorded, so only later edits are reported.
+
+        :param files:           Paths of the files to watch
+        """
+        for path in {os.path.abspath(path) for path in files} - self.files:
+            self.files.add(path)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            self.snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+
+    def read_changes(self, timeout):
+        """
+        Rescan the watched paths and return the files added, removed or modified.
+
+        :param timeout:         Seconds to wait before scanning, capped at the poll interval
+        :return:                A set of absolute paths, empty if nothing changed
+        """
+        time.sleep(min(timeout, self.interval))
+        snapshot = self._scan()
+        changed = {
+            path for path in snapshot.keys() | self.snapshot.keys()
+            if snapshot.get(path) != self.snapshot.get(path)
+        }
+        self.snapshot = snapshot
+        return changed
+
+    def close(self):
+        """
+        Nothing to release for a polling watcher.
+        """
+
+
+
+
+def create_watcher(recursive_dirs, files, polling=False):
+    """
+    Create an inotify watcher, falling back to polling where inotify is unavailable.
+
+    :param recursive_dirs:  Directories watched together with every subdirectory
+    :param files:           Individual files to watch
+    :param polling:         Force the polling watcher
+    :return:                An InotifyWatcher or PollingWatcher object
+    """
+    if not polling:
+        try:
+            return InotifyWatcher(recursive_dirs, files)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(recursive_dirs, files)
+
+
+
+
+def watch(watcher, on_change, debounce=0.1):
+    """
+    Call on_change with each debounced batch of changed paths, until interrupted.
+
+    Events are collected until none have arrived for the debounce interval, so
+    an editor's burst of writes and renames results in a single rebuild.
+
+    :param watcher:         An InotifyWatcher or PollingWatcher object
+    :param on_change:       Callable receiving the set of changed paths
+    :param debounce:        Quiet period in seconds that ends a batch
+    """
+    while True:
+        changed = watcher.read_changes(timeout=1.0)
+        if not changed:
+            continue
+        while True:
+            more = watcher.read_changes(timeout=debounce)
+            if not more:
+                break
+            changed |= more
+        on_change(changed)